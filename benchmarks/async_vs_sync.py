@@ -0,0 +1,134 @@
+# Sync vs. async availability throughput on a single uvicorn worker.
+#
+#   DB_URL=sqlite:///./bench.db ASYNC_DB_URL=sqlite+aiosqlite:///./bench.db \
+#       python -m benchmarks.async_vs_sync --concurrency 2000
+#
+# Seeds a fleet and one pending booking, then keeps `--concurrency` requests in
+# flight against /get_available_cars and /async/get_available_cars in turn.
+# Needs httpx on the client side and aiosqlite/asyncpg for the async engine.
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+import httpx
+
+
+def seed(cars: int):
+    from database.database import Base, SessionLocal, engine
+    from src.models.booking import Booking
+    from src.models.car_details import Car
+    import src.models.user
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    db.add_all(
+        Car(
+            id=str(uuid.uuid4()),
+            car_name=f"bench-car-{i}",
+            car_rc=f"BENCH-{uuid.uuid4()}",
+            car_rent=100,
+            car_capacity=4,
+            car_detail="benchmark",
+            car_picture="",
+        )
+        for i in range(cars)
+    )
+    booking_id = str(uuid.uuid4())
+    db.add(
+        Booking(
+            booking_id=booking_id,
+            name="bench",
+            phone_no="0000000000",
+            email="bench@example.com",
+            car_capacity=4,
+            start_date=date.today() + timedelta(days=1),
+            end_date=date.today() + timedelta(days=3),
+        )
+    )
+    db.commit()
+    db.close()
+    return booking_id
+
+
+async def drive(url: str, concurrency: int, duration: float):
+    done = 0
+    failed = 0
+    stop_at = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+
+        async def worker():
+            nonlocal done, failed
+            while time.monotonic() < stop_at:
+                try:
+                    response = await client.get(url)
+                    if response.status_code == 200:
+                        done += 1
+                    else:
+                        failed += 1
+                except httpx.HTTPError:
+                    failed += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return done, failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cars", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    if not os.environ.get("ASYNC_DB_URL"):
+        sys.exit("ASYNC_DB_URL must be set so the /async routes are mounted")
+
+    booking_id = seed(args.cars)
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(args.port),
+            "--log-level",
+            "warning",
+        ],
+        env=os.environ.copy(),
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(base_url + "/docs", timeout=1)
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+
+        for label, path in (
+            ("sync", "/get_available_cars"),
+            ("async", "/async/get_available_cars"),
+        ):
+            url = f"{base_url}{path}?booking_id={booking_id}"
+            ok, failed = asyncio.run(drive(url, args.concurrency, args.duration))
+            print(
+                f"{label:5} concurrency={args.concurrency} "
+                f"rps={ok / args.duration:.1f} ok={ok} errors={failed}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
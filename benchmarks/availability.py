@@ -0,0 +1,80 @@
+# Availability index latency at fleet scale.
+#
+#   python -m benchmarks.availability --cars 10000 --bookings 1000000
+#
+# Builds the in-process index from synthetic bookings (no database needed) and
+# times free-car lookups for random date ranges over one capacity class.
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from src.utils.availability import AvailabilityIndex, CarIntervals
+
+
+def build_index(cars: int, bookings: int, capacities: int, horizon: int):
+    start = date.today()
+    spans = {}
+    per_car = max(bookings // cars, 1)
+    slot = max(horizon // per_car, 1)
+    booking_no = 0
+    for car_no in range(cars):
+        car_id = f"car-{car_no}"
+        for i in range(per_car):
+            if booking_no >= bookings:
+                break
+            first_day = start + timedelta(days=i * slot + random.randrange(slot))
+            last_day = first_day + timedelta(days=random.randrange(1, 5))
+            spans.setdefault(car_id, []).append(
+                (first_day, last_day, f"booking-{booking_no}")
+            )
+            booking_no += 1
+
+    index = AvailabilityIndex()
+    index._cars = {car_id: CarIntervals.from_spans(s) for car_id, s in spans.items()}
+    index._bookings = {
+        span[2]: (car_id, span[0]) for car_id, s in spans.items() for span in s
+    }
+    index.loaded = True
+
+    capacity_classes = {}
+    for car_no in range(cars):
+        capacity_classes.setdefault(car_no % capacities, []).append(f"car-{car_no}")
+    return index, capacity_classes, booking_no
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cars", type=int, default=10000)
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--capacities", type=int, default=4)
+    parser.add_argument("--horizon", type=int, default=3650)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index, capacity_classes, total = build_index(
+        args.cars, args.bookings, args.capacities, args.horizon
+    )
+    build_s = time.perf_counter() - t0
+    print(f"built index: {args.cars} cars, {total} bookings in {build_s:.2f}s")
+
+    today = date.today()
+    car_ids = capacity_classes[0]
+    timings = []
+    for _ in range(args.queries):
+        start_date = today + timedelta(days=random.randrange(args.horizon))
+        end_date = start_date + timedelta(days=random.randrange(1, 14))
+        t0 = time.perf_counter()
+        index.free_car_ids(car_ids, start_date, end_date)
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    timings.sort()
+    print(f"cars per capacity: {len(car_ids)}")
+    print(f"p50 {statistics.median(timings):.3f} ms")
+    print(f"p95 {timings[int(len(timings) * 0.95)]:.3f} ms")
+    print(f"p99 {timings[int(len(timings) * 0.99)]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
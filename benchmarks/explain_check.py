@@ -0,0 +1,156 @@
+# Fails if any hot router query is planned as a sequential scan.
+#
+#   DB_URL=sqlite:///./explain.db python -m benchmarks.explain_check --seed 1000000
+#
+# Run `alembic upgrade head` first so the indexes exist. With --seed the
+# tables are filled with that many bookings (plus proportional cars and users)
+# before the plans are checked. Works on SQLite and Postgres.
+# tests/test_query_plans.py runs the same checks against a small SQLite seed.
+import argparse
+import random
+import sys
+import uuid
+from datetime import date, timedelta
+from sqlalchemy import insert, text
+from database.database import SessionLocal, engine
+from src.models.booking import Booking
+from src.models.car_details import Car
+from src.models.user import User
+from src.utils.availability import overlapping_booking_exists
+
+
+def seed(db, bookings: int):
+    cars = max(bookings // 100, 10)
+    users = max(bookings // 10, 10)
+    chunk = 10000
+    today = date.today()
+
+    car_ids = [str(uuid.uuid4()) for _ in range(cars)]
+    for i in range(0, cars, chunk):
+        db.execute(
+            insert(Car),
+            [
+                dict(
+                    id=car_ids[j],
+                    car_name=f"car-{j}",
+                    car_rc=f"RC-{j}",
+                    car_rent=100,
+                    car_capacity=2 + j % 4,
+                    car_detail="seeded",
+                )
+                for j in range(i, min(i + chunk, cars))
+            ],
+        )
+    for i in range(0, users, chunk):
+        db.execute(
+            insert(User),
+            [
+                dict(
+                    id=str(uuid.uuid4()),
+                    name=f"user-{j}",
+                    email=f"user{j}@example.com",
+                    phone_no="0000000000",
+                    password="x",
+                    is_verified=True,
+                )
+                for j in range(i, min(i + chunk, users))
+            ],
+        )
+    for i in range(0, bookings, chunk):
+        rows = []
+        for j in range(i, min(i + chunk, bookings)):
+            car_no = j % cars
+            # Each car's bookings follow one another, as the overlap trigger
+            # and exclusion constraint require
+            start_date = today + timedelta(days=8 * (j // cars) - 1000)
+            rows.append(
+                dict(
+                    booking_id=str(uuid.uuid4()),
+                    car_id=car_ids[car_no],
+                    car_rc=f"RC-{car_no}",
+                    car_name=f"car-{car_no}",
+                    name="seed",
+                    phone_no="0000000000",
+                    email=f"user{j % users}@example.com",
+                    car_capacity=2 + car_no % 4,
+                    start_date=start_date,
+                    end_date=start_date + timedelta(days=random.randrange(1, 7)),
+                    in_process=False,
+                    is_booked=random.random() < 0.8,
+                    is_cancelled=random.random() < 0.1,
+                )
+            )
+        db.execute(insert(Booking), rows)
+        db.commit()
+    if engine.dialect.name == "postgresql":
+        db.execute(text("ANALYZE"))
+    db.commit()
+
+
+def hot_queries(db):
+    today = date.today()
+    email = "user1@example.com"
+    return {
+        "login_user": db.query(User).filter(
+            User.email == email,
+            User.is_active == True,
+            User.is_verified == True,
+            User.is_deleted == False,
+        ),
+        "car_rc_duplicate": db.query(Car).filter(Car.car_rc == "RC-1"),
+        "car_by_name": db.query(Car).filter(Car.car_name == "car-1"),
+        "car_by_capacity": db.query(Car).filter(
+            Car.car_capacity == 4, Car.is_deleted == False
+        ),
+        "booking_by_id": db.query(Booking).filter(Booking.booking_id == "x"),
+        "verify_payment_otp": db.query(Booking).filter(
+            Booking.booking_id == "x",
+            Booking.is_booked == False,
+            Booking.in_process == True,
+        ),
+        "available_cars_fallback": db.query(Car).filter(
+            Car.car_capacity == 4,
+            Car.is_deleted == False,
+            ~overlapping_booking_exists(today, today + timedelta(days=3)),
+        ),
+    }
+
+
+def sequential_scans(db, query):
+    sql = str(
+        query.statement.compile(
+            dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+        )
+    )
+    if engine.dialect.name == "sqlite":
+        plan = [row[-1] for row in db.execute(text("EXPLAIN QUERY PLAN " + sql))]
+        return [
+            line
+            for line in plan
+            if line.startswith("SCAN") and "USING" not in line and "INDEX" not in line
+        ]
+    plan = [row[0] for row in db.execute(text("EXPLAIN " + sql))]
+    return [line.strip() for line in plan if "Seq Scan" in line]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    if args.seed:
+        seed(db, args.seed)
+
+    failed = False
+    for name, query in hot_queries(db).items():
+        scans = sequential_scans(db, query)
+        status = "SEQ SCAN" if scans else "ok"
+        print(f"{name:26} {status} {'; '.join(scans)}")
+        failed = failed or bool(scans)
+    db.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+# End-to-end booking funnel benchmark.
+#
+#   DB_URL=sqlite:///./funnel.db python -m benchmarks.funnel --users 200 --concurrency 16
+#   DB_URL=postgresql://... python -m benchmarks.funnel --users 1000 --concurrency 64
+#   python -m benchmarks.funnel --compare before.json after.json
+#
+# Creates the tables and seeds a fleet if the database has no cars, starts a
+# stub SMTP server and `uvicorn main:app` pointed at it, then runs `--users`
+# complete funnels from `--concurrency` client threads:
+#
+#   register_user -> generate otp -> verify_otp -> login_user ->
+#   select_date_capacity -> get_available_cars -> select_car ->
+#   send_payment_otp -> verify_payment_otp
+#
+# OTPs are read from the mail the stub SMTP server receives. Reports funnel
+# throughput, p50/p95/p99 latency and error count per step, and DB queries per
+# request (from the app's /metrics), and writes everything to a JSON file
+# named after the current commit so runs can be diffed with --compare.
+import argparse
+import json
+import os
+import random
+import re
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+import httpx
+
+STEPS = [
+    ("register_user", "POST", "/register_user"),
+    ("generate_otp", "POST", "/generate otp"),
+    ("verify_otp", "GET", "/verify_otp"),
+    ("login_user", "GET", "/login_user"),
+    ("select_date_capacity", "POST", "/select_date_capacity"),
+    ("get_available_cars", "GET", "/get_available_cars"),
+    ("select_car", "POST", "/select_car/{booking_id}"),
+    ("send_payment_otp", "POST", "/send_payment_otp"),
+    ("verify_payment_otp", "GET", "/verify_payment_otp"),
+]
+OTP_PATTERN = re.compile(rb"OTP(?: is|:) (\d{4})")
+RECIPIENT_PATTERN = re.compile(rb"<([^>]+)>")
+
+
+# ----------------------------------------------------------------------------------------------------
+# Stub SMTP server: accepts everything and remembers the last OTP per recipient
+class Mailbox:
+    def __init__(self):
+        self._otps = {}
+        self._condition = threading.Condition()
+
+    def deliver(self, recipients, data: bytes):
+        found = OTP_PATTERN.findall(data)
+        if not found:
+            return
+        with self._condition:
+            for recipient in recipients:
+                self._otps[recipient] = found[-1].decode()
+            self._condition.notify_all()
+
+    def take_otp(self, email: str, timeout: float = 30):
+        with self._condition:
+            if not self._condition.wait_for(lambda: email in self._otps, timeout):
+                raise TimeoutError(f"no OTP mailed to {email}")
+            return self._otps.pop(email)
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 funnel-bench ESMTP")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b"EHLO":
+                self.reply("250-funnel-bench")
+                self.reply("250 AUTH PLAIN")
+            elif command == b"AUTH":
+                self.reply("235 Authentication successful")
+            elif command == b"RCPT":
+                recipients += [
+                    match.decode() for match in RECIPIENT_PATTERN.findall(line)
+                ]
+                self.reply("250 OK")
+            elif command == b"DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                chunks = []
+                for data_line in self.rfile:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    chunks.append(data_line)
+                self.server.mailbox.deliver(recipients, b"".join(chunks))
+                recipients = []
+                self.reply("250 OK")
+            elif command == b"QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int, mailbox: Mailbox):
+        super().__init__(("127.0.0.1", port), SMTPHandler)
+        self.mailbox = mailbox
+
+
+# ----------------------------------------------------------------------------------------------------
+# Setup
+def seed(cars: int, capacity: int):
+    from database.database import Base, SessionLocal, engine
+    from src.models.car_details import Car
+    import src.models.booking
+    import src.models.user
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    if not db.query(Car).first():
+        db.add_all(
+            Car(
+                id=str(uuid.uuid4()),
+                car_name=f"funnel-car-{i}",
+                car_rc=f"FUNNEL-{uuid.uuid4()}",
+                car_rent=100 + i % 50,
+                car_capacity=capacity,
+                car_detail="benchmark",
+            )
+            for i in range(cars)
+        )
+        db.commit()
+    db.close()
+
+
+def start_server(port: int, smtp_port: int):
+    env = os.environ.copy()
+    env.update(
+        SMTP_HOST="127.0.0.1",
+        SMTP_PORT=str(smtp_port),
+        SMTP_STARTTLS="false",
+        SENDER_EMAIL=env.get("SENDER_EMAIL") or "bench@example.com",
+        EMAIL_PASSWORD=env.get("EMAIL_PASSWORD") or "bench",
+        MAIL_TRANSPORT="smtp",
+        # Every funnel comes from 127.0.0.1; the OTP/login limiter would
+        # throttle the benchmark instead of the app being measured
+        RATE_LIMIT_ENABLED="false",
+    )
+    env.setdefault("LOG_STDOUT", "false")
+    env.setdefault("SECRET_KEY", "funnel-bench-secret")
+    env.setdefault("ALGORITHM", "HS256")
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            httpx.get(base_url + "/docs", timeout=1)
+            return server, base_url
+        except httpx.HTTPError:
+            if time.monotonic() > deadline or server.poll() is not None:
+                server.terminate()
+                raise RuntimeError("server did not start")
+            time.sleep(0.2)
+
+
+# ----------------------------------------------------------------------------------------------------
+# One funnel per virtual user
+class Recorder:
+    def __init__(self, max_retries: int = 20):
+        self.max_retries = max_retries
+        self.timings = {name: [] for name, _, _ in STEPS}
+        self.errors = {name: {} for name, _, _ in STEPS}
+        self.throttled = {name: 0 for name, _, _ in STEPS}
+        self.completed = 0
+        self._lock = threading.Lock()
+
+    # 429s are retried after Retry-After, as a real client would; the recorded
+    # latency covers all attempts.
+    def call(self, name: str, send):
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = send()
+            except httpx.HTTPError:
+                response = None
+            if response is None or response.status_code != 429:
+                break
+            if attempt < self.max_retries:
+                with self._lock:
+                    self.throttled[name] += 1
+                time.sleep(float(response.headers.get("retry-after", 1)))
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.timings[name].append(elapsed)
+            if response is None or response.status_code >= 400:
+                status = "error" if response is None else str(response.status_code)
+                self.errors[name][status] = self.errors[name].get(status, 0) + 1
+                return None
+        return response
+
+
+def run_funnel(client, mailbox: Mailbox, recorder: Recorder, capacity: int, horizon):
+    email = f"funnel-{uuid.uuid4().hex}@example.com"
+    password = "funnel-password"
+    call = recorder.call
+
+    if not call(
+        "register_user",
+        lambda: client.post(
+            "/register_user",
+            json=dict(
+                name="funnel", email=email, phone_no="0000000000", password=password
+            ),
+        ),
+    ):
+        return
+    if not call(
+        "generate_otp", lambda: client.post("/generate otp", params={"email": email})
+    ):
+        return
+    otp = mailbox.take_otp(email)
+    if not call(
+        "verify_otp",
+        lambda: client.get("/verify_otp", params=dict(email=email, otp=otp)),
+    ):
+        return
+    response = call(
+        "login_user",
+        lambda: client.get("/login_user", params=dict(email=email, password=password)),
+    )
+    if not response:
+        return
+    token = response.json()[0]["access_token"]
+
+    start_date = date.today() + timedelta(days=random.randrange(1, horizon))
+    end_date = start_date + timedelta(days=random.randrange(1, 4))
+    response = call(
+        "select_date_capacity",
+        lambda: client.post(
+            "/select_date_capacity",
+            params={"token": token},
+            json=dict(
+                start_date=str(start_date),
+                end_date=str(end_date),
+                car_capacity=capacity,
+            ),
+        ),
+    )
+    if not response:
+        return
+    booking_id = response.json()["booking_id"]
+    response = call(
+        "get_available_cars",
+        lambda: client.get("/get_available_cars", params={"booking_id": booking_id}),
+    )
+    if not response:
+        return
+    car = random.choice(response.json())
+    if not call(
+        "select_car",
+        lambda: client.post(
+            f"/select_car/{booking_id}",
+            json={"car_id": car["id"], "car_name": car["car_name"]},
+        ),
+    ):
+        return
+    if not call(
+        "send_payment_otp",
+        lambda: client.post("/send_payment_otp", params={"booking_id": booking_id}),
+    ):
+        return
+    otp = mailbox.take_otp(email)
+    if not call(
+        "verify_payment_otp",
+        lambda: client.get(
+            "/verify_payment_otp", params=dict(booking_id=booking_id, otp=otp)
+        ),
+    ):
+        return
+    with recorder._lock:
+        recorder.completed += 1
+
+
+# ----------------------------------------------------------------------------------------------------
+# Reporting
+def percentile(values, fraction: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def scrape_queries(base_url: str):
+    # route -> (requests, queries) from the app's Prometheus counters
+    text = httpx.get(base_url + "/metrics", timeout=10).text
+    requests, queries = {}, {}
+    for line in text.splitlines():
+        match = re.match(r'http_requests_total\{method="\w+",route="([^"]+)",', line)
+        if match:
+            route = match.group(1)
+            requests[route] = requests.get(route, 0) + float(line.rsplit(" ", 1)[1])
+            continue
+        match = re.match(r'http_db_queries_total\{method="\w+",route="([^"]+)"\}', line)
+        if match:
+            route = match.group(1)
+            queries[route] = queries.get(route, 0) + float(line.rsplit(" ", 1)[1])
+    return {route: (requests[route], queries.get(route, 0)) for route in requests}
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def report(results: dict):
+    print(
+        f"{results['completed']}/{results['users']} funnels in "
+        f"{results['elapsed_s']:.1f}s ({results['funnels_per_s']:.2f} funnels/s)"
+    )
+    print(
+        f"{'step':22} {'count':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'queries':>8} {'429s':>6}  errors by status"
+    )
+    for name, step in results["steps"].items():
+        cells = [
+            f"{step[key] * 1000:8.1f}" if step[key] is not None else f"{'-':>8}"
+            for key in ("p50_s", "p95_s", "p99_s")
+        ]
+        queries = step["db_queries_per_request"]
+        print(
+            f"{name:22} {step['count']:6} {step['errors']:6} {' '.join(cells)} "
+            f"{queries if queries is not None else '-':>8} {step['throttled']:6}  "
+            f"{step['errors_by_status'] or ''}"
+        )
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{before['commit']} -> {after['commit']}")
+    print(
+        f"funnels/s {before['funnels_per_s']:.2f} -> {after['funnels_per_s']:.2f} "
+        f"({(after['funnels_per_s'] / before['funnels_per_s'] - 1) * 100:+.1f}%)"
+    )
+    for name, step in after["steps"].items():
+        old = before["steps"].get(name)
+        if not old or not old["p95_s"] or not step["p95_s"]:
+            continue
+        print(
+            f"{name:22} p95 {old['p95_s'] * 1000:8.1f} -> {step['p95_s'] * 1000:8.1f} ms "
+            f"({(step['p95_s'] / old['p95_s'] - 1) * 100:+6.1f}%)  queries "
+            f"{old['db_queries_per_request']} -> {step['db_queries_per_request']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--cars", type=int, default=500)
+    parser.add_argument("--capacity", type=int, default=4)
+    parser.add_argument("--horizon", type=int, default=365)
+    parser.add_argument("--port", type=int, default=8769)
+    parser.add_argument("--smtp-port", type=int, default=8025)
+    parser.add_argument("--output")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    seed(args.cars, args.capacity)
+    mailbox = Mailbox()
+    smtp_server = SMTPServer(args.smtp_port, mailbox)
+    threading.Thread(target=smtp_server.serve_forever, daemon=True).start()
+    server, base_url = start_server(args.port, args.smtp_port)
+
+    recorder = Recorder()
+    remaining = iter(range(args.users))
+    remaining_lock = threading.Lock()
+
+    def worker():
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            while True:
+                with remaining_lock:
+                    if next(remaining, None) is None:
+                        return
+                try:
+                    run_funnel(client, mailbox, recorder, args.capacity, args.horizon)
+                except (TimeoutError, KeyError, IndexError, ValueError) as e:
+                    print(f"funnel aborted: {e!r}", file=sys.stderr)
+
+    try:
+        queries_before = scrape_queries(base_url)
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        queries_after = scrape_queries(base_url)
+    finally:
+        server.terminate()
+        server.wait()
+        smtp_server.shutdown()
+
+    steps = {}
+    for name, _, route in STEPS:
+        requests, queries = queries_after.get(route, (0, 0))
+        old_requests, old_queries = queries_before.get(route, (0, 0))
+        served = requests - old_requests
+        steps[name] = dict(
+            count=len(recorder.timings[name]),
+            errors=sum(recorder.errors[name].values()),
+            errors_by_status=recorder.errors[name],
+            throttled=recorder.throttled[name],
+            p50_s=percentile(recorder.timings[name], 0.50),
+            p95_s=percentile(recorder.timings[name], 0.95),
+            p99_s=percentile(recorder.timings[name], 0.99),
+            db_queries_per_request=(
+                round((queries - old_queries) / served, 2) if served else None
+            ),
+        )
+
+    commit = current_commit()
+    results = dict(
+        commit=commit,
+        timestamp=datetime.now().isoformat(timespec="seconds"),
+        db_url=os.environ.get("DB_URL", "").split("@")[-1],
+        users=args.users,
+        concurrency=args.concurrency,
+        cars=args.cars,
+        completed=recorder.completed,
+        elapsed_s=elapsed,
+        funnels_per_s=recorder.completed / elapsed,
+        steps=steps,
+    )
+    report(results)
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"funnel-{commit}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
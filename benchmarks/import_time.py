@@ -0,0 +1,106 @@
+# Import time and side effects of `import main`, with a budget.
+#
+#   DB_URL=sqlite:///./bench.db python -m benchmarks.import_time --budget-ms 1500
+#
+# Imports main in --runs fresh interpreters and checks that the import left no
+# engine, no extra thread, no log file and no photo directory behind (LOG_FILE
+# and PHOTO_DIR point into a temp dir, DB_URL at a database that must not be
+# created). Prints the median import time and the slowest modules from
+# -X importtime, and exits 1 when the median is over --budget-ms or a side
+# effect was found, so it can gate CI.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+import json, os, sys, threading, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+import database.database as database
+import logs.log_config as log_config
+print(json.dumps({
+    "seconds": elapsed,
+    "engine": database._engine is not None,
+    "async_engine": database.async_engine is not None,
+    "threads": [t.name for t in threading.enumerate() if t is not threading.main_thread()],
+    "logging": log_config._handler_id is not None,
+}))
+"""
+
+
+def import_once(env: dict, importtime: bool = False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    result = subprocess.run(
+        command + ["-c", CHILD], env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def slowest_modules(stderr: str, top: int):
+    # "import time: self [us] | cumulative | imported package"
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append((int(cumulative_us), int(self_us), name.rstrip()))
+    # What main imports directly, one level below it
+    direct = [m for m in modules if len(m[2]) - len(m[2].lstrip()) == 3]
+    return sorted(direct, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = os.environ.copy()
+        env.update(
+            DB_URL=f"sqlite:///{os.path.join(tmp, 'untouched.db')}",
+            LOG_FILE=os.path.join(tmp, "logs", "app.log"),
+            PHOTO_DIR=os.path.join(tmp, "photos"),
+        )
+        problems = []
+        times = []
+        for _ in range(args.runs):
+            result, _ = import_once(env)
+            times.append(result["seconds"])
+            if result["engine"] or result["async_engine"]:
+                problems.append("an engine was created")
+            if result["threads"]:
+                problems.append(f"threads were started: {result['threads']}")
+            if result["logging"]:
+                problems.append("the log handler was installed")
+        for name in ("untouched.db", "logs", "photos"):
+            if os.path.exists(os.path.join(tmp, name)):
+                problems.append(f"{name} was created")
+
+        _, stderr = import_once(env, importtime=True)
+
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for cumulative_us, self_us, name in slowest_modules(stderr, args.top):
+        print(f"{cumulative_us / 1000:10.1f}ms {self_us / 1000:8.1f}ms  {name.strip()}")
+
+    median_ms = statistics.median(times) * 1000
+    print(
+        f"import main: median {median_ms:.1f} ms over {args.runs} runs"
+        f" (budget {args.budget_ms:.0f} ms)"
+    )
+    for problem in sorted(set(problems)):
+        print(f"side effect: {problem}")
+    if median_ms > args.budget_ms or problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
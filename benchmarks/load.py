@@ -0,0 +1,93 @@
+# Throughput vs. uvicorn worker count.
+#
+#   DB_URL=postgresql://... python -m benchmarks.load --workers 1 2 4 --path /get_all_car
+#
+# Starts `uvicorn main:app` once per worker count, hammers one GET route from a
+# pool of client threads for a fixed duration and prints requests per second.
+# The database must already have tables (and some data for the chosen route);
+# the client side needs httpx.
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+import httpx
+
+
+def wait_until_up(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(base_url + "/docs", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def hammer(url: str, clients: int, duration: float):
+    counts = [0] * clients
+    errors = [0] * clients
+    stop_at = time.monotonic() + duration
+
+    def run(i):
+        with httpx.Client(timeout=10) as client:
+            while time.monotonic() < stop_at:
+                try:
+                    response = client.get(url)
+                    if response.status_code < 500:
+                        counts[i] += 1
+                    else:
+                        errors[i] += 1
+                except httpx.HTTPError:
+                    errors[i] += 1
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts), sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--path", default="/get_all_car")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "main:app",
+                "--port",
+                str(args.port),
+                "--workers",
+                str(workers),
+                "--log-level",
+                "warning",
+            ],
+            env=os.environ.copy(),
+        )
+        try:
+            wait_until_up(base_url)
+            ok, failed = hammer(base_url + args.path, args.clients, args.duration)
+            print(
+                f"workers={workers} rps={ok / args.duration:.1f} "
+                f"ok={ok} errors={failed}"
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
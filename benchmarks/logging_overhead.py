@@ -0,0 +1,97 @@
+# Throughput with logging on vs. off.
+#
+#   DB_URL=sqlite:///./bench.db python -m benchmarks.logging_overhead --path /get_all_car
+#
+# Starts `uvicorn main:app` once with LOG_ENABLED=false and once per entry in
+# --configs (each a comma separated list of KEY=VALUE overrides), hammers the
+# same GET route for a fixed duration and prints requests per second relative
+# to the logging-off run. Seeds a small fleet so /get_all_car has rows.
+import argparse
+import os
+import subprocess
+import sys
+import uuid
+from benchmarks.load import hammer, wait_until_up
+
+
+def seed(cars: int):
+    from database.database import Base, SessionLocal, engine
+    from src.models.car_details import Car
+    import src.models.booking
+    import src.models.user
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    if not db.query(Car).first():
+        db.add_all(
+            Car(
+                id=str(uuid.uuid4()),
+                car_name=f"log-car-{i}",
+                car_rc=f"LOG-{uuid.uuid4()}",
+                car_rent=100,
+                car_capacity=4,
+                car_detail="benchmark",
+            )
+            for i in range(cars)
+        )
+        db.commit()
+    db.close()
+
+
+def run(port: int, path: str, clients: int, duration: float, overrides: dict):
+    env = os.environ.copy()
+    env.update(overrides)
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        wait_until_up(base_url)
+        ok, failed = hammer(base_url + path, clients, duration)
+        return ok / duration, failed
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="/get_all_car?limit=20")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        default=["LOG_FORMAT=text", "LOG_FORMAT=json", "LOG_INFO_SAMPLE_RATE=0.1"],
+    )
+    args = parser.parse_args()
+    seed(50)
+
+    baseline, failed = run(
+        args.port, args.path, args.clients, args.duration, {"LOG_ENABLED": "false"}
+    )
+    print(f"{'logging off':32} rps={baseline:8.1f} errors={failed}")
+    for config in args.configs:
+        overrides = dict(item.split("=", 1) for item in config.split(","))
+        rps, failed = run(args.port, args.path, args.clients, args.duration, overrides)
+        print(
+            f"{config:32} rps={rps:8.1f} errors={failed} "
+            f"({(rps / baseline - 1) * 100:+.1f}% vs off)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# Latency of cheap routes while /login_user is being flooded.
+#
+#   DB_URL=sqlite:///./bench.db python -m benchmarks.login_flood --flood 64
+#
+# Seeds one verified user and a small fleet, starts uvicorn, measures
+# /get_all_car latency on its own, then again while `--flood` threads hammer
+# /login_user. Login responses are tallied by status so 429 admission
+# rejections are visible. Needs httpx.
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+import httpx
+from passlib.context import CryptContext
+
+
+def seed(email: str, password: str):
+    from database.database import Base, SessionLocal, engine
+    from src.models.car_details import Car
+    from src.models.user import User
+    import src.models.booking
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    if not db.query(User).filter(User.email == email).first():
+        db.add(
+            User(
+                id=str(uuid.uuid4()),
+                name="flood",
+                email=email,
+                phone_no="0000000000",
+                password=CryptContext(schemes=["bcrypt"]).hash(password),
+                is_verified=True,
+            )
+        )
+        db.add_all(
+            Car(
+                id=str(uuid.uuid4()),
+                car_name=f"flood-car-{i}",
+                car_rc=f"FLOOD-{uuid.uuid4()}",
+                car_rent=100,
+                car_capacity=4,
+                car_detail="benchmark",
+            )
+            for i in range(50)
+        )
+        db.commit()
+    db.close()
+
+
+def probe(url: str, samples: int):
+    timings = []
+    with httpx.Client(timeout=30) as client:
+        for _ in range(samples):
+            t0 = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - t0) * 1000)
+            time.sleep(0.01)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+
+
+def flood(url: str, threads: int, stop: threading.Event, statuses: Counter):
+    lock = threading.Lock()
+
+    def run():
+        with httpx.Client(timeout=30) as client:
+            while not stop.is_set():
+                try:
+                    status = client.get(url).status_code
+                except httpx.HTTPError:
+                    status = "error"
+                with lock:
+                    statuses[status] += 1
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--flood", type=int, default=64)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    email, password = "flood@example.com", "flood-password"
+    seed(email, password)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(args.port),
+            "--log-level",
+            "warning",
+        ],
+        # The flood measures bcrypt admission control, not the per-IP limiter
+        env=dict(os.environ, RATE_LIMIT_ENABLED="false"),
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(base_url + "/docs", timeout=1)
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+
+        cheap_url = base_url + "/get_all_car?limit=20"
+        p50, p99 = probe(cheap_url, args.samples)
+        print(f"idle    /get_all_car p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+
+        stop = threading.Event()
+        statuses = Counter()
+        login_url = f"{base_url}/login_user?email={email}&password={password}"
+        workers = flood(login_url, args.flood, stop, statuses)
+        time.sleep(1)
+        p50, p99 = probe(cheap_url, args.samples)
+        stop.set()
+        for worker in workers:
+            worker.join()
+        print(f"flooded /get_all_car p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+        print(f"login responses: {dict(statuses)}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Mail dispatcher throughput against a local SMTP stand-in.
+#
+#   python -m benchmarks.mailer --messages 2000 --workers 4
+#
+# Runs an aiosmtpd server on localhost and reports how long enqueue() blocks
+# the caller and how long the workers take to deliver every message.
+import argparse
+import statistics
+import time
+from aiosmtpd.controller import Controller
+from src.utils.mailer import MailDispatcher, SMTPTransport, SENT
+
+
+class CountingHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+
+    handler = CountingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=args.port)
+    controller.start()
+    dispatcher = MailDispatcher(
+        lambda: SMTPTransport("127.0.0.1", args.port, starttls=False),
+        workers=args.workers,
+        batch_size=args.batch_size,
+    )
+    dispatcher.start()
+
+    try:
+        enqueue_ms = []
+        started = time.perf_counter()
+        ids = []
+        for i in range(args.messages):
+            t0 = time.perf_counter()
+            ids.append(dispatcher.enqueue(f"user{i}@example.com", "OTP", "1234"))
+            enqueue_ms.append((time.perf_counter() - t0) * 1000)
+
+        while handler.received < args.messages:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - started
+        dispatcher.stop()
+
+        enqueue_ms.sort()
+        delivered = sum(dispatcher.status(i) == SENT for i in ids)
+        print(f"delivered {delivered}/{args.messages} in {elapsed:.2f}s")
+        print(f"throughput {args.messages / elapsed:.1f} msg/s")
+        print(
+            f"enqueue p50 {statistics.median(enqueue_ms):.3f} ms, "
+            f"p99 {enqueue_ms[int(len(enqueue_ms) * 0.99)]:.3f} ms"
+        )
+    finally:
+        dispatcher.stop()
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Per-request cost of the OTP/login rate limiter.
+#
+#   python -m benchmarks.rate_limit --keys 100000 --calls 200000
+#
+# Runs in-process, no server or database:
+# - MemoryRateLimiter.hit on its own, for allowed and refused requests, with
+#   --keys distinct clients so the bucket dict is at a realistic size;
+# - the same FastAPI route driven through raw ASGI calls with and without the
+#   rate_limit dependency, the difference being the limiter's share of a request;
+# - one bcrypt verify, i.e. what a refused /login_user no longer costs.
+import argparse
+import asyncio
+import random
+import time
+from fastapi import Depends, FastAPI
+
+
+def per_call(fn, calls: int):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls
+
+
+def asgi_get(app, path: str, query: bytes, client: str):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query,
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": (client, 50000),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def call():
+        status = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        await app(scope, receive, send)
+        return status[0]
+
+    return call
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=100000)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    from src.utils.rate_limit import LOGIN, MemoryRateLimiter, POLICIES, rate_limit
+    import src.utils.rate_limit as rate_limit_module
+
+    (ip_interval, ip_burst), (interval, burst) = POLICIES[LOGIN]
+    ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(args.keys)]
+    emails = [f"user{i}@example.com" for i in range(args.keys)]
+    order = [random.randrange(args.keys) for _ in range(args.calls)]
+
+    # Allowed: many clients, each well under its limit
+    limiter = MemoryRateLimiter(max_keys=4 * args.keys)
+    allowed = per_call(
+        lambda i: limiter.hit(
+            [
+                (f"login:ip:{ips[order[i]]}", ip_interval, ip_burst),
+                (f"login:email:{emails[order[i]]}", interval, burst),
+            ]
+        ),
+        args.calls,
+    )
+    # Refused: one client far over its limit
+    flood = [("login:ip:10.9.9.9", 3600, 1), ("login:email:flood@example.com", 3600, 1)]
+    limiter.hit(flood)
+    refused = per_call(lambda i: limiter.hit(flood), args.calls)
+    print(f"hit, allowed      {allowed * 1e6:8.2f} us   ({limiter.size()} buckets)")
+    print(f"hit, refused      {refused * 1e6:8.2f} us")
+
+    # Whole request through FastAPI, with and without the dependency
+    rate_limit_module.rate_limiter = MemoryRateLimiter(max_keys=4 * args.keys)
+    app = FastAPI()
+
+    @app.get("/plain")
+    async def plain(email: str):
+        return "ok"
+
+    @app.get("/limited", dependencies=[Depends(rate_limit(LOGIN))])
+    async def limited(email: str):
+        return "ok"
+
+    async def drive(calls):
+        statuses = []
+        start = time.perf_counter()
+        for call in calls:
+            statuses.append(await call())
+        return (time.perf_counter() - start) / len(calls), statuses
+
+    def requests(path: str):
+        return [
+            asgi_get(
+                app,
+                path,
+                f"email={emails[order[i]]}&password=x".encode(),
+                ips[order[i]],
+            )
+            for i in range(args.requests)
+        ]
+
+    asyncio.run(drive(requests("/plain")))
+    plain_time, _ = asyncio.run(drive(requests("/plain")))
+    limited_time, statuses = asyncio.run(drive(requests("/limited")))
+    print(f"request, no limit {plain_time * 1e6:8.2f} us")
+    print(
+        f"request, limited  {limited_time * 1e6:8.2f} us"
+        f"   ({statuses.count(200)}/{len(statuses)} allowed)"
+    )
+    print(f"limiter overhead  {(limited_time - plain_time) * 1e6:8.2f} us per request")
+
+    flood_call = asgi_get(app, "/limited", b"email=flood@example.com", "10.9.9.9")
+    refused_time, statuses = asyncio.run(drive([flood_call] * 1000))
+    print(
+        f"429 response      {refused_time * 1e6:8.2f} us"
+        f"   ({statuses.count(429)}/{len(statuses)} refused)"
+    )
+
+    from src.utils.password import pwd_context
+
+    hashed = pwd_context.hash("benchmark")
+    start = time.perf_counter()
+    pwd_context.verify("benchmark", hashed)
+    verify_time = time.perf_counter() - start
+    print(f"bcrypt verify     {verify_time * 1000:8.2f} ms   (skipped by a 429)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# Concurrent reservations against a single car.
+#
+#   DB_URL=sqlite:///./race.db python -m benchmarks.reservation_race --attempts 500
+#
+# Creates one car and `--attempts` pending bookings for it with random,
+# heavily overlapping date ranges, then confirms them all at once from
+# `--threads` workers, each with its own session. Prints how many were
+# confirmed or rejected and the throughput. Exits non-zero if any two
+# confirmed bookings overlap. With --no-lock the workers skip the lock and
+# the application check and write is_booked directly, so only the database
+# constraint or trigger stands in the way.
+import argparse
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from fastapi import HTTPException
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from database.database import Base, SessionLocal, engine
+from src.models.booking import Booking
+from src.models.car_details import Car
+import src.models.user
+from src.utils.reservation import confirm_reservation
+
+
+def seed(attempts: int, horizon: int):
+    car_id = str(uuid.uuid4())
+    today = date.today()
+    booking_ids = [str(uuid.uuid4()) for _ in range(attempts)]
+    db = SessionLocal()
+    db.execute(
+        insert(Car),
+        [
+            dict(
+                id=car_id,
+                car_name="race-car",
+                car_rc=f"RACE-{car_id}",
+                car_rent=100,
+                car_capacity=4,
+                car_detail="benchmark",
+            )
+        ],
+    )
+    rows = []
+    for booking_id in booking_ids:
+        start_date = today + timedelta(days=random.randrange(horizon))
+        rows.append(
+            dict(
+                booking_id=booking_id,
+                car_id=car_id,
+                car_rc=f"RACE-{car_id}",
+                car_name="race-car",
+                name="race",
+                phone_no="0000000000",
+                email=f"{booking_id}@example.com",
+                car_capacity=4,
+                start_date=start_date,
+                end_date=start_date + timedelta(days=random.randrange(0, 3)),
+                bill_amount=100,
+            )
+        )
+    db.execute(insert(Booking), rows)
+    db.commit()
+    db.close()
+    return car_id, booking_ids
+
+
+def confirm(booking_id: str, use_lock: bool):
+    db = SessionLocal()
+    try:
+        booking = db.get(Booking, booking_id)
+        if use_lock:
+            confirm_reservation(db, booking)
+        else:
+            booking.is_booked = True
+            booking.in_process = False
+            db.commit()
+        return "confirmed"
+    except HTTPException as e:
+        return f"rejected {e.status_code}"
+    except IntegrityError:
+        db.rollback()
+        return "rejected by constraint"
+    finally:
+        db.close()
+
+
+def overlaps(car_id: str):
+    other = aliased(Booking)
+    db = SessionLocal()
+    count = db.execute(
+        select(func.count())
+        .select_from(Booking)
+        .join(
+            other,
+            and_(
+                other.car_id == Booking.car_id,
+                other.booking_id < Booking.booking_id,
+                other.is_booked == True,
+                other.is_cancelled == False,
+                other.start_date <= Booking.end_date,
+                other.end_date >= Booking.start_date,
+            ),
+        )
+        .where(
+            Booking.car_id == car_id,
+            Booking.is_booked == True,
+            Booking.is_cancelled == False,
+        )
+    ).scalar()
+    db.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--attempts", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--horizon", type=int, default=60)
+    parser.add_argument("--no-lock", action="store_true")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    car_id, booking_ids = seed(args.attempts, args.horizon)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        outcomes = Counter(
+            pool.map(
+                lambda booking_id: confirm(booking_id, not args.no_lock), booking_ids
+            )
+        )
+    elapsed = time.perf_counter() - t0
+
+    overlapping = overlaps(car_id)
+    for outcome, count in sorted(outcomes.items()):
+        print(f"{outcome:24} {count}")
+    print(
+        f"{args.attempts} attempts in {elapsed:.2f}s "
+        f"({args.attempts / elapsed:.0f} reservations/s), "
+        f"{overlapping} overlapping pairs"
+    )
+    sys.exit(1 if overlapping else 0)
+
+
+if __name__ == "__main__":
+    main()
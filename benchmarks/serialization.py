@@ -0,0 +1,156 @@
+# Serialization cost of one 10k-row list response, before and after the
+# projection + orjson response path.
+#
+#   DB_URL=sqlite:///./bench.db python -m benchmarks.serialization --rows 10000
+#
+# Runs in-process, no server. For the car list it renders the same rows the way
+# FastAPI did before (response_model validation + jsonable output + stdlib
+# json) and the way the routes do now (schema projection + orjson). For the
+# user list it also includes the query: whole User entities through
+# response_model vs. only the schema's columns through the projection.
+# Checks both paths produce the same JSON before timing them.
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse as StdJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+
+def timed(fn, repeat: int):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def report(name: str, before: float, after: float):
+    print(
+        f"{name:<28} before {before * 1000:8.2f} ms   after {after * 1000:8.2f} ms"
+        f"   x{before / after:.1f}"
+    )
+
+
+def car_rows(rows: int):
+    from src.utils.catalog import CarEntry
+
+    now = datetime.now()
+    return [
+        CarEntry(
+            dict(
+                id=str(uuid.uuid4()),
+                car_name=f"bench-car-{i}",
+                car_rc=f"BENCH-{i}",
+                car_picture=None,
+                car_capacity=4,
+                date=None,
+                car_detail="benchmark",
+                car_rent=Decimal("1499.50"),
+                is_booked=False,
+                is_created=now,
+                is_updated=now,
+                is_deleted=False,
+            )
+        )
+        for i in range(rows)
+    ]
+
+
+def seed_users(rows: int):
+    from database.database import Base, SessionLocal, engine
+    from src.models.user import User
+    import src.models.booking
+    import src.models.car_details
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    if db.query(User).filter(User.email.like("bench-%")).count() < rows:
+        db.add_all(
+            User(
+                id=str(uuid.uuid4()),
+                name=f"bench-user-{i}",
+                email=f"bench-{uuid.uuid4()}@example.com",
+                phone_no="9999999999",
+                password="x" * 60,
+                is_active=True,
+                is_verified=True,
+            )
+            for i in range(rows)
+        )
+        db.commit()
+    return db
+
+
+def before_response(field, content):
+    async def render():
+        value = await serialize_response(
+            field=field, response_content=content, is_coroutine=False
+        )
+        return StdJSONResponse(value).body
+
+    return asyncio.run(render())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from src.models.car_details import Car
+    from src.models.user import User
+    import src.models.booking
+    from src.utils.catalog import CAR_COLUMNS
+    from src.schemas.car_details import CarPageSchema, CarSchema, GetAllCarSchema
+    from src.schemas.user import GetAllUserSchema, UserPageSchema
+    from src.utils.responses import JSONResponse, page_response, projection
+
+    # GET /get_all_car
+    cars = car_rows(args.rows)
+    car_field = create_model_field(
+        name="response", type_=CarPageSchema, mode="serialization"
+    )
+    before = lambda: before_response(car_field, {"items": cars, "next_cursor": None})
+    after = lambda: page_response(GetAllCarSchema, cars, None).body
+    assert json.loads(before()) == json.loads(after())
+    report("get_all_car", timed(before, args.repeat), timed(after, args.repeat))
+
+    # Write endpoints returned whole ORM objects through jsonable_encoder; they
+    # now return the CarSchema projection
+    orm_cars = [Car(**{key: getattr(car, key) for key in CAR_COLUMNS}) for car in cars]
+    before = lambda: StdJSONResponse(jsonable_encoder({"cars": orm_cars})).body
+    after = lambda: JSONResponse({"cars": projection(CarSchema).many(orm_cars)}).body
+    report("whole ORM rows", timed(before, args.repeat), timed(after, args.repeat))
+
+    # GET /get_all_user, query included
+    db = seed_users(args.rows)
+    user_field = create_model_field(
+        name="response", type_=UserPageSchema, mode="serialization"
+    )
+    users = db.query(User).filter(User.email.like("bench-%")).limit(args.rows)
+
+    def before():
+        db.expunge_all()
+        return before_response(user_field, {"items": users.all(), "next_cursor": None})
+
+    def after():
+        rows = users.with_entities(*projection(GetAllUserSchema).columns(User)).all()
+        return page_response(GetAllUserSchema, rows, None).body
+
+    assert json.loads(before()) == json.loads(after())
+    report(
+        "get_all_user (with query)",
+        timed(before, args.repeat),
+        timed(after, args.repeat),
+    )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,3 +8,141 @@ ALGORITHM=os.environ.get("ALGORITHM")
 SECRET_KEY=os.environ.get("SECRET_KEY")
 SENDER_EMAIL = os.environ.get("SENDER_EMAIL")
 EMAIL_PASSWORD = os.environ.get("EMAIL_PASSWORD")
+
+AVAILABILITY_INDEX_ENABLED = (
+    os.environ.get("AVAILABILITY_INDEX_ENABLED", "true").lower() == "true"
+)
+# Seconds before the availability index is rebuilt from the booking table,
+# bounding staleness from bookings made or cancelled by other processes;
+# 0 never rebuilds
+AVAILABILITY_INDEX_TTL = float(os.environ.get("AVAILABILITY_INDEX_TTL", 10))
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 0))
+
+# e.g. postgresql+asyncpg://... or sqlite+aiosqlite:///./app.db
+ASYNC_DB_URL = os.environ.get("ASYNC_DB_URL")
+
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", 587))
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_TIMEOUT = float(os.environ.get("SMTP_TIMEOUT", 10))
+SMTP_IDLE_TIMEOUT = float(os.environ.get("SMTP_IDLE_TIMEOUT", 60))
+# "smtp", or "memory" to keep messages in-process (tests, benchmarks)
+MAIL_TRANSPORT = os.environ.get("MAIL_TRANSPORT", "smtp")
+MAIL_WORKERS = int(os.environ.get("MAIL_WORKERS", 2))
+MAIL_BATCH_SIZE = int(os.environ.get("MAIL_BATCH_SIZE", 20))
+MAIL_MAX_RETRIES = int(os.environ.get("MAIL_MAX_RETRIES", 3))
+MAIL_RETRY_BACKOFF = float(os.environ.get("MAIL_RETRY_BACKOFF", 1.0))
+
+# 0 runs bcrypt inline on the request thread
+PASSWORD_POOL_WORKERS = int(
+    os.environ.get("PASSWORD_POOL_WORKERS", os.cpu_count() or 1)
+)
+PASSWORD_QUEUE_DEPTH = int(
+    os.environ.get("PASSWORD_QUEUE_DEPTH", 2 * (os.cpu_count() or 1))
+)
+PASSWORD_TIMEOUT = float(os.environ.get("PASSWORD_TIMEOUT", 10))
+
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL = float(os.environ.get("AUTH_CACHE_TTL", 300))
+# Seconds a cached user row is trusted before it is read again. Deletes and
+# password changes are invalidated at once in the worker that made them; other
+# workers can keep using the old row (e.g. accept a deleted user's token or
+# the old password in /update_user) for at most this long.
+AUTH_USER_TTL = float(os.environ.get("AUTH_USER_TTL", 5))
+
+LOG_ENABLED = os.environ.get("LOG_ENABLED", "true").lower() == "true"
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+# "text" or "json" (one JSON object per line)
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+LOG_STDOUT = os.environ.get("LOG_STDOUT", "true").lower() == "true"
+# Empty disables the file sink
+LOG_FILE = os.environ.get("LOG_FILE", "logs/app.log")
+LOG_ROTATION_BYTES = int(os.environ.get("LOG_ROTATION_BYTES", 10 * 1024 * 1024))
+# Fraction of requests whose DEBUG/INFO lines are kept; warnings always are
+LOG_INFO_SAMPLE_RATE = float(os.environ.get("LOG_INFO_SAMPLE_RATE", 1.0))
+
+PHOTO_DIR = os.environ.get("PHOTO_DIR", "photos")
+PHOTO_MAX_BYTES = int(os.environ.get("PHOTO_MAX_BYTES", 10 * 1024 * 1024))
+# Longest edge of each thumbnail variant, in pixels; empty disables thumbnails
+PHOTO_THUMBNAIL_SIZES = tuple(
+    int(size)
+    for size in os.environ.get("PHOTO_THUMBNAIL_SIZES", "320,800").split(",")
+    if size
+)
+PHOTO_THUMBNAIL_WORKERS = int(os.environ.get("PHOTO_THUMBNAIL_WORKERS", 2))
+
+# "memory" or "redis" (needs redis-py). The memory store lives in one process:
+# with several server workers an OTP issued by one is unknown to the others and
+# verification fails at random, so startup fails when "memory" is combined
+# with more than one worker (WEB_CONCURRENCY or the server's --workers / -w).
+OTP_STORE = os.environ.get("OTP_STORE", "memory")
+# Worker count as read by uvicorn and gunicorn
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+OTP_REDIS_URL = os.environ.get("OTP_REDIS_URL", "redis://localhost:6379/0")
+OTP_TTL = int(os.environ.get("OTP_TTL", 300))
+# Wrong guesses allowed before the active OTP is thrown away
+OTP_MAX_ATTEMPTS = int(os.environ.get("OTP_MAX_ATTEMPTS", 5))
+
+# Seconds before the in-process fleet catalog is reloaded from the car table,
+# bounding staleness from writes made by other processes; 0 never reloads
+CATALOG_TTL = float(os.environ.get("CATALOG_TTL", 60))
+
+# Rows per transaction in /car_import, and how many row errors it reports
+CAR_IMPORT_CHUNK_ROWS = int(os.environ.get("CAR_IMPORT_CHUNK_ROWS", 1000))
+CAR_IMPORT_MAX_ERRORS = int(os.environ.get("CAR_IMPORT_MAX_ERRORS", 1000))
+
+# Days from today covered by the occupancy calendar
+OCCUPANCY_HORIZON_DAYS = int(os.environ.get("OCCUPANCY_HORIZON_DAYS", 366))
+# Seconds before the calendar is rebuilt from the booking table, bounding
+# staleness from bookings made or cancelled by other processes; 0 only
+# rebuilds when the date changes
+OCCUPANCY_TTL = float(os.environ.get("OCCUPANCY_TTL", 30))
+
+# Seconds an analytics report is served from cache, and the longest range one covers
+ANALYTICS_CACHE_TTL = float(os.environ.get("ANALYTICS_CACHE_TTL", 300))
+ANALYTICS_MAX_DAYS = int(os.environ.get("ANALYTICS_MAX_DAYS", 3660))
+
+# In-process bookings (holds) older than BOOKING_HOLD_TTL seconds are moved to
+# booking_expired every BOOKING_REAPER_INTERVAL seconds (0 disables the reaper),
+# in batches of BOOKING_REAPER_BATCH rows, at most BOOKING_REAPER_MAX_BATCHES a run
+BOOKING_HOLD_TTL = int(os.environ.get("BOOKING_HOLD_TTL", 1800))
+BOOKING_REAPER_INTERVAL = float(os.environ.get("BOOKING_REAPER_INTERVAL", 60))
+BOOKING_REAPER_BATCH = int(os.environ.get("BOOKING_REAPER_BATCH", 500))
+BOOKING_REAPER_MAX_BATCHES = int(os.environ.get("BOOKING_REAPER_MAX_BATCHES", 20))
+
+# Confirmed or cancelled bookings that ended more than BOOKING_ARCHIVE_AFTER_DAYS
+# days ago are moved to booking_archive every BOOKING_ARCHIVE_INTERVAL seconds
+# (0 disables the archiver), BOOKING_ARCHIVE_BATCH rows per transaction
+BOOKING_ARCHIVE_AFTER_DAYS = int(os.environ.get("BOOKING_ARCHIVE_AFTER_DAYS", 30))
+BOOKING_ARCHIVE_INTERVAL = float(os.environ.get("BOOKING_ARCHIVE_INTERVAL", 3600))
+BOOKING_ARCHIVE_BATCH = int(os.environ.get("BOOKING_ARCHIVE_BATCH", 1000))
+BOOKING_ARCHIVE_MAX_BATCHES = int(os.environ.get("BOOKING_ARCHIVE_MAX_BATCHES", 50))
+
+# Load the fleet catalog, availability index and occupancy calendar during
+# startup instead of on the first request that needs them
+WARM_CACHES = os.environ.get("WARM_CACHES", "true").lower() == "true"
+
+# Token buckets in front of the OTP and login endpoints, one per client IP and
+# one per email (per booking for /send_payment_otp). A bucket holds BURST
+# requests and refills one every INTERVAL seconds. "memory" keeps the buckets
+# per process, "redis" shares them between workers (needs redis-py).
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_STORE = os.environ.get("RATE_LIMIT_STORE", "memory")
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL", OTP_REDIS_URL)
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", 100000))
+RATE_LIMIT_OTP_BURST = int(os.environ.get("RATE_LIMIT_OTP_BURST", 3))
+RATE_LIMIT_OTP_INTERVAL = float(os.environ.get("RATE_LIMIT_OTP_INTERVAL", 60))
+RATE_LIMIT_OTP_IP_BURST = int(os.environ.get("RATE_LIMIT_OTP_IP_BURST", 20))
+RATE_LIMIT_OTP_IP_INTERVAL = float(os.environ.get("RATE_LIMIT_OTP_IP_INTERVAL", 3))
+RATE_LIMIT_LOGIN_BURST = int(os.environ.get("RATE_LIMIT_LOGIN_BURST", 10))
+RATE_LIMIT_LOGIN_INTERVAL = float(os.environ.get("RATE_LIMIT_LOGIN_INTERVAL", 6))
+RATE_LIMIT_LOGIN_IP_BURST = int(os.environ.get("RATE_LIMIT_LOGIN_IP_BURST", 50))
+RATE_LIMIT_LOGIN_IP_INTERVAL = float(
+    os.environ.get("RATE_LIMIT_LOGIN_IP_INTERVAL", 0.5)
+)
@@ -1,8 +1,171 @@
-from config import DB_URL
+from config import (
+    DB_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+    ASYNC_DB_URL,
+)
+from fastapi.routing import APIRoute
+from functools import wraps
+import inspect
+import os
+import threading
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+
+def engine_options(db_url: str, is_async: bool = False):
+    url = make_url(db_url)
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+
+    if url.get_backend_name() == "sqlite":
+        # SQLite connections are handed between threadpool workers per request
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        # aiosqlite and in-memory databases don't use a sized QueuePool
+        if is_async or url.database in (None, "", ":memory:"):
+            return options
+
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if DB_STATEMENT_TIMEOUT_MS and url.get_backend_name() == "postgresql":
+        if is_async:
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+            }
+        else:
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+            }
+    return options
+
 
-engine = create_engine(DB_URL)
 Base = declarative_base()
-SessionLocal = sessionmaker(bind=engine)
+
+
+# ----------------------------------------------------------------------------------------------------
+# Engines
+# Nothing connects at import time. The sync engine is created on first use
+# (the app lifespan opens it, after the server has forked its workers), and
+# `from database.database import engine` still works for scripts through the
+# module __getattr__ below. A child forked while an engine is open drops the
+# inherited pool without closing the parent's connections.
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(DB_URL, **engine_options(DB_URL))
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+
+class LazySessionmaker(sessionmaker):
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            get_engine()
+        return super().__call__(**local_kw)
+
+
+SessionLocal = LazySessionmaker()
+
+
+def __getattr__(name):
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _drop_inherited_pools():
+    if _engine is not None:
+        _engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_drop_inherited_pools)
+
+
+# One session per request, always closed (and rolled back if left open)
+async def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Sync handlers run in the threadpool, and so does response_model validation
+# after them. If the session kept its connection until the dependency exits,
+# requests holding connections would wait for threadpool slots held by
+# requests waiting for connections. Close the session as soon as the handler
+# returns so the connection goes back to the pool first.
+class SessionRoute(APIRoute):
+    def __init__(self, path, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = release_sessions(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def release_sessions(endpoint):
+    @wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            for value in kwargs.values():
+                if isinstance(value, Session):
+                    value.close()
+
+    return wrapper
+
+
+# Optional async stack (asyncpg for Postgres, aiosqlite for local runs),
+# enabled by setting ASYNC_DB_URL and opened by the app lifespan
+async_engine = None
+AsyncSessionLocal = None
+
+
+def open_async_engine():
+    global async_engine, AsyncSessionLocal
+    if ASYNC_DB_URL and async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        async_engine = create_async_engine(
+            ASYNC_DB_URL, **engine_options(ASYNC_DB_URL, is_async=True)
+        )
+        AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+    return async_engine
+
+
+async def close_engines():
+    global _engine, async_engine, AsyncSessionLocal
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+        AsyncSessionLocal = None
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+            SessionLocal.configure(bind=None)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,21 +1,229 @@
 from loguru import logger
+import atexit
+import json
+import os
+import queue
+import random
 import sys
+import threading
+import time
+import traceback
+import uuid
+import zipfile
+import zlib
+from datetime import datetime
+from config import (
+    LOG_ENABLED,
+    LOG_LEVEL,
+    LOG_FORMAT,
+    LOG_STDOUT,
+    LOG_FILE,
+    LOG_ROTATION_BYTES,
+    LOG_INFO_SAMPLE_RATE,
+)
 
-# Step 3: Configure Loguru logger to store logs in 'app.log'
-# Remove the default logger configuration
+# Drop loguru's default stderr handler; setup_logging() installs the app's own
 logger.remove()
 
+TIME_FORMAT = "{time:DD-MM-YYYY hh:mm:ss A}"
+INFO_LEVEL_NO = logger.level("INFO").no
 
-# Add a handler for logging to stdout (optional) with AM/PM time format
-logger.add(
-    sys.stdout, format="{time:DD-MM-YYYY hh:mm:ss A} {level} {message}", level="INFO"
-)
 
-# Add a handler for logging to 'app.log' with rotation and AM/PM time format
-logger.add(
-    "logs/app.log",
-    format="{time:DD-MM-YYYY hh:mm:ss A} {level} {message}",
-    level="INFO",
-    rotation="10 MB",
-    compression="zip",
+# ----------------------------------------------------------------------------------------------------
+# Formats
+# Plain text lines with AM/PM time, tagged with the request id when there is one
+def text_format(record):
+    if "request_id" in record["extra"]:
+        return TIME_FORMAT + " {level} [{extra[request_id]}] {message}\n{exception}"
+    return TIME_FORMAT + " {level} {message}\n{exception}"
+
+
+# One JSON object per line
+def json_format(record):
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "request_id": record["extra"].get("request_id"),
+        "module": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+    }
+    if record["exception"] is not None:
+        entry["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    record["extra"]["json"] = json.dumps(entry, default=str)
+    return "{extra[json]}\n"
+
+
+# DEBUG/INFO lines are kept for a sample of requests, chosen by request id so a
+# sampled request keeps all of its lines. Warnings and errors always pass.
+def sample(record):
+    if LOG_INFO_SAMPLE_RATE >= 1 or record["level"].no > INFO_LEVEL_NO:
+        return True
+    request_id = record["extra"].get("request_id")
+    if request_id is None:
+        return random.random() < LOG_INFO_SAMPLE_RATE
+    return zlib.crc32(request_id.encode()) % 10000 < LOG_INFO_SAMPLE_RATE * 10000
+
+
+# ----------------------------------------------------------------------------------------------------
+# Queued writer
+# The loguru sink only puts the formatted line on an in-process queue. One
+# background thread drains it in batches and does all writes, size-based
+# rotation and zip compression, so none of that runs on a request thread.
+# (loguru's own enqueue=True pickles every line through a multiprocessing pipe,
+# which costs more per line than writing synchronously.)
+class QueuedLogWriter:
+    def __init__(
+        self,
+        stream=None,
+        path: str = None,
+        rotation_bytes: int = 0,
+        linger: float = 0.05,
+    ):
+        self.stream = stream
+        self.path = path
+        self.rotation_bytes = rotation_bytes
+        self.linger = linger
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._size = 0
+        self._thread = None
+
+    def start(self):
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._size = self._file.tell()
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, message):
+        self._queue.put(message)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _run(self):
+        while True:
+            lines = [self._queue.get()]
+            # Let a burst accumulate so each write and flush covers many lines
+            time.sleep(self.linger)
+            while True:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in lines
+            self._write("".join(line for line in lines if line is not None))
+            if stopping:
+                return
+
+    def _write(self, chunk: str):
+        if not chunk:
+            return
+        try:
+            if self.stream is not None:
+                self.stream.write(chunk)
+                self.stream.flush()
+            if self._file is not None:
+                self._file.write(chunk)
+                self._file.flush()
+                self._size += len(chunk)
+                if self.rotation_bytes and self._size >= self.rotation_bytes:
+                    self._rotate()
+        except Exception as e:
+            sys.stderr.write(f"Log writer failed: {e}\n")
+
+    def _rotate(self):
+        self._file.close()
+        root, ext = os.path.splitext(self.path)
+        rotated = f"{root}.{datetime.now():%Y-%m-%d_%H-%M-%S_%f}{ext}"
+        os.replace(self.path, rotated)
+        with zipfile.ZipFile(rotated + ".zip", "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(rotated, os.path.basename(rotated))
+        os.remove(rotated)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+
+log_writer = QueuedLogWriter(
+    stream=sys.stdout if LOG_STDOUT else None,
+    path=LOG_FILE or None,
+    rotation_bytes=LOG_ROTATION_BYTES,
 )
+
+
+# Add one handler that feeds stdout and LOG_FILE (both optional) through the
+# writer. Called by the app lifespan rather than at import, so importing the app
+# opens no file and starts no thread; calling it again is a no-op.
+_handler_id = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging():
+    global _handler_id
+    if not (LOG_ENABLED and (LOG_STDOUT or LOG_FILE)):
+        return
+    with _setup_lock:
+        if _handler_id is not None:
+            return
+        log_writer.start()
+        atexit.register(log_writer.stop)
+        _handler_id = logger.add(
+            log_writer.put,
+            format=json_format if LOG_FORMAT == "json" else text_format,
+            level=LOG_LEVEL,
+            filter=sample,
+        )
+
+
+def shutdown_logging():
+    global _handler_id
+    with _setup_lock:
+        if _handler_id is None:
+            return
+        logger.remove(_handler_id)
+        _handler_id = None
+        log_writer.stop()
+
+
+# ----------------------------------------------------------------------------------------------------
+# Request ids
+# Pure ASGI middleware: takes X-Request-ID from the request or generates one,
+# binds it to every log line emitted while handling the request (including in
+# threadpool endpoints) and echoes it in the response headers.
+class RequestIdMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        with logger.contextualize(request_id=request_id):
+            await self.app(scope, receive, send_with_request_id)
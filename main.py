@@ -1,11 +1,120 @@
+import sys
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from config import (
+    ASYNC_DB_URL,
+    AVAILABILITY_INDEX_ENABLED,
+    WARM_CACHES,
+    WEB_CONCURRENCY,
+)
+from logs.log_config import (
+    RequestIdMiddleware,
+    logger,
+    setup_logging,
+    shutdown_logging,
+)
+from database.database import (
+    SessionLocal,
+    close_engines,
+    get_engine,
+    open_async_engine,
+)
+from src.utils.metrics import MetricsMiddleware, instrument_engine
+from src.utils.mailer import mailer
+from src.utils.otp_store import check_otp_store
+from src.utils.password import shutdown_executor
+from src.utils.photos import shutdown_thumbnails
+from src.utils.responses import JSONResponse
+from src.utils.reaper import booking_reaper
+from src.utils.archive import booking_archiver
+from src.utils.catalog import fleet_catalog
+from src.utils.availability import availability_index
+from src.utils.occupancy import occupancy_calendar
 from src.routers.user import user_router
 from src.routers.car_details import car_router
 from src.routers.booking import booking_router
+from src.routers.metrics import metrics_router
+from src.routers.photos import photo_router
+from src.routers.analytics import analytics_router
 
 
-app = FastAPI()
+# Importing this module only builds the app. Engines, the log writer, worker
+# threads and caches are opened by the lifespan, i.e. in each server worker
+# after it has forked, and closed again in reverse order on shutdown.
+def warm_caches():
+    started = time.perf_counter()
+    try:
+        with SessionLocal() as db:
+            fleet_catalog.view(db)
+            if AVAILABILITY_INDEX_ENABLED:
+                availability_index.ensure_loaded(db)
+            occupancy_calendar.ensure_loaded(db)
+    except Exception as e:
+        # The caches load on first use anyway
+        logger.warning("Cache warm-up failed: {}", e)
+        return
+    logger.info("Caches warmed in {:.3f}s", time.perf_counter() - started)
 
-app.include_router(user_router)
-app.include_router(car_router)
-app.include_router(booking_router)
+
+# WEB_CONCURRENCY or the server's own flag: uvicorn's spawned workers get the
+# supervisor's sys.argv back, gunicorn's forked ones keep it
+def server_workers(argv=None):
+    argv = sys.argv if argv is None else argv
+    workers = WEB_CONCURRENCY
+    for i, arg in enumerate(argv):
+        value = None
+        if arg in ("--workers", "-w") and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith("--workers="):
+            value = arg.split("=", 1)[1]
+        if value and value.isdigit():
+            workers = max(workers, int(value))
+    return workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Before anything is opened, so a refused start leaves nothing running
+    check_otp_store(server_workers())
+    setup_logging()
+    instrument_engine(get_engine())
+    open_async_engine()
+    if WARM_CACHES:
+        await run_in_threadpool(warm_caches)
+    mailer.start()
+    booking_reaper.start()
+    booking_archiver.start()
+    yield
+    booking_archiver.stop()
+    booking_reaper.stop()
+    mailer.stop()
+    shutdown_executor()
+    shutdown_thumbnails()
+    await close_engines()
+    shutdown_logging()
+
+
+def create_app():
+    app = FastAPI(lifespan=lifespan, default_response_class=JSONResponse)
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(RequestIdMiddleware)
+
+    app.include_router(user_router)
+    app.include_router(car_router)
+    app.include_router(booking_router)
+    app.include_router(metrics_router)
+    app.include_router(photo_router)
+    app.include_router(analytics_router)
+
+    if ASYNC_DB_URL:
+        from src.routers.async_car_details import async_car_router
+        from src.routers.async_booking import async_booking_router
+
+        app.include_router(async_car_router, prefix="/async")
+        app.include_router(async_booking_router, prefix="/async")
+    return app
+
+
+app = create_app()
@@ -0,0 +1,106 @@
+"""baseline schema
+
+Databases created before migrations existed already have these tables; mark
+them with `alembic stamp 0001` before running `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 01:39:08.884626
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "car",
+        sa.Column("id", sa.String(length=100), nullable=False),
+        sa.Column("car_name", sa.String(length=100), nullable=False),
+        sa.Column("car_rc", sa.String(length=100), nullable=False),
+        sa.Column("car_picture", sa.String(length=100), nullable=True),
+        sa.Column("car_capacity", sa.String(length=100), nullable=True),
+        sa.Column("date", sa.String(length=100), nullable=True),
+        sa.Column("car_detail", sa.String(length=150), nullable=True),
+        sa.Column("car_rent", sa.String(length=100), nullable=False),
+        sa.Column("is_booked", sa.Boolean(), nullable=False),
+        sa.Column("is_created", sa.DateTime(), nullable=False),
+        sa.Column("is_updated", sa.DateTime(), nullable=False),
+        sa.Column("is_deleted", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(length=100), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("email", sa.String(length=100), nullable=False),
+        sa.Column("phone_no", sa.String(length=15), nullable=False),
+        sa.Column("password", sa.String(length=100), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("is_verified", sa.Boolean(), nullable=False),
+        sa.Column("is_deleted", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("modified_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "booking",
+        sa.Column("booking_id", sa.String(length=100), nullable=False),
+        sa.Column("user_id", sa.String(length=100), nullable=True),
+        sa.Column("car_id", sa.String(length=100), nullable=True),
+        sa.Column("car_rc", sa.String(length=100), nullable=True),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("phone_no", sa.String(length=10), nullable=False),
+        sa.Column("email", sa.String(length=100), nullable=False),
+        sa.Column("car_name", sa.String(length=100), nullable=True),
+        sa.Column("car_capacity", sa.String(length=100), nullable=False),
+        sa.Column("car_picture", sa.String(length=100), nullable=True),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("end_date", sa.Date(), nullable=False),
+        sa.Column("car_rent", sa.String(length=100), nullable=False),
+        sa.Column("bill_amount", sa.String(length=100), nullable=True),
+        sa.Column("in_process", sa.Boolean(), nullable=False),
+        sa.Column("is_booked", sa.Boolean(), nullable=False),
+        sa.Column("is_cancelled", sa.Boolean(), nullable=False),
+        sa.Column("booked_at", sa.DateTime(), nullable=True),
+        sa.Column("cancelled_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["car_id"],
+            ["car.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("booking_id"),
+    )
+    op.create_table(
+        "otps",
+        sa.Column("id", sa.String(length=100), nullable=False),
+        sa.Column("user_id", sa.String(length=100), nullable=False),
+        sa.Column("email", sa.String(length=100), nullable=False),
+        sa.Column("otp", sa.String(length=100), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("modified_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("otps")
+    op.drop_table("booking")
+    op.drop_table("users")
+    op.drop_table("car")
@@ -0,0 +1,53 @@
+"""add lookup indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 01:39:11.542710
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_users_email_active", "users", ["email", "is_active", "is_verified"], {}),
+    ("ix_otps_email_otp", "otps", ["email", "otp"], {}),
+    ("ix_car_car_rc", "car", ["car_rc"], {}),
+    ("ix_car_car_name", "car", ["car_name"], {}),
+    ("ix_car_capacity_deleted", "car", ["car_capacity", "is_deleted"], {}),
+    ("ix_booking_email_state", "booking", ["email", "is_booked", "in_process"], {}),
+    (
+        "ix_booking_car_dates",
+        "booking",
+        ["car_id", "start_date", "end_date"],
+        {"postgresql_where": sa.text("is_booked AND NOT is_cancelled")},
+    ),
+    ("ix_booking_car_rc_dates", "booking", ["car_rc", "start_date", "end_date"], {}),
+]
+
+
+def upgrade() -> None:
+    # Build the indexes without locking out writes on live Postgres tables
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, columns, kwargs in INDEXES:
+                op.create_index(
+                    name, table, columns, postgresql_concurrently=True, **kwargs
+                )
+    else:
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, columns, kwargs in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
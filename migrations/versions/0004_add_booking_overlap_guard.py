@@ -0,0 +1,64 @@
+"""add booking overlap guard
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 02:10:12.402915
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Existing overlapping confirmed bookings must be cancelled before upgrading,
+# otherwise the constraint cannot be created.
+SQLITE_CHECK = """
+    SELECT RAISE(ABORT, 'booking overlaps an existing reservation')
+    WHERE EXISTS (
+        SELECT 1 FROM booking
+        WHERE car_id = NEW.car_id
+          AND booking_id != NEW.booking_id
+          AND is_booked AND NOT is_cancelled
+          AND start_date <= NEW.end_date
+          AND end_date >= NEW.start_date
+    );
+"""
+SQLITE_WHEN = "NEW.is_booked AND NOT NEW.is_cancelled AND NEW.car_id IS NOT NULL"
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        op.execute(
+            "ALTER TABLE booking ADD CONSTRAINT ex_booking_car_no_overlap "
+            "EXCLUDE USING gist (car_id WITH =, daterange(start_date, end_date, '[]') WITH &&) "
+            "WHERE (is_booked AND NOT is_cancelled)"
+        )
+    elif dialect == "sqlite":
+        op.execute(
+            "CREATE TRIGGER trg_booking_no_overlap_insert BEFORE INSERT ON booking "
+            f"WHEN {SQLITE_WHEN} BEGIN {SQLITE_CHECK} END"
+        )
+        op.execute(
+            "CREATE TRIGGER trg_booking_no_overlap_update "
+            "BEFORE UPDATE OF car_id, start_date, end_date, is_booked, is_cancelled "
+            f"ON booking WHEN {SQLITE_WHEN} BEGIN {SQLITE_CHECK} END"
+        )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("ALTER TABLE booking DROP CONSTRAINT ex_booking_car_no_overlap")
+    elif dialect == "sqlite":
+        op.execute("DROP TRIGGER trg_booking_no_overlap_update")
+        op.execute("DROP TRIGGER trg_booking_no_overlap_insert")
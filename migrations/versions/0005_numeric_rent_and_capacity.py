@@ -0,0 +1,101 @@
+"""numeric rent, bill and capacity columns
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 02:31:47.530112
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column, new type, PostgreSQL cast, nullable)
+COLUMNS = [
+    ("car", "car_capacity", sa.Integer(), "car_capacity::integer", True),
+    ("car", "car_rent", sa.Numeric(10, 2), "car_rent::numeric(10, 2)", False),
+    ("booking", "car_capacity", sa.Integer(), "car_capacity::integer", False),
+    ("booking", "car_rent", sa.Numeric(10, 2), "car_rent::numeric(10, 2)", False),
+    (
+        "booking",
+        "bill_amount",
+        sa.Numeric(12, 2),
+        "bill_amount::numeric(12, 2)",
+        True,
+    ),
+]
+
+# SQLite rebuilds the booking table to change column types, which drops the
+# overlap triggers from 0004; they are recreated afterwards.
+SQLITE_CHECK = """
+    SELECT RAISE(ABORT, 'booking overlaps an existing reservation')
+    WHERE EXISTS (
+        SELECT 1 FROM booking
+        WHERE car_id = NEW.car_id
+          AND booking_id != NEW.booking_id
+          AND is_booked AND NOT is_cancelled
+          AND start_date <= NEW.end_date
+          AND end_date >= NEW.start_date
+    );
+"""
+SQLITE_WHEN = "NEW.is_booked AND NOT NEW.is_cancelled AND NEW.car_id IS NOT NULL"
+
+
+def create_sqlite_triggers():
+    op.execute(
+        "CREATE TRIGGER trg_booking_no_overlap_insert BEFORE INSERT ON booking "
+        f"WHEN {SQLITE_WHEN} BEGIN {SQLITE_CHECK} END"
+    )
+    op.execute(
+        "CREATE TRIGGER trg_booking_no_overlap_update "
+        "BEFORE UPDATE OF car_id, start_date, end_date, is_booked, is_cancelled "
+        f"ON booking WHEN {SQLITE_WHEN} BEGIN {SQLITE_CHECK} END"
+    )
+
+
+def alter(to_numeric: bool):
+    is_sqlite = op.get_bind().dialect.name == "sqlite"
+    if is_sqlite:
+        op.execute("DROP TRIGGER IF EXISTS trg_booking_no_overlap_update")
+        op.execute("DROP TRIGGER IF EXISTS trg_booking_no_overlap_insert")
+
+    for table in ("car", "booking"):
+        with op.batch_alter_table(table) as batch_op:
+            for name, column, new_type, cast, nullable in COLUMNS:
+                if name != table:
+                    continue
+                if to_numeric:
+                    batch_op.alter_column(
+                        column,
+                        existing_type=sa.String(length=100),
+                        type_=new_type,
+                        existing_nullable=nullable,
+                        postgresql_using=cast,
+                    )
+                else:
+                    batch_op.alter_column(
+                        column,
+                        existing_type=new_type,
+                        type_=sa.String(length=100),
+                        existing_nullable=nullable,
+                        postgresql_using=f"{column}::varchar(100)",
+                    )
+
+    if is_sqlite:
+        create_sqlite_triggers()
+
+
+def upgrade() -> None:
+    alter(to_numeric=True)
+
+
+def downgrade() -> None:
+    alter(to_numeric=False)
@@ -0,0 +1,48 @@
+"""booking created_at and analytics indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 03:12:05.402211
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_booking_created_at", "booking", ["created_at"]),
+    ("ix_booking_booked_at", "booking", ["booked_at"]),
+]
+
+
+def upgrade() -> None:
+    op.add_column("booking", sa.Column("created_at", sa.DateTime(), nullable=True))
+    # Older rows only know when they were confirmed
+    op.execute("UPDATE booking SET created_at = booked_at WHERE booked_at IS NOT NULL")
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    if op.get_bind().dialect.name == "sqlite":
+        # Native DROP COLUMN (SQLite 3.35+); a batch rebuild would lose the
+        # overlap triggers
+        op.execute("ALTER TABLE booking DROP COLUMN created_at")
+    else:
+        op.drop_column("booking", "created_at")
@@ -0,0 +1,52 @@
+"""booking_expired table for reaped in-process holds
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 04:05:41.118302
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "booking_expired",
+        sa.Column("booking_id", sa.String(length=100), nullable=False),
+        sa.Column("user_id", sa.String(length=100), nullable=True),
+        sa.Column("car_id", sa.String(length=100), nullable=True),
+        sa.Column("car_rc", sa.String(length=100), nullable=True),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("phone_no", sa.String(length=10), nullable=False),
+        sa.Column("email", sa.String(length=100), nullable=False),
+        sa.Column("car_name", sa.String(length=100), nullable=True),
+        sa.Column("car_capacity", sa.Integer(), nullable=False),
+        sa.Column("car_picture", sa.String(length=100), nullable=True),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("end_date", sa.Date(), nullable=False),
+        sa.Column("car_rent", sa.Numeric(10, 2), nullable=False),
+        sa.Column("bill_amount", sa.Numeric(12, 2), nullable=True),
+        sa.Column("in_process", sa.Boolean(), nullable=False),
+        sa.Column("is_booked", sa.Boolean(), nullable=False),
+        sa.Column("is_cancelled", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("booked_at", sa.DateTime(), nullable=True),
+        sa.Column("cancelled_at", sa.DateTime(), nullable=True),
+        sa.Column("expired_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("booking_id"),
+    )
+    op.create_index("ix_booking_expired_expired_at", "booking_expired", ["expired_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_booking_expired_expired_at", table_name="booking_expired")
+    op.drop_table("booking_expired")
@@ -0,0 +1,78 @@
+"""booking_archive table, partitioned by start_date month on PostgreSQL
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 05:20:13.604117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Monthly partitions are created by the archiver as it needs them
+ARCHIVE_INDEXES = [
+    ("ix_booking_archive_start_date", ["start_date"]),
+    ("ix_booking_archive_email", ["email"]),
+    ("ix_booking_archive_created_at", ["created_at"]),
+    ("ix_booking_archive_booked_at", ["booked_at"]),
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "booking_archive",
+        sa.Column("booking_id", sa.String(length=100), nullable=False),
+        sa.Column("user_id", sa.String(length=100), nullable=True),
+        sa.Column("car_id", sa.String(length=100), nullable=True),
+        sa.Column("car_rc", sa.String(length=100), nullable=True),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("phone_no", sa.String(length=10), nullable=False),
+        sa.Column("email", sa.String(length=100), nullable=False),
+        sa.Column("car_name", sa.String(length=100), nullable=True),
+        sa.Column("car_capacity", sa.Integer(), nullable=False),
+        sa.Column("car_picture", sa.String(length=100), nullable=True),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("end_date", sa.Date(), nullable=False),
+        sa.Column("car_rent", sa.Numeric(10, 2), nullable=False),
+        sa.Column("bill_amount", sa.Numeric(12, 2), nullable=True),
+        sa.Column("in_process", sa.Boolean(), nullable=False),
+        sa.Column("is_booked", sa.Boolean(), nullable=False),
+        sa.Column("is_cancelled", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("booked_at", sa.DateTime(), nullable=True),
+        sa.Column("cancelled_at", sa.DateTime(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("booking_id", "start_date"),
+        postgresql_partition_by="RANGE (start_date)",
+    )
+    for name, columns in ARCHIVE_INDEXES:
+        op.create_index(name, "booking_archive", columns)
+
+    # The archiver finds finished bookings by end_date
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_booking_end_date",
+                "booking",
+                ["end_date"],
+                postgresql_concurrently=True,
+            )
+    else:
+        op.create_index("ix_booking_end_date", "booking", ["end_date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_booking_end_date", table_name="booking")
+    for name, columns in reversed(ARCHIVE_INDEXES):
+        op.drop_index(name, table_name="booking_archive")
+    # Drops the partitions with it on PostgreSQL
+    op.drop_table("booking_archive")
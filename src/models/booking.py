@@ -1,11 +1,39 @@
 from database.database import Base
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, Date
+from sqlalchemy import (
+    Column,
+    String,
+    Boolean,
+    Integer,
+    Numeric,
+    DateTime,
+    ForeignKey,
+    Date,
+    Index,
+    Table,
+    text,
+    DDL,
+    event,
+)
 from datetime import datetime, timezone
 from sqlalchemy.orm import relationship
 
 
 class Booking(Base):
     __tablename__ = "booking"
+    __table_args__ = (
+        Index("ix_booking_email_state", "email", "is_booked", "in_process"),
+        Index(
+            "ix_booking_car_dates",
+            "car_id",
+            "start_date",
+            "end_date",
+            postgresql_where=text("is_booked AND NOT is_cancelled"),
+        ),
+        Index("ix_booking_car_rc_dates", "car_rc", "start_date", "end_date"),
+        Index("ix_booking_created_at", "created_at"),
+        Index("ix_booking_booked_at", "booked_at"),
+        Index("ix_booking_end_date", "end_date"),
+    )
     booking_id = Column(String(100), primary_key=True, nullable=False)
     user_id = Column(String(100), ForeignKey("users.id"), nullable=True)
     car_id = Column(String(100), ForeignKey("car.id"), nullable=True)
@@ -14,17 +42,99 @@ class Booking(Base):
     phone_no = Column(String(10), nullable=False)
     email = Column(String(100), nullable=False)
     car_name = Column(String(100), default="NA", nullable=True)
-    car_capacity = Column(String(100), nullable=False)
+    car_capacity = Column(Integer, nullable=False)
     car_picture = Column(String(100), nullable=True)
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
-    car_rent = Column(String(100), default=0, nullable=False)
-    bill_amount = Column(String(100), nullable=True)
+    car_rent = Column(Numeric(10, 2), default=0, nullable=False)
+    bill_amount = Column(Numeric(12, 2), nullable=True)
     in_process = Column(Boolean, default=True, nullable=False)
     is_booked = Column(Boolean, default=False, nullable=False)
     is_cancelled = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime, default=datetime.now, nullable=True)
     booked_at = Column(DateTime, default=None, nullable=True)
     cancelled_at = Column(DateTime, default=None, nullable=True)
 
     user = relationship("User", back_populates="bookings")
     car = relationship("Car", back_populates="bookings")
+
+
+# Backstop against double booking: no two confirmed bookings of one car may
+# overlap. PostgreSQL gets an exclusion constraint, SQLite a pair of triggers.
+NO_OVERLAP_SQLITE_CHECK = """
+    SELECT RAISE(ABORT, 'booking overlaps an existing reservation')
+    WHERE EXISTS (
+        SELECT 1 FROM booking
+        WHERE car_id = NEW.car_id
+          AND booking_id != NEW.booking_id
+          AND is_booked AND NOT is_cancelled
+          AND start_date <= NEW.end_date
+          AND end_date >= NEW.start_date
+    );
+"""
+NO_OVERLAP_SQLITE_WHEN = (
+    "NEW.is_booked AND NOT NEW.is_cancelled AND NEW.car_id IS NOT NULL"
+)
+
+for ddl, dialect in (
+    ("CREATE EXTENSION IF NOT EXISTS btree_gist", "postgresql"),
+    (
+        "ALTER TABLE booking ADD CONSTRAINT ex_booking_car_no_overlap "
+        "EXCLUDE USING gist (car_id WITH =, daterange(start_date, end_date, '[]') WITH &&) "
+        "WHERE (is_booked AND NOT is_cancelled)",
+        "postgresql",
+    ),
+    (
+        "CREATE TRIGGER trg_booking_no_overlap_insert BEFORE INSERT ON booking "
+        f"WHEN {NO_OVERLAP_SQLITE_WHEN} BEGIN {NO_OVERLAP_SQLITE_CHECK} END",
+        "sqlite",
+    ),
+    (
+        "CREATE TRIGGER trg_booking_no_overlap_update "
+        "BEFORE UPDATE OF car_id, start_date, end_date, is_booked, is_cancelled ON booking "
+        f"WHEN {NO_OVERLAP_SQLITE_WHEN} BEGIN {NO_OVERLAP_SQLITE_CHECK} END",
+        "sqlite",
+    ),
+):
+    event.listen(
+        Booking.__table__, "after_create", DDL(ddl).execute_if(dialect=dialect)
+    )
+
+
+# Copies of booking rows moved out of the hot table: the same columns, without
+# the foreign keys, so a moved booking never blocks deleting its user or car.
+def booking_columns(primary_key=("booking_id",)):
+    return [
+        Column(
+            column.name,
+            column.type,
+            primary_key=column.name in primary_key,
+            nullable=column.nullable,
+        )
+        for column in Booking.__table__.columns
+    ]
+
+
+# In-process holds the reaper expired
+expired_booking = Table(
+    "booking_expired",
+    Base.metadata,
+    *booking_columns(),
+    Column("expired_at", DateTime, nullable=False),
+    Index("ix_booking_expired_expired_at", "expired_at"),
+)
+
+# Finished (confirmed or cancelled, ended) bookings. On PostgreSQL the table is
+# range partitioned by start_date month, so the partition key is part of the
+# primary key; the archiver creates monthly partitions as it needs them.
+archived_booking = Table(
+    "booking_archive",
+    Base.metadata,
+    *booking_columns(primary_key=("booking_id", "start_date")),
+    Column("archived_at", DateTime, nullable=False),
+    Index("ix_booking_archive_start_date", "start_date"),
+    Index("ix_booking_archive_email", "email"),
+    Index("ix_booking_archive_created_at", "created_at"),
+    Index("ix_booking_archive_booked_at", "booked_at"),
+    postgresql_partition_by="RANGE (start_date)",
+)
@@ -1,19 +1,34 @@
 from database.database import Base
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey
+from sqlalchemy import (
+    Column,
+    String,
+    Boolean,
+    Integer,
+    Numeric,
+    DateTime,
+    ForeignKey,
+    Index,
+)
 from datetime import datetime, timezone
 from sqlalchemy.orm import relationship
 
 
 class Car(Base):
     __tablename__ = "car"
+    __table_args__ = (
+        Index("ix_car_car_rc", "car_rc"),
+        Index("ix_car_car_name", "car_name"),
+        Index("ix_car_capacity_deleted", "car_capacity", "is_deleted"),
+        Index("ix_car_created_id", "is_created", "id"),
+    )
     id = Column(String(100), primary_key=True, nullable=False)
     car_name = Column(String(100), nullable=False)
     car_rc = Column(String(100), nullable=False)
     car_picture = Column(String(100), nullable=True)
-    car_capacity = Column(String(100), nullable=True)
+    car_capacity = Column(Integer, nullable=True)
     date = Column(String(100), nullable=True)
     car_detail = Column(String(150), nullable=True)
-    car_rent = Column(String(100), nullable=False)
+    car_rent = Column(Numeric(10, 2), nullable=False)
     is_booked = Column(Boolean, default=False, nullable=False)
     is_created = Column(DateTime, default=datetime.now, nullable=False)
     is_updated = Column(
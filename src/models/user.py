@@ -1,11 +1,15 @@
 from database.database import Base
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, Index
 from datetime import datetime, timezone
 from sqlalchemy.orm import relationship
 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_email_active", "email", "is_active", "is_verified"),
+        Index("ix_users_created_id", "created_at", "id"),
+    )
     id = Column(String(100), primary_key=True, nullable=False)
     name = Column(String(100), nullable=False)
     email = Column(String(100), nullable=False)
@@ -24,6 +28,7 @@ class User(Base):
 
 class OTP(Base):
     __tablename__ = "otps"
+    __table_args__ = (Index("ix_otps_email_otp", "email", "otp"),)
     id = Column(String(100), primary_key=True, nullable=False)
     user_id = Column(String(100), ForeignKey("users.id"), nullable=False)
     email = Column(String(100), nullable=False)
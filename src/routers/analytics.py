@@ -0,0 +1,63 @@
+from datetime import date
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from database.database import get_db, SessionRoute
+from src.utils.analytics import run_report
+from src.utils.auth import get_current_user
+from logs.log_config import logger
+
+# Revenue and usage figures: every report needs a signed-in user
+analytics_router = APIRouter(
+    prefix="/analytics",
+    route_class=SessionRoute,
+    dependencies=[Depends(get_current_user)],
+)
+
+Period = Literal["day", "week", "month"]
+
+
+@analytics_router.get("/revenue")
+def revenue(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    period: Period = "day",
+    db: Session = Depends(get_db),
+):
+    logger.info("Revenue report from {} to {} by {}", start_date, end_date, period)
+    return run_report(db, "revenue", start_date, end_date, period)
+
+
+@analytics_router.get("/cancellations")
+def cancellations(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    period: Period = "day",
+    db: Session = Depends(get_db),
+):
+    logger.info("Cancellation report from {} to {} by {}", start_date, end_date, period)
+    return run_report(db, "cancellations", start_date, end_date, period)
+
+
+@analytics_router.get("/funnel")
+def funnel(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    period: Period = "day",
+    db: Session = Depends(get_db),
+):
+    logger.info("Funnel report from {} to {} by {}", start_date, end_date, period)
+    return run_report(db, "funnel", start_date, end_date, period)
+
+
+@analytics_router.get("/utilization")
+def utilization(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    group_by: Literal["car", "capacity", "day"] = "car",
+    db: Session = Depends(get_db),
+):
+    logger.info(
+        "Utilization report from {} to {} by {}", start_date, end_date, group_by
+    )
+    return run_report(db, "utilization", start_date, end_date, group_by)
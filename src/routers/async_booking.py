@@ -0,0 +1,194 @@
+from fastapi import APIRouter, HTTPException, Depends
+from database.database import get_async_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.schemas.booking import (
+    Date_Capacity_Selection_Schema,
+    Available_Car_Schema,
+    Select_Car_Schema,
+    Select_Car_Booked_Schema,
+    Date_Capacity_Response_Schema,
+)
+from src.models.booking import Booking
+import uuid
+from src.models.car_details import Car
+from src.utils.auth import CurrentUser, get_current_user
+from src.utils.booking import validate_booking_dates
+from src.utils.availability import (
+    availability_index,
+    find_available_cars_async,
+    overlapping_booking_exists,
+)
+from src.utils.occupancy import occupancy_calendar
+from src.utils.reservation import conflicting_booking_query
+from src.utils.responses import list_response
+from datetime import datetime
+from logs.log_config import logger
+
+async_booking_router = APIRouter()
+
+
+@async_booking_router.post(
+    "/select_date_capacity", response_model=Date_Capacity_Response_Schema
+)
+async def select_date_capacity(
+    details: Date_Capacity_Selection_Schema,
+    current: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    logger.info("Starting date and capacity selection for booking.")
+
+    validate_booking_dates(details.start_date, details.end_date)
+
+    find_car = await db.execute(
+        select(Car.id)
+        .filter(Car.car_capacity == details.car_capacity, Car.is_deleted == False)
+        .limit(1)
+    )
+    if not find_car.first():
+        logger.error("No car found with capacity: {}", details.car_capacity)
+        raise HTTPException(
+            status_code=404, detail="Car not found with the given capacity."
+        )
+
+    new_booking = Booking(
+        booking_id=str(uuid.uuid4()),
+        user_id=current.id,
+        name=current.name,
+        email=current.email,
+        phone_no=current.phone_no,
+        start_date=details.start_date,
+        end_date=details.end_date,
+        car_capacity=details.car_capacity,
+    )
+
+    db.add(new_booking)
+    await db.commit()
+    await db.refresh(new_booking)
+    logger.info("Booking created successfully with ID: {}", new_booking.booking_id)
+    return new_booking
+
+
+@async_booking_router.get(
+    "/get_available_cars", response_model=list[Available_Car_Schema]
+)
+async def get_available_cars(booking_id: str, db: AsyncSession = Depends(get_async_db)):
+    logger.info("Fetching available cars for booking ID: {}", booking_id)
+    find_booking = await db.get(Booking, booking_id)
+
+    if not find_booking:
+        logger.error("Booking not found for ID: {}", booking_id)
+        raise HTTPException(status_code=404, detail="Booking not found.")
+
+    available_cars = await find_available_cars_async(
+        db, find_booking.car_capacity, find_booking.start_date, find_booking.end_date
+    )
+
+    if not available_cars:
+        logger.warning("No cars available for the selected date range.")
+        raise HTTPException(
+            status_code=404, detail="No cars available for the selected date range."
+        )
+
+    logger.info(
+        "Found {} available cars for booking ID: {}", len(available_cars), booking_id
+    )
+    return list_response(Available_Car_Schema, available_cars)
+
+
+@async_booking_router.post(
+    "/select_car/{booking_id}", response_model=Select_Car_Booked_Schema
+)
+async def select_car(
+    booking_id: str,
+    details: Select_Car_Schema,
+    db: AsyncSession = Depends(get_async_db),
+):
+    logger.info("Selecting car for booking ID: {}", booking_id)
+    find_booking = await db.get(Booking, booking_id)
+
+    if not find_booking:
+        logger.error("Booking not found for ID: {}", booking_id)
+        raise HTTPException(status_code=404, detail="Invalid booking ID.")
+
+    if details.car_id:
+        cars = select(Car).filter(Car.id == details.car_id)
+    elif details.car_name:
+        cars = select(Car).filter(Car.car_name == details.car_name)
+    else:
+        logger.error("Neither car_id nor car_name given.")
+        raise HTTPException(status_code=400, detail="car_id or car_name is required.")
+    cars = cars.filter(Car.is_deleted == False)
+
+    result = await db.execute(
+        cars.filter(
+            ~overlapping_booking_exists(find_booking.start_date, find_booking.end_date)
+        ).limit(1)
+    )
+    find_car = result.scalar_one_or_none()
+
+    if not find_car:
+        if (await db.execute(cars.limit(1))).scalar_one_or_none():
+            logger.error("Car already booked for booking ID: {}", booking_id)
+            raise HTTPException(
+                status_code=409, detail="Car is already booked for the selected dates."
+            )
+        logger.error("Car not found: {}", details.car_id or details.car_name)
+        raise HTTPException(status_code=404, detail="Car not found.")
+
+    # Row lock where the backend has one; the overlap trigger covers SQLite
+    if db.get_bind().dialect.name != "sqlite":
+        await db.execute(select(Car.id).where(Car.id == find_car.id).with_for_update())
+    conflict = await db.execute(
+        conflicting_booking_query(
+            find_car.id,
+            find_car.car_rc,
+            find_booking.booking_id,
+            find_booking.start_date,
+            find_booking.end_date,
+        )
+    )
+    if conflict.scalar():
+        logger.error("Car already booked for booking ID: {}", booking_id)
+        raise HTTPException(
+            status_code=409, detail="Car is already booked for the selected dates."
+        )
+
+    find_booking.car_id = find_car.id
+    find_booking.car_name = find_car.car_name
+    find_booking.car_rc = find_car.car_rc
+    find_booking.car_picture = find_car.car_picture
+
+    await db.commit()
+    logger.info(
+        "Car {} successfully assigned to booking ID: {}", find_car.car_name, booking_id
+    )
+    return find_car
+
+
+@async_booking_router.post("/cancel_booking")
+async def cancel_booking(booking_id: str, db: AsyncSession = Depends(get_async_db)):
+    logger.info("Attempting to cancel booking ID: {}", booking_id)
+    result = await db.execute(
+        select(Booking).filter(
+            Booking.booking_id == booking_id,
+            Booking.is_booked == True,
+            Booking.is_cancelled == False,
+        )
+    )
+    find_booking = result.scalar_one_or_none()
+
+    if not find_booking:
+        logger.error("Booking not found for ID: {}", booking_id)
+        raise HTTPException(status_code=404, detail="Booking not found.")
+
+    find_booking.is_cancelled = True
+    find_booking.is_booked = False
+    find_booking.in_process = False
+    find_booking.cancelled_at = datetime.now()
+
+    await db.commit()
+    availability_index.remove_booking(find_booking.booking_id)
+    occupancy_calendar.remove_booking(find_booking.booking_id)
+    logger.info("Booking ID: {} canceled successfully.", booking_id)
+    return "Booking canceled successfully."
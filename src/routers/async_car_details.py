@@ -0,0 +1,132 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from database.database import get_async_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models.car_details import Car
+from src.schemas.car_details import (
+    CarListingSchema,
+    CarDataUpdateSchema,
+    CarPageSchema,
+    CarSchema,
+    GetAllCarSchema,
+)
+from src.utils.car_details import find_same_car_rc_async
+from src.utils.catalog import fleet_catalog
+from src.utils.pagination import keyset_query, page_of
+from src.utils.responses import JSONResponse, page_response, project, projection
+import uuid
+from logs.log_config import logger
+
+async_car_router = APIRouter()
+
+
+@async_car_router.post("/car_listing")
+async def car_listing(
+    car_details: CarListingSchema, db: AsyncSession = Depends(get_async_db)
+):
+    logger.info("Attempting to list a new car: {}", car_details.car_name)
+    await find_same_car_rc_async(db, car_details.car_rc)
+
+    new_car = Car(
+        id=str(uuid.uuid4()),
+        car_name=car_details.car_name,
+        car_rc=car_details.car_rc,
+        car_rent=car_details.car_rent,
+        car_capacity=car_details.car_capacity,
+        car_detail=car_details.car_detail,
+    )
+
+    db.add(new_car)
+    await db.commit()
+    await db.refresh(new_car)
+    fleet_catalog.upsert(new_car)
+    logger.info("Car {} listed successfully.", car_details.car_name)
+    return JSONResponse(
+        {"message": "Car added successfully", "car": project(CarSchema, new_car)}
+    )
+
+
+@async_car_router.patch("/update_car/{id}")
+async def update_car(
+    id: str, car_update: CarDataUpdateSchema, db: AsyncSession = Depends(get_async_db)
+):
+    logger.info("Updating car details for ID: {}", id)
+    find_car = await db.get(Car, id)
+
+    if not find_car:
+        logger.error("Car with ID: {} not found for update.", id)
+        raise HTTPException(status_code=404, detail="Car not found")
+
+    new_data = car_update.model_dump(exclude_none=True)
+
+    for key, value in new_data.items():
+        setattr(find_car, key, value)
+
+    await db.commit()
+    await db.refresh(find_car)
+    fleet_catalog.upsert(find_car)
+
+    logger.info("Car with ID: {} updated successfully.", id)
+    return JSONResponse(
+        {"message": "Car updated successfully", "car": project(CarSchema, find_car)}
+    )
+
+
+@async_car_router.get("/get_all_car", response_model=CarPageSchema)
+async def get_all_car(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    car_name: Optional[str] = None,
+    car_capacity: Optional[str] = None,
+    is_booked: Optional[bool] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    logger.info("Fetching all available cars.")
+    query = select(*projection(GetAllCarSchema).columns(Car), Car.is_created).filter(
+        Car.is_deleted == False
+    )
+    if car_name:
+        query = query.filter(Car.car_name == car_name)
+    if car_capacity:
+        query = query.filter(Car.car_capacity == car_capacity)
+    if is_booked is not None:
+        query = query.filter(Car.is_booked == is_booked)
+
+    result = await db.execute(
+        keyset_query(query, Car.is_created, Car.id, limit, cursor)
+    )
+    find_car, next_cursor = page_of(result.all(), Car.is_created, Car.id, limit)
+
+    if not find_car and not cursor:
+        logger.error("No cars found.")
+        raise HTTPException(status_code=404, detail="No cars available")
+
+    logger.info("Found {} cars.", len(find_car))
+    return page_response(GetAllCarSchema, find_car, next_cursor)
+
+
+@async_car_router.delete("/delete_car/{id}")
+async def delete_car(id: str, db: AsyncSession = Depends(get_async_db)):
+    logger.info("Attempting to delete car with ID: {}", id)
+    result = await db.execute(select(Car).filter(Car.id == id, Car.is_booked == False))
+    find_car = result.scalar_one_or_none()
+
+    if not find_car:
+        logger.error("Car with ID: {} not found or is currently booked.", id)
+        raise HTTPException(status_code=404, detail="Car not found or currently booked")
+
+    if find_car.is_deleted:
+        logger.warning("Car with ID: {} is already marked as deleted.", id)
+        raise HTTPException(status_code=400, detail="Car already deleted")
+
+    find_car.is_deleted = True
+
+    await db.commit()
+    await db.refresh(find_car)
+    fleet_catalog.upsert(find_car)
+
+    logger.info("Car with ID: {} deleted successfully.", id)
+    return JSONResponse(
+        {"message": "Car deleted successfully", "data": project(CarSchema, find_car)}
+    )
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException
-from database.database import SessionLocal
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from database.database import get_db, SessionRoute
+from sqlalchemy.orm import Session
 from src.schemas.booking import (
     Date_Capacity_Selection_Schema,
     Available_Car_Schema,
@@ -9,45 +11,47 @@ from src.schemas.booking import (
 )
 from src.models.booking import Booking
 import uuid
-from src.models.car_details import Car
-from src.utils.booking import decode_token, gen_otp, validate_scheduled_time
-from src.models.user import OTP
-from datetime import datetime
+from src.utils.auth import CurrentUser, get_current_user
+from src.utils.booking import bill_booking, gen_otp, validate_booking_dates
+from src.utils.otp_store import otp_store, PAYMENT
+from src.utils.rate_limit import rate_limit, OTP
+from src.utils.archive import booking_history
+from src.utils.availability import availability_index, find_available_cars, free_cars
+from src.utils.catalog import fleet_catalog
+from src.utils.occupancy import calendar_cars, month_calendar, occupancy_calendar
+from src.utils.reservation import confirm_reservation, reserve_car
+from src.utils.responses import list_response
+from datetime import date, datetime, timedelta
 from logs.log_config import logger
 
-booking_router = APIRouter()
-db = SessionLocal()
+booking_router = APIRouter(route_class=SessionRoute)
 
 
 @booking_router.post(
     "/select_date_capacity", response_model=Date_Capacity_Response_Schema
 )
-def select_date_capacity(token: str, details: Date_Capacity_Selection_Schema):
+def select_date_capacity(
+    details: Date_Capacity_Selection_Schema,
+    current: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
     logger.info("Starting date and capacity selection for booking.")
-    user_details = decode_token(token)
-    user_id, name, email, phone_no = user_details
 
     new_booking = Booking(
         booking_id=str(uuid.uuid4()),
-        user_id=user_id,
-        name=name,
-        email=email,
-        phone_no=phone_no,
+        user_id=current.id,
+        name=current.name,
+        email=current.email,
+        phone_no=current.phone_no,
         start_date=details.start_date,
         end_date=details.end_date,
         car_capacity=details.car_capacity,
     )
 
-    validate_scheduled_time(details.start_date, details.end_date)
-    if not details.start_date <= details.end_date:
-        logger.error("End date is before start date.")
-        raise HTTPException(
-            status_code=400, detail="End date must be after start date."
-        )
+    validate_booking_dates(details.start_date, details.end_date)
 
-    find_car = db.query(Car).filter(Car.car_capacity == details.car_capacity).first()
-    if not find_car:
-        logger.error(f"No car found with capacity: {details.car_capacity}")
+    if not fleet_catalog.with_capacity(db, details.car_capacity):
+        logger.error("No car found with capacity: {}", details.car_capacity)
         raise HTTPException(
             status_code=404, detail="Car not found with the given capacity."
         )
@@ -55,29 +59,21 @@ def select_date_capacity(token: str, details: Date_Capacity_Selection_Schema):
     db.add(new_booking)
     db.commit()
     db.refresh(new_booking)
-    logger.info(f"Booking created successfully with ID: {new_booking.booking_id}")
+    logger.info("Booking created successfully with ID: {}", new_booking.booking_id)
     return new_booking
 
 
 @booking_router.get("/get_available_cars", response_model=list[Available_Car_Schema])
-def get_available_cars(booking_id: str):
-    logger.info(f"Fetching available cars for booking ID: {booking_id}")
+def get_available_cars(booking_id: str, db: Session = Depends(get_db)):
+    logger.info("Fetching available cars for booking ID: {}", booking_id)
     find_booking = db.query(Booking).filter(Booking.booking_id == booking_id).first()
 
     if not find_booking:
-        logger.error(f"Booking not found for ID: {booking_id}")
+        logger.error("Booking not found for ID: {}", booking_id)
         raise HTTPException(status_code=404, detail="Booking not found.")
 
-    available_cars = (
-        db.query(Car)
-        .outerjoin(Booking, Booking.car_name == Car.car_name)
-        .filter(
-            (Booking.start_date > find_booking.end_date)
-            | (Booking.end_date < find_booking.start_date)
-            | (Booking.car_name == None),
-            Car.car_capacity == find_booking.car_capacity,
-        )
-        .all()
+    available_cars = find_available_cars(
+        db, find_booking.car_capacity, find_booking.start_date, find_booking.end_date
     )
 
     if not available_cars:
@@ -87,54 +83,70 @@ def get_available_cars(booking_id: str):
         )
 
     logger.info(
-        f"Found {len(available_cars)} available cars for booking ID: {booking_id}"
+        "Found {} available cars for booking ID: {}", len(available_cars), booking_id
     )
-    return available_cars
+    return list_response(Available_Car_Schema, available_cars)
 
 
 @booking_router.post(
     "/select_car/{booking_id}", response_model=Select_Car_Booked_Schema
 )
-def select_car(booking_id: str, details: Select_Car_Schema):
-    logger.info(f"Selecting car for booking ID: {booking_id}")
-    find_car = db.query(Car).filter(Car.car_name == details.car_name).first()
-
-    if not find_car:
-        logger.error(f"Car not found: {details.car_name}")
-        raise HTTPException(status_code=404, detail="Car not found.")
-
+def select_car(
+    booking_id: str, details: Select_Car_Schema, db: Session = Depends(get_db)
+):
+    logger.info("Selecting car for booking ID: {}", booking_id)
     find_booking = db.query(Booking).filter(Booking.booking_id == booking_id).first()
 
     if not find_booking:
-        logger.error(f"Booking not found for ID: {booking_id}")
+        logger.error("Booking not found for ID: {}", booking_id)
         raise HTTPException(status_code=404, detail="Invalid booking ID.")
 
-    find_booking.car_name = find_car.car_name
-    find_booking.car_rc = find_car.car_rc
-    find_booking.car_picture = find_car.car_picture
+    if details.car_id:
+        cars = [fleet_catalog.get(db, details.car_id)]
+    elif details.car_name:
+        cars = fleet_catalog.by_name(db, details.car_name)
+    else:
+        logger.error("Neither car_id nor car_name given.")
+        raise HTTPException(status_code=400, detail="car_id or car_name is required.")
+    cars = [car for car in cars if car is not None and not car.is_deleted]
+
+    available = free_cars(db, cars, find_booking.start_date, find_booking.end_date)
+
+    if not available:
+        if cars:
+            logger.error("Car already booked for booking ID: {}", booking_id)
+            raise HTTPException(
+                status_code=409, detail="Car is already booked for the selected dates."
+            )
+        logger.error("Car not found: {}", details.car_id or details.car_name)
+        raise HTTPException(status_code=404, detail="Car not found.")
 
-    db.commit()
-    db.refresh(find_car)
-    db.refresh(find_booking)
+    find_car = available[0]
+    reserve_car(db, find_booking, find_car)
     logger.info(
-        f"Car {find_car.car_name} successfully assigned to booking ID: {booking_id}"
+        "Car {} successfully assigned to booking ID: {}", find_car.car_name, booking_id
     )
     return find_car
 
 
-@booking_router.post("/send_payment_otp")
-def send_payment_otp(booking_id: str):
-    logger.info(f"Generating payment OTP for booking ID: {booking_id}")
+@booking_router.post(
+    "/send_payment_otp", dependencies=[Depends(rate_limit(OTP, subject="booking_id"))]
+)
+def send_payment_otp(booking_id: str, db: Session = Depends(get_db)):
+    logger.info("Generating payment OTP for booking ID: {}", booking_id)
     find_booking = db.query(Booking).filter(Booking.booking_id == booking_id).first()
 
     if not find_booking:
-        logger.error(f"Booking not found for ID: {booking_id}")
+        logger.error("Booking not found for ID: {}", booking_id)
         raise HTTPException(status_code=404, detail="Booking not found.")
 
-    find_car = db.query(Car).filter(Car.car_name == find_booking.car_name).first()
+    if find_booking.car_id:
+        find_car = fleet_catalog.get(db, find_booking.car_id)
+    else:
+        find_car = next(iter(fleet_catalog.by_name(db, find_booking.car_name)), None)
 
     if not find_car:
-        logger.error(f"Car not found for booking ID: {booking_id}")
+        logger.error("Car not found for booking ID: {}", booking_id)
         raise HTTPException(status_code=404, detail="Car not found.")
 
     rental_days = (find_booking.end_date - find_booking.start_date).days
@@ -142,58 +154,53 @@ def send_payment_otp(booking_id: str):
         logger.error("Invalid rental period.")
         raise HTTPException(status_code=400, detail="Invalid rental period.")
 
-    bill_amount = rental_days * int(find_car.car_rent)
-    logger.info(f"Calculated bill amount: {bill_amount} for booking ID: {booking_id}")
+    bill_amount = bill_booking(db, booking_id, find_car.car_rent)
 
-    find_booking.car_rent = find_car.car_rent
-    find_booking.bill_amount = bill_amount
-
-    gen_otp(find_booking.email, bill_amount)
+    gen_otp(db, find_booking.email, bill_amount, booking_id)
     db.commit()
     db.refresh(find_booking)
-    logger.info(f"Payment OTP sent successfully to email: {find_booking.email}")
+    logger.info("Payment OTP sent successfully to email: {}", find_booking.email)
     return "Email sent successfully. Please complete payment."
 
 
 @booking_router.get("/verify_payment_otp")
-def verify_payment_otp(email: str, otp: str):
-    logger.info(f"Verifying payment OTP for email: {email}")
+def verify_payment_otp(booking_id: str, otp: str, db: Session = Depends(get_db)):
+    logger.info("Verifying payment OTP for booking ID: {}", booking_id)
     find_car_otp = (
         db.query(Booking)
         .filter(
-            Booking.email == email,
+            Booking.booking_id == booking_id,
             Booking.is_booked == False,
             Booking.in_process == True,
+            Booking.bill_amount.isnot(None),
         )
         .first()
     )
 
     if not find_car_otp:
-        logger.error(f"No booking in process for email: {email}")
-        raise HTTPException(
-            status_code=404, detail="No booking in process for this email."
-        )
-
-    find_otp = db.query(OTP).filter(OTP.email == email, OTP.otp == otp).first()
-
-    if not find_otp:
-        logger.error("Invalid email or OTP.")
-        raise HTTPException(status_code=400, detail="Invalid email or OTP.")
+        logger.error("No billed booking in process with ID: {}", booking_id)
+        raise HTTPException(status_code=404, detail="No booking in process.")
 
-    find_car_otp.is_booked = True
-    find_car_otp.in_process = False
-    find_car_otp.booked_at = datetime.now()
+    if not otp_store.verify(PAYMENT, booking_id, otp):
+        logger.error("Invalid OTP for booking ID: {}", booking_id)
+        raise HTTPException(status_code=400, detail="Invalid booking ID or OTP.")
 
-    db.delete(find_otp)
-    db.commit()
+    confirm_reservation(db, find_car_otp)
     db.refresh(find_car_otp)
-    logger.info(f"OTP verified successfully for email: {email}")
+    for index in (availability_index, occupancy_calendar):
+        index.add_booking(
+            find_car_otp.booking_id,
+            find_car_otp.car_id,
+            find_car_otp.start_date,
+            find_car_otp.end_date,
+        )
+    logger.info("OTP verified successfully for booking ID: {}", booking_id)
     return "OTP verified successfully."
 
 
 @booking_router.post("/cancel_booking")
-def cancel_booking(booking_id: str):
-    logger.info(f"Attempting to cancel booking ID: {booking_id}")
+def cancel_booking(booking_id: str, db: Session = Depends(get_db)):
+    logger.info("Attempting to cancel booking ID: {}", booking_id)
     find_booking = (
         db.query(Booking)
         .filter(
@@ -205,11 +212,11 @@ def cancel_booking(booking_id: str):
     )
 
     if not find_booking:
-        logger.error(f"Booking not found for ID: {booking_id}")
+        logger.error("Booking not found for ID: {}", booking_id)
         raise HTTPException(status_code=404, detail="Booking not found.")
 
     if find_booking.is_booked == False:
-        logger.warning(f"Booking already canceled for ID: {booking_id}")
+        logger.warning("Booking already canceled for ID: {}", booking_id)
         raise HTTPException(status_code=400, detail="Booking is already canceled.")
 
     find_booking.is_cancelled = True
@@ -219,5 +226,73 @@ def cancel_booking(booking_id: str):
 
     db.commit()
     db.refresh(find_booking)
-    logger.info(f"Booking ID: {booking_id} canceled successfully.")
+    availability_index.remove_booking(find_booking.booking_id)
+    occupancy_calendar.remove_booking(find_booking.booking_id)
+    logger.info("Booking ID: {} canceled successfully.", booking_id)
     return "Booking canceled successfully."
+
+
+def occupancy_cars(db, car_capacity, car_id):
+    if car_capacity is None and not car_id:
+        logger.error("Neither car_capacity nor car_id given.")
+        raise HTTPException(
+            status_code=400, detail="car_capacity or car_id is required."
+        )
+    car_ids = calendar_cars(db, car_capacity, car_id)
+    if not car_ids:
+        logger.error("No cars found for calendar: {}", car_id or car_capacity)
+        raise HTTPException(status_code=404, detail="Car not found.")
+    return car_ids
+
+
+@booking_router.get("/occupancy_calendar")
+def get_occupancy_calendar(
+    year: int = Query(..., ge=2000, le=9999),
+    month: int = Query(..., ge=1, le=12),
+    car_capacity: Optional[int] = None,
+    car_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    logger.info("Occupancy calendar for {}-{:02d}", year, month)
+    car_ids = occupancy_cars(db, car_capacity, car_id)
+    days = month_calendar(db, car_ids, year, month)
+    return {"year": year, "month": month, "cars": len(car_ids), "days": days}
+
+
+@booking_router.get("/first_available")
+def first_available(
+    days: int = Query(..., ge=1),
+    from_date: Optional[date] = None,
+    car_capacity: Optional[int] = None,
+    car_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    logger.info("Looking for the first {}-day gap from {}", days, from_date)
+    car_ids = occupancy_cars(db, car_capacity, car_id)
+    occupancy_calendar.ensure_loaded(db)
+    start_date, free_car_ids = occupancy_calendar.first_gap(
+        car_ids, days, max(from_date or date.today(), date.today())
+    )
+    if start_date is None:
+        logger.warning("No {}-day gap within the calendar horizon.", days)
+        raise HTTPException(
+            status_code=404, detail="No free dates within the calendar horizon."
+        )
+    return {
+        "start_date": start_date,
+        "end_date": start_date + timedelta(days=days - 1),
+        "car_ids": free_car_ids,
+    }
+
+
+@booking_router.get("/booking_history")
+def get_booking_history(
+    booking_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    current: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    logger.info(
+        "Booking history for email: {}, booking ID: {}", current.email, booking_id
+    )
+    return booking_history(db, current.email, booking_id=booking_id, limit=limit)
@@ -1,24 +1,33 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from database.database import SessionLocal
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from database.database import get_db, SessionRoute
+from sqlalchemy.orm import Session
 from src.models.car_details import Car
 from src.schemas.car_details import (
     CarListingSchema,
     CarDataUpdateSchema,
     GetAllCarSchema,
+    CarPageSchema,
+    CarSchema,
 )
 from src.utils.car_details import find_same_car_rc
+from src.utils.auth import get_current_user
+from src.utils.car_import import import_cars
+from src.utils.catalog import fleet_catalog
+from src.utils.pagination import stream_ndjson
+from src.utils.photos import check_content_length, receive_photo
+from src.utils.responses import JSONResponse, page_response, project
 import uuid
-import shutil
-import os
 from logs.log_config import logger
 
-car_router = APIRouter()
-db = SessionLocal()
+car_router = APIRouter(route_class=SessionRoute)
 
 
 @car_router.post("/car_listing")
-def car_listing(car_details: CarListingSchema):
-    logger.info(f"Attempting to list a new car: {car_details.car_name}")
+def car_listing(car_details: CarListingSchema, db: Session = Depends(get_db)):
+    logger.info("Attempting to list a new car: {}", car_details.car_name)
     new_car = Car(
         id=str(uuid.uuid4()),
         car_name=car_details.car_name,
@@ -30,49 +39,95 @@ def car_listing(car_details: CarListingSchema):
 
     find_one_entry = db.query(Car).first()
     if find_one_entry:
-        logger.info(f"Checking for duplicate car RC: {car_details.car_rc}")
-        find_same_car_rc(car_details.car_rc)
+        logger.info("Checking for duplicate car RC: {}", car_details.car_rc)
+        find_same_car_rc(db, car_details.car_rc)
 
     db.add(new_car)
     db.commit()
     db.refresh(new_car)
-    logger.info(f"Car {car_details.car_name} listed successfully.")
-    return {"message": "Car added successfully", "car": new_car}
+    fleet_catalog.upsert(new_car)
+    logger.info("Car {} listed successfully.", car_details.car_name)
+    return JSONResponse(
+        {"message": "Car added successfully", "car": project(CarSchema, new_car)}
+    )
 
 
-UPLOAD_DIR = "photos"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+@car_router.post(
+    "/car_import",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def car_import(request: Request, db: Session = Depends(get_db)):
+    logger.info("Importing cars from {}", request.headers.get("content-type"))
+    return await import_cars(db, request)
 
 
-@car_router.post("/upload-photo/")
-async def upload_photo(id: str, file: UploadFile = File(...)):
-    logger.info(f"Uploading photo for car ID: {id}")
-    file_location = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_location, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+def car_exists(db: Session, id: str):
+    exists = db.query(Car.id).filter(Car.id == id).first() is not None
+    # Give the connection back to the pool while the photo streams in
+    db.rollback()
+    return exists
 
-    get_car = db.query(Car).filter(Car.id == id).first()
 
-    if not get_car:
-        logger.error(f"Car with ID: {id} not found for photo upload.")
+def set_car_picture(db: Session, id: str, name: str):
+    find_car = db.get(Car, id)
+    if not find_car:
+        return False
+    find_car.car_picture = name
+    db.commit()
+    db.refresh(find_car)
+    fleet_catalog.upsert(find_car)
+    return True
+
+
+@car_router.post(
+    "/upload-photo/",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"],
+                    }
+                }
+            },
+        }
+    },
+)
+async def upload_photo(id: str, request: Request, db: Session = Depends(get_db)):
+    logger.info("Uploading photo for car ID: {}", id)
+    if not await run_in_threadpool(car_exists, db, id):
+        logger.error("Car with ID: {} not found for photo upload.", id)
         raise HTTPException(status_code=404, detail="Car ID incorrect")
 
-    get_car.car_picture = file_location
+    check_content_length(request)
+    name = await receive_photo(request)
 
-    db.commit()
-    db.refresh(get_car)
+    if not await run_in_threadpool(set_car_picture, db, id, name):
+        logger.error("Car with ID: {} disappeared during photo upload.", id)
+        raise HTTPException(status_code=404, detail="Car ID incorrect")
 
-    logger.info(f"Photo '{file.filename}' saved at '{file_location}' for car ID: {id}")
-    return {"info": f"File '{file.filename}' saved at '{file_location}'"}
+    logger.info("Photo '{}' saved for car ID: {}", name, id)
+    return {"info": f"Photo saved as '{name}'", "car_picture": name}
 
 
 @car_router.patch("/update_car/{id}")
-def update_car(id: str, car_update: CarDataUpdateSchema):
-    logger.info(f"Updating car details for ID: {id}")
+def update_car(id: str, car_update: CarDataUpdateSchema, db: Session = Depends(get_db)):
+    logger.info("Updating car details for ID: {}", id)
     find_car = db.query(Car).filter(Car.id == id).first()
 
     if not find_car:
-        logger.error(f"Car with ID: {id} not found for update.")
+        logger.error("Car with ID: {} not found for update.", id)
         raise HTTPException(status_code=404, detail="Car not found")
 
     new_data = car_update.model_dump(exclude_none=True)
@@ -82,41 +137,95 @@ def update_car(id: str, car_update: CarDataUpdateSchema):
 
     db.commit()
     db.refresh(find_car)
+    fleet_catalog.upsert(find_car)
 
-    logger.info(f"Car with ID: {id} updated successfully.")
-    return {"message": "Car updated successfully", "car": find_car}
+    logger.info("Car with ID: {} updated successfully.", id)
+    return JSONResponse(
+        {"message": "Car updated successfully", "car": project(CarSchema, find_car)}
+    )
 
 
-@car_router.get("/get_all_car", response_model=list[GetAllCarSchema])
-def get_all_car():
+def listed_cars_query(
+    db: Session,
+    car_name: Optional[str] = None,
+    car_capacity: Optional[str] = None,
+    is_booked: Optional[bool] = None,
+):
+    query = db.query(Car).filter(Car.is_deleted == False)
+    if car_name:
+        query = query.filter(Car.car_name == car_name)
+    if car_capacity:
+        query = query.filter(Car.car_capacity == car_capacity)
+    if is_booked is not None:
+        query = query.filter(Car.is_booked == is_booked)
+    return query
+
+
+@car_router.get("/get_all_car", response_model=CarPageSchema)
+def get_all_car(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    car_name: Optional[str] = None,
+    car_capacity: Optional[str] = None,
+    is_booked: Optional[bool] = None,
+    db: Session = Depends(get_db),
+):
     logger.info("Fetching all available cars.")
-    find_car = db.query(Car).filter(Car.is_deleted == False).all()
+    find_car, next_cursor = fleet_catalog.page(
+        db, limit, cursor, car_name, car_capacity, is_booked
+    )
 
-    if not find_car:
+    if not find_car and not cursor:
         logger.error("No cars found.")
         raise HTTPException(status_code=404, detail="No cars available")
 
-    logger.info(f"Found {len(find_car)} cars.")
-    return find_car
+    logger.info("Found {} cars.", len(find_car))
+    return page_response(GetAllCarSchema, find_car, next_cursor)
+
+
+@car_router.get("/export_all_car")
+def export_all_car(
+    car_name: Optional[str] = None,
+    car_capacity: Optional[str] = None,
+    is_booked: Optional[bool] = None,
+):
+    logger.info("Exporting all cars as NDJSON.")
+    return StreamingResponse(
+        stream_ndjson(
+            lambda db: listed_cars_query(db, car_name, car_capacity, is_booked),
+            GetAllCarSchema,
+            Car.is_created,
+            Car.id,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+@car_router.get("/catalog_stats", dependencies=[Depends(get_current_user)])
+def catalog_stats():
+    return fleet_catalog.stats()
 
 
 @car_router.delete("/delete_car/{id}")
-def delete_car(id: str):
-    logger.info(f"Attempting to delete car with ID: {id}")
+def delete_car(id: str, db: Session = Depends(get_db)):
+    logger.info("Attempting to delete car with ID: {}", id)
     find_car = db.query(Car).filter(Car.id == id, Car.is_booked == False).first()
 
     if not find_car:
-        logger.error(f"Car with ID: {id} not found or is currently booked.")
+        logger.error("Car with ID: {} not found or is currently booked.", id)
         raise HTTPException(status_code=404, detail="Car not found or currently booked")
 
     if find_car.is_deleted:
-        logger.warning(f"Car with ID: {id} is already marked as deleted.")
+        logger.warning("Car with ID: {} is already marked as deleted.", id)
         raise HTTPException(status_code=400, detail="Car already deleted")
 
     find_car.is_deleted = True
 
     db.commit()
     db.refresh(find_car)
+    fleet_catalog.upsert(find_car)
 
-    logger.info(f"Car with ID: {id} deleted successfully.")
-    return {"message": "Car deleted successfully", "data": find_car}
+    logger.info("Car with ID: {} deleted successfully.", id)
+    return JSONResponse(
+        {"message": "Car deleted successfully", "data": project(CarSchema, find_car)}
+    )
@@ -0,0 +1,10 @@
+from typing import Optional
+from fastapi import APIRouter, Request
+from src.utils.photos import photo_response
+
+photo_router = APIRouter()
+
+
+@photo_router.api_route("/photos/{name}", methods=["GET", "HEAD"])
+async def get_photo(request: Request, name: str, size: Optional[int] = None):
+    return await photo_response(request, name, size)
@@ -1,63 +1,72 @@
-from fastapi import APIRouter, HTTPException, status
-from database.database import SessionLocal
-from src.models.user import User, OTP
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from database.database import get_db, SessionRoute
+from sqlalchemy.orm import Session
+from src.models.user import User
 from src.schemas.user import (
     RegisterUserSchema,
     GetAllUserSchema,
+    UserPageSchema,
+    UserSchema,
     UpdateUserSchema,
     ForgetPasswordSchema,
     ResetPasswordSchema,
 )
 import uuid, random
 from src.utils.user import (
-    pwd_context,
+    hash_password,
     find_same_email,
     send_email,
     pass_checker,
     get_token,
-    decode_token,
     gen_otp,
 )
+from src.utils.pagination import keyset_page, stream_ndjson
+from src.utils.responses import JSONResponse, page_response, project, projection
+from src.utils.auth import CurrentUser, get_current_user, token_cache
+from src.utils.otp_store import otp_store, VERIFY_EMAIL, RESET_PASSWORD
+from src.utils.rate_limit import rate_limit, LOGIN, OTP
 from logs.log_config import logger  # Assuming logger is configured
 
-user_router = APIRouter()
-db = SessionLocal()
+user_router = APIRouter(route_class=SessionRoute)
 
 
 # -------------------- ~ REGISTER USER ~ --------------------#
 
 
 @user_router.post("/register_user")
-def register_user(user: RegisterUserSchema):
-    logger.info(f"Registering new user: {user.email}")
+def register_user(user: RegisterUserSchema, db: Session = Depends(get_db)):
+    logger.info("Registering new user: {}", user.email)
+    find_minimum_one_entry = db.query(User).first()
+    if find_minimum_one_entry:
+        logger.warning("Email already exists: {}", user.email)
+        find_same_email(db, user.email)
+
+    # Hash only once the email is known to be free
     new_user = User(
         id=str(uuid.uuid4()),
         name=user.name,
         email=user.email,
         phone_no=user.phone_no,
-        password=pwd_context.hash(user.password),
+        password=hash_password(user.password),
     )
 
-    find_minimum_one_entry = db.query(User).first()
-    if find_minimum_one_entry:
-        logger.warning(f"Email already exists: {user.email}")
-        find_same_email(user.email)
-
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
-    logger.info(f"User registered successfully: {user.email}")
+    logger.info("User registered successfully: {}", user.email)
     return "User registered successfully, now proceed for verification"
 
 
 # -------------------- ~ GENERATE OTP ~ --------------------#
 
 
-@user_router.post("/generate otp")
-def generate_otp(email: str):
-    logger.info(f"Generating OTP for email: {email}")
-    gen_otp(email)
-    logger.info(f"OTP generated and sent to email: {email}")
+@user_router.post("/generate otp", dependencies=[Depends(rate_limit(OTP))])
+def generate_otp(email: str, db: Session = Depends(get_db)):
+    logger.info("Generating OTP for email: {}", email)
+    gen_otp(db, email, VERIFY_EMAIL)
+    logger.info("OTP generated and sent to email: {}", email)
     return "OTP generated successfully, now check your email"
 
 
@@ -65,8 +74,8 @@ def generate_otp(email: str):
 
 
 @user_router.get("/verify_otp")
-def verify_otp(email: str, otp: str):
-    logger.info(f"Verifying OTP for email: {email}")
+def verify_otp(email: str, otp: str, db: Session = Depends(get_db)):
+    logger.info("Verifying OTP for email: {}", email)
     find_user_with_email = (
         db.query(User)
         .filter(
@@ -79,29 +88,26 @@ def verify_otp(email: str, otp: str):
     )
 
     if not find_user_with_email:
-        logger.error(f"User not found: {email}")
+        logger.error("User not found: {}", email)
         raise HTTPException(status_code=404, detail="User not found")
 
-    find_otp = db.query(OTP).filter(OTP.email == email, OTP.otp == otp).first()
-
-    if not find_otp:
-        logger.error(f"OTP not found for email: {email}")
+    if not otp_store.verify(VERIFY_EMAIL, email, otp):
+        logger.error("OTP not found for email: {}", email)
         raise HTTPException(status_code=400, detail="OTP not found")
 
     find_user_with_email.is_verified = True
-    db.delete(find_otp)
     db.commit()
     db.refresh(find_user_with_email)
-    logger.info(f"OTP verified successfully for email: {email}")
+    logger.info("OTP verified successfully for email: {}", email)
     return "OTP verified successfully"
 
 
 # -------------------- ~ LOGIN USER ~ --------------------#
 
 
-@user_router.get("/login_user")
-def login_user(email: str, password: str):
-    logger.info(f"User login attempt: {email}")
+@user_router.get("/login_user", dependencies=[Depends(rate_limit(LOGIN))])
+def login_user(email: str, password: str, db: Session = Depends(get_db)):
+    logger.info("User login attempt: {}", email)
     find_user = (
         db.query(User)
         .filter(
@@ -114,7 +120,7 @@ def login_user(email: str, password: str):
     )
 
     if not find_user:
-        logger.error(f"User not found for login: {email}")
+        logger.error("User not found for login: {}", email)
         raise HTTPException(status_code=404, detail="User not found")
 
     pass_checker(password, find_user.password)
@@ -123,7 +129,7 @@ def login_user(email: str, password: str):
         find_user.id, find_user.name, find_user.email, find_user.phone_no
     )
 
-    logger.info(f"Login successful for user: {email}")
+    logger.info("Login successful for user: {}", email)
     return access_token, "Login successfully"
 
 
@@ -131,8 +137,8 @@ def login_user(email: str, password: str):
 
 
 @user_router.get("/get_user/{user_email}", response_model=GetAllUserSchema)
-def get_user(user_email: str):
-    logger.info(f"Fetching user details for: {user_email}")
+def get_user(user_email: str, db: Session = Depends(get_db)):
+    logger.info("Fetching user details for: {}", user_email)
     find_user = (
         db.query(User)
         .filter(
@@ -145,115 +151,137 @@ def get_user(user_email: str):
     )
 
     if not find_user:
-        logger.error(f"User not found: {user_email}")
+        logger.error("User not found: {}", user_email)
         raise HTTPException(status_code=404, detail="User not found")
 
-    logger.info(f"User details retrieved successfully for: {user_email}")
+    logger.info("User details retrieved successfully for: {}", user_email)
     return find_user
 
 
 # -------------------- ~ GET ALL USERS ~ --------------------#
 
 
-@user_router.get("/get_all_user", response_model=list[GetAllUserSchema])
-def get_all_user():
+def active_users_query(
+    db: Session, name: Optional[str] = None, email: Optional[str] = None
+):
+    query = db.query(User).filter(
+        User.is_active == True, User.is_verified == True, User.is_deleted == False
+    )
+    if name:
+        query = query.filter(User.name == name)
+    if email:
+        query = query.filter(User.email == email)
+    return query
+
+
+@user_router.get("/get_all_user", response_model=UserPageSchema)
+def get_all_user(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     logger.info("Fetching all active, verified users")
-    find_all_user = (
-        db.query(User)
-        .filter(
-            User.is_active == True, User.is_verified == True, User.is_deleted == False
-        )
-        .all()
+    find_all_user, next_cursor = keyset_page(
+        active_users_query(db, name, email).with_entities(
+            *projection(GetAllUserSchema).columns(User), User.created_at
+        ),
+        User.created_at,
+        User.id,
+        limit,
+        cursor,
     )
 
-    if not find_all_user:
+    if not find_all_user and not cursor:
         logger.error("No active users found")
         raise HTTPException(status_code=404, detail="No active users found")
 
-    logger.info(f"Found {len(find_all_user)} active users")
-    return find_all_user
+    logger.info("Found {} active users", len(find_all_user))
+    return page_response(GetAllUserSchema, find_all_user, next_cursor)
 
 
-# -------------------- ~ UPDATE USER ~ --------------------#
-
+# -------------------- ~ EXPORT ALL USERS ~ --------------------#
 
-@user_router.patch("/update_user")
-def update_user(password: str, token: str, user: UpdateUserSchema):
-    logger.info(f"Updating user details for email: {user.email}")
-    user_details = decode_token(token)
-    user_id, name, email, phone_no = user_details
 
-    find_user = (
-        db.query(User)
-        .filter(
-            User.email == email,
-            User.password == password,
-            User.is_active == True,
-            User.is_verified == True,
-            User.is_deleted == False,
-        )
-        .first()
+@user_router.get("/export_all_user")
+def export_all_user(name: Optional[str] = None, email: Optional[str] = None):
+    logger.info("Exporting all active, verified users as NDJSON")
+    return StreamingResponse(
+        stream_ndjson(
+            lambda db: active_users_query(db, name, email),
+            GetAllUserSchema,
+            User.created_at,
+            User.id,
+        ),
+        media_type="application/x-ndjson",
     )
 
-    if not find_user:
-        logger.error(f"User not found for update: {email}")
-        raise HTTPException(status_code=404, detail="User not found")
+
+# -------------------- ~ UPDATE USER ~ --------------------#
+
+
+@user_router.patch("/update_user")
+def update_user(
+    password: str,
+    user: UpdateUserSchema,
+    current: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    logger.info("Updating user details for email: {}", current.email)
+    find_user = current.user
+    pass_checker(password, find_user.password)
 
     new_userschema_without_none = user.model_dump(exclude_none=True)
 
     for key, value in new_userschema_without_none.items():
         if key == "password":
-            setattr(find_user, key, pwd_context.hash(value))
+            setattr(find_user, key, hash_password(value))
         else:
-            find_same_email(value)
+            find_same_email(db, value)
             setattr(find_user, key, value)
 
     db.commit()
     db.refresh(find_user)
-    logger.info(f"User details updated successfully for email: {email}")
-    return {"message": "User updated successfully", "data": find_user}
+    token_cache.invalidate_user(find_user.id)
+    logger.info("User details updated successfully for email: {}", current.email)
+    return JSONResponse(
+        {"message": "User updated successfully", "data": project(UserSchema, find_user)}
+    )
 
 
 # -------------------- ~ DELETE USER ~ --------------------#
 
 
 @user_router.delete("/delete_user")
-def delete_user(token: str):
+def delete_user(
+    current: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)
+):
     logger.info("Deleting user")
-    user_details = decode_token(token)
-    user_id, name, email, phone_no = user_details
-
-    find_user = (
-        db.query(User)
-        .filter(User.email == email, User.is_active == True, User.is_verified == True)
-        .first()
-    )
-
-    if not find_user:
-        logger.error(f"User not found for deletion: {email}")
-        raise HTTPException(status_code=404, detail="User not found")
-
-    if find_user.is_deleted == True:
-        logger.warning(f"User already deleted: {email}")
-        raise HTTPException(status_code=400, detail="User account already deleted")
+    find_user = current.user
 
     find_user.is_deleted = True
     find_user.is_active = False
     find_user.is_verified = False
     db.commit()
     db.refresh(find_user)
-    logger.info(f"User deleted successfully: {email}")
-    return {"message": "User deleted successfully", "data": find_user}
+    token_cache.invalidate_user(find_user.id)
+    logger.info("User deleted successfully: {}", current.email)
+    return JSONResponse(
+        {"message": "User deleted successfully", "data": project(UserSchema, find_user)}
+    )
 
 
 # -------------------- ~ OTP FOR FORGOT PASSWORD ~ --------------------#
 
 
-@user_router.post("/generate_otp_for_forget_password")
-def generate_otp_for_forget_password(email: str):
-    logger.info(f"Generating OTP for password reset for email: {email}")
-    gen_otp(email)
-    logger.info(f"OTP generated for email: {email}")
+@user_router.post(
+    "/generate_otp_for_forget_password", dependencies=[Depends(rate_limit(OTP))]
+)
+def generate_otp_for_forget_password(email: str, db: Session = Depends(get_db)):
+    logger.info("Generating OTP for password reset for email: {}", email)
+    gen_otp(db, email, RESET_PASSWORD)
+    logger.info("OTP generated for email: {}", email)
     return "OTP sent successfully"
 
 
@@ -261,8 +289,10 @@ def generate_otp_for_forget_password(email: str):
 
 
 @user_router.patch("/forget_password")
-def forget_password(email: str, otp: str, user: ForgetPasswordSchema):
-    logger.info(f"Processing password reset for email: {email}")
+def forget_password(
+    email: str, otp: str, user: ForgetPasswordSchema, db: Session = Depends(get_db)
+):
+    logger.info("Processing password reset for email: {}", email)
     find_user = (
         db.query(User)
         .filter(
@@ -275,28 +305,26 @@ def forget_password(email: str, otp: str, user: ForgetPasswordSchema):
     )
 
     if not find_user:
-        logger.error(f"User not found for password reset: {email}")
+        logger.error("User not found for password reset: {}", email)
         raise HTTPException(status_code=404, detail="User not found")
 
-    find_otp = db.query(OTP).filter(OTP.email == email, OTP.otp == otp).first()
-
-    if not find_otp:
-        logger.error(f"OTP not found for password reset: {email}")
-        raise HTTPException(status_code=400, detail="OTP not found")
-
-    if user.new_password == user.confirm_password:
-        setattr(find_user, "password", pwd_context.hash(user.confirm_password))
-    else:
+    # Checked before the OTP so a typo in the confirmation doesn't burn it
+    if user.new_password != user.confirm_password:
         logger.error("Password confirmation does not match new password")
         raise HTTPException(
             status_code=400, detail="Password confirmation does not match new password"
         )
 
-    db.delete(find_otp)
+    if not otp_store.verify(RESET_PASSWORD, email, otp):
+        logger.error("OTP not found for password reset: {}", email)
+        raise HTTPException(status_code=400, detail="OTP not found")
+
+    setattr(find_user, "password", hash_password(user.confirm_password))
     db.commit()
     db.refresh(find_user)
+    token_cache.invalidate_user(find_user.id)
 
-    logger.info(f"Password changed successfully for email: {email}")
+    logger.info("Password changed successfully for email: {}", email)
     return "Password changed successfully"
 
 
@@ -304,30 +332,18 @@ def forget_password(email: str, otp: str, user: ForgetPasswordSchema):
 
 
 @user_router.patch("/reset_password")
-def reset_password(token: str, user: ResetPasswordSchema):
-    logger.info(f"Resetting password for user: {user.email}")
-    user_details = decode_token(token)
-    user_id, name, email, phone_no = user_details
-
-    find_user = (
-        db.query(User)
-        .filter(
-            User.email == email,
-            User.is_active == True,
-            User.is_verified == True,
-            User.is_deleted == False,
-        )
-        .first()
-    )
-
-    if not find_user:
-        logger.error(f"User not found for password reset: {email}")
-        raise HTTPException(status_code=404, detail="User not found")
+def reset_password(
+    user: ResetPasswordSchema,
+    current: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    logger.info("Resetting password for user: {}", current.email)
+    find_user = current.user
 
     pass_checker(user.old_password, find_user.password)
 
     if user.new_password == user.confirm_password:
-        setattr(find_user, "password", pwd_context.hash(user.confirm_password))
+        setattr(find_user, "password", hash_password(user.confirm_password))
     else:
         logger.error("Password confirmation does not match new password")
         raise HTTPException(
@@ -336,6 +352,15 @@ def reset_password(token: str, user: ResetPasswordSchema):
 
     db.commit()
     db.refresh(find_user)
+    token_cache.invalidate_user(find_user.id)
 
-    logger.info(f"Password reset successfully for user: {email}")
+    logger.info("Password reset successfully for user: {}", current.email)
     return "Password reset successfully"
+
+
+# -------------------- ~ AUTH CACHE STATS ~ --------------------#
+
+
+@user_router.get("/auth_cache_stats", dependencies=[Depends(get_current_user)])
+def auth_cache_stats():
+    return token_cache.stats()
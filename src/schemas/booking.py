@@ -2,6 +2,7 @@ from pydantic import BaseModel, EmailStr
 from typing import Optional
 from datetime import datetime, date
 from sqlalchemy import Date
+from src.schemas.car_details import Capacity, NumericStr
 
 
 class Date_Capacity_Response_Schema(BaseModel):
@@ -12,25 +13,27 @@ class Date_Capacity_Response_Schema(BaseModel):
     phone_no: str
     start_date: date
     end_date: date
-    car_capacity: str
+    car_capacity: NumericStr
 
 
 class Date_Capacity_Selection_Schema(BaseModel):
     start_date: date
     end_date: date
-    car_capacity: str
+    car_capacity: Capacity
 
 
 class Available_Car_Schema(BaseModel):
+    id: str
     car_name: str
-    car_capacity: str
-    car_rent: str
-    car_picture: str
+    car_capacity: NumericStr
+    car_rent: NumericStr
+    car_picture: Optional[str] = None
     car_detail: str
 
 
 class Select_Car_Schema(BaseModel):
-    car_name: str
+    car_id: Optional[str] = None
+    car_name: Optional[str] = None
     # car_capacity: str
     # start_date: date
     # end_date: date
@@ -38,7 +41,8 @@ class Select_Car_Schema(BaseModel):
 
 
 class Select_Car_Booked_Schema(BaseModel):
+    id: str
     car_name: str
-    car_capacity: str
+    car_capacity: NumericStr
     # car_detail: str
-    car_rent: str
+    car_rent: NumericStr
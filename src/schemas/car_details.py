@@ -1,22 +1,58 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, BeforeValidator, Field
+from typing import Annotated, Optional
+from datetime import datetime
+from decimal import Decimal
+
+
+# Rent and capacity are numeric columns. Requests may send them as numbers or
+# numeric strings; responses keep sending them as strings.
+def as_string(value):
+    if isinstance(value, Decimal):
+        return format(value.normalize(), "f")
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+Money = Annotated[Decimal, Field(ge=0, max_digits=10, decimal_places=2)]
+Capacity = Annotated[int, Field(gt=0)]
+NumericStr = Annotated[str, BeforeValidator(as_string)]
 
 
 class CarListingSchema(BaseModel):
     car_name: str
     car_rc: str
-    car_rent: str
-    car_capacity: str
+    car_rent: Money
+    car_capacity: Capacity
     car_detail: str
 
 
 class CarDataUpdateSchema(BaseModel):
-    car_rent: Optional[str] = None
+    car_rent: Optional[Money] = None
 
 
 class GetAllCarSchema(BaseModel):
     id: str
     car_name: str
     car_rc: str
-    car_rent: str
-    car_capacity: str
+    car_rent: NumericStr
+    car_capacity: NumericStr
+
+
+class CarPageSchema(BaseModel):
+    items: list[GetAllCarSchema]
+    next_cursor: Optional[str] = None
+
+
+class CarSchema(BaseModel):
+    id: str
+    car_name: str
+    car_rc: str
+    car_picture: Optional[str] = None
+    car_capacity: Optional[NumericStr] = None
+    car_detail: Optional[str] = None
+    car_rent: NumericStr
+    is_booked: bool
+    is_created: datetime
+    is_updated: datetime
+    is_deleted: bool
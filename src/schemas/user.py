@@ -1,4 +1,5 @@
 from pydantic import BaseModel, EmailStr
+from datetime import datetime
 from typing import Optional
 
 
@@ -9,11 +10,29 @@ class RegisterUserSchema(BaseModel):
     password: str
 
 
+# Also the column list of the user listings, so the password hash is never read
 class GetAllUserSchema(BaseModel):
     id: str
     name: str
     email: str
-    password: str
+
+
+# A user as returned by write endpoints; never includes the password hash
+class UserSchema(BaseModel):
+    id: str
+    name: str
+    email: str
+    phone_no: str
+    is_active: bool
+    is_verified: bool
+    is_deleted: bool
+    created_at: datetime
+    modified_at: datetime
+
+
+class UserPageSchema(BaseModel):
+    items: list[GetAllUserSchema]
+    next_cursor: Optional[str] = None
 
 
 class UpdateUserSchema(BaseModel):
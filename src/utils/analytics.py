@@ -0,0 +1,334 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import Date, Integer, and_, case, cast, func, select
+from config import ANALYTICS_CACHE_TTL, ANALYTICS_MAX_DAYS
+from src.models.booking import expired_booking
+from src.models.car_details import Car
+from src.utils.archive import LIVE_AND_ARCHIVED, history
+from logs.log_config import logger
+
+
+# ----------------------------------------------------------------------------------------------------
+# Per-period result cache
+# Reports are keyed by their name and parameters; entries live for
+# ANALYTICS_CACHE_TTL seconds and the oldest are dropped beyond max_size.
+class ResultCache:
+    def __init__(self, ttl: float = ANALYTICS_CACHE_TTL, max_size: int = 256):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = compute()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+report_cache = ResultCache()
+
+
+# ----------------------------------------------------------------------------------------------------
+# Date ranges and bucketing
+def report_range(start_date: date = None, end_date: date = None):
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=29)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date is after end_date")
+    if (end_date - start_date).days >= ANALYTICS_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Report range is limited to {ANALYTICS_MAX_DAYS} days",
+        )
+    return start_date, end_date
+
+
+def bucket(db, column, period: str):
+    if db.get_bind().dialect.name == "sqlite":
+        if period == "day":
+            return func.date(column)
+        if period == "week":
+            # Monday of the column's week
+            return func.date(column, "-6 days", "weekday 1")
+        return func.strftime("%Y-%m-01", column)
+    return cast(func.date_trunc(period, column), Date)
+
+
+# Timestamps in [start_date, end_date], whole days
+def in_range(column, start_date: date, end_date: date):
+    return column.between(
+        datetime.combine(start_date, datetime.min.time()),
+        datetime.combine(end_date, datetime.max.time()),
+    )
+
+
+def as_day(value):
+    return value if isinstance(value, (str, type(None))) else value.isoformat()
+
+
+def ratio(part, whole):
+    return round(part / whole, 4) if whole else 0.0
+
+
+# ----------------------------------------------------------------------------------------------------
+# Reports read live and archived bookings alike, through archive.history
+# Revenue: confirmed, not cancelled bookings by the day they were confirmed
+def revenue_report(db, start_date: date, end_date: date, period: str):
+    bookings = history(
+        ("booked_at", "bill_amount"),
+        lambda table: (
+            in_range(table.c.booked_at, start_date, end_date),
+            table.c.is_cancelled == False,
+        ),
+    )
+    period_col = bucket(db, bookings.c.booked_at, period).label("period")
+    rows = db.execute(
+        select(
+            period_col,
+            func.count().label("bookings"),
+            func.coalesce(func.sum(bookings.c.bill_amount), 0).label("revenue"),
+        )
+        .group_by(period_col)
+        .order_by(period_col)
+    ).all()
+    return [
+        {"period": as_day(row.period), "bookings": row.bookings, "revenue": row.revenue}
+        for row in rows
+    ]
+
+
+# Cancellations among bookings confirmed in each period
+def cancellation_report(db, start_date: date, end_date: date, period: str):
+    bookings = history(
+        ("booked_at", "is_cancelled"),
+        lambda table: (in_range(table.c.booked_at, start_date, end_date),),
+    )
+    period_col = bucket(db, bookings.c.booked_at, period).label("period")
+    rows = db.execute(
+        select(
+            period_col,
+            func.count().label("confirmed"),
+            func.sum(case((bookings.c.is_cancelled == True, 1), else_=0)).label(
+                "cancelled"
+            ),
+        )
+        .group_by(period_col)
+        .order_by(period_col)
+    ).all()
+    return [
+        {
+            "period": as_day(row.period),
+            "confirmed": row.confirmed,
+            "cancelled": row.cancelled,
+            "cancellation_rate": ratio(row.cancelled, row.confirmed),
+        }
+        for row in rows
+    ]
+
+
+# Funnel steps reached by the bookings started in each period. Holds the
+# reaper moved to booking_expired still count as started and abandoned.
+FUNNEL_COLUMNS = ("created_at", "car_id", "bill_amount", "booked_at", "in_process")
+
+
+def funnel_report(db, start_date: date, end_date: date, period: str):
+    bookings = history(
+        FUNNEL_COLUMNS,
+        lambda table: (in_range(table.c.created_at, start_date, end_date),),
+        tables=LIVE_AND_ARCHIVED + (expired_booking,),
+    )
+    period_col = bucket(db, bookings.c.created_at, period).label("period")
+    rows = db.execute(
+        select(
+            period_col,
+            func.count().label("started"),
+            func.count(bookings.c.car_id).label("car_selected"),
+            func.count(bookings.c.bill_amount).label("billed"),
+            func.count(bookings.c.booked_at).label("confirmed"),
+            func.sum(
+                case(
+                    (
+                        and_(
+                            bookings.c.in_process == True,
+                            bookings.c.booked_at.is_(None),
+                        ),
+                        1,
+                    ),
+                    else_=0,
+                )
+            ).label("abandoned"),
+        )
+        .group_by(period_col)
+        .order_by(period_col)
+    ).all()
+    return [
+        {
+            "period": as_day(row.period),
+            "started": row.started,
+            "car_selected": row.car_selected,
+            "billed": row.billed,
+            "confirmed": row.confirmed,
+            "abandoned": row.abandoned or 0,
+            "conversion_rate": ratio(row.confirmed, row.started),
+            "drop_off": {
+                "select_car": ratio(row.started - row.car_selected, row.started),
+                "payment_otp": ratio(row.car_selected - row.billed, row.car_selected),
+                "verify_payment": ratio(row.billed - row.confirmed, row.billed),
+            },
+        }
+        for row in rows
+    ]
+
+
+# ----------------------------------------------------------------------------------------------------
+# Utilization: booked car-days over available car-days in the range.
+# Active bookings (live or archived) overlapping the range are streamed as (car, first day, last
+# day) with the day offsets computed in SQL, then spread over a cars x days
+# matrix in one vectorized pass.
+def day_offset(db, column, origin: date):
+    if db.get_bind().dialect.name == "sqlite":
+        return cast(
+            func.julianday(column) - func.julianday(origin.isoformat()), Integer
+        )
+    return column - origin
+
+
+def booked_matrix(db, car_ids, start_date: date, end_date: date):
+    days = (end_date - start_date).days + 1
+    rows = {car_id: i for i, car_id in enumerate(car_ids)}
+    bookings = history(
+        ("car_id", "start_date", "end_date"),
+        lambda table: (
+            table.c.is_booked == True,
+            table.c.is_cancelled == False,
+            table.c.start_date <= end_date,
+            table.c.end_date >= start_date,
+        ),
+    )
+    # Core rows: no ORM row processing per booking
+    result = db.connection().execute(
+        select(
+            bookings.c.car_id,
+            day_offset(db, bookings.c.start_date, start_date),
+            day_offset(db, bookings.c.end_date, start_date),
+        )
+    )
+    car_column, start_column, end_column = list(zip(*result)) or ((), (), ())
+
+    car_rows = np.fromiter(
+        (rows.get(car_id, -1) for car_id in car_column),
+        dtype=np.int64,
+        count=len(car_column),
+    )
+    known = car_rows >= 0
+    starts = np.maximum(np.array(start_column, dtype=np.int64), 0)[known]
+    ends = np.minimum(np.array(end_column, dtype=np.int64), days - 1)[known]
+    diff = np.zeros((len(car_ids), days + 1), dtype=np.int32)
+    np.add.at(diff, (car_rows[known], starts), 1)
+    np.add.at(diff, (car_rows[known], ends + 1), -1)
+    return np.cumsum(diff[:, :days], axis=1) > 0
+
+
+def utilization_report(db, start_date: date, end_date: date, group_by: str):
+    cars = db.execute(
+        select(Car.id, Car.car_name, Car.car_capacity)
+        .where(Car.is_deleted == False)
+        .order_by(Car.id)
+    ).all()
+    if not cars:
+        return []
+    booked = booked_matrix(db, [car.id for car in cars], start_date, end_date)
+    days = booked.shape[1]
+
+    if group_by == "car":
+        booked_days = booked.sum(axis=1)
+        return [
+            {
+                "car_id": car.id,
+                "car_name": car.car_name,
+                "car_capacity": car.car_capacity,
+                "booked_days": int(booked_days[i]),
+                "utilization": ratio(int(booked_days[i]), days),
+            }
+            for i, car in enumerate(cars)
+        ]
+
+    if group_by == "capacity":
+        capacities = np.array([car.car_capacity or 0 for car in cars])
+        report = []
+        for capacity in np.unique(capacities):
+            in_class = capacities == capacity
+            booked_days = int(booked[in_class].sum())
+            report.append(
+                {
+                    "car_capacity": int(capacity),
+                    "cars": int(in_class.sum()),
+                    "booked_days": booked_days,
+                    "utilization": ratio(booked_days, int(in_class.sum()) * days),
+                }
+            )
+        return report
+
+    booked_cars = booked.sum(axis=0)
+    return [
+        {
+            "date": start_date + timedelta(days=i),
+            "booked_cars": int(count),
+            "utilization": ratio(int(count), len(cars)),
+        }
+        for i, count in enumerate(booked_cars)
+    ]
+
+
+# ----------------------------------------------------------------------------------------------------
+# Entry point for the router: validated range, cached result
+REPORTS = {
+    "revenue": revenue_report,
+    "cancellations": cancellation_report,
+    "funnel": funnel_report,
+    "utilization": utilization_report,
+}
+
+
+def run_report(db, name: str, start_date: date, end_date: date, option: str):
+    start_date, end_date = report_range(start_date, end_date)
+
+    def compute():
+        started = time.perf_counter()
+        rows = REPORTS[name](db, start_date, end_date, option)
+        logger.info(
+            "Analytics {} {} - {} by {}: {} rows in {:.3f}s",
+            name,
+            start_date,
+            end_date,
+            option,
+            len(rows),
+            time.perf_counter() - started,
+        )
+        return {
+            "report": name,
+            "start_date": start_date,
+            "end_date": end_date,
+            "by": option,
+            "rows": rows,
+        }
+
+    return report_cache.get_or_compute((name, start_date, end_date, option), compute)
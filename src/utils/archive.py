@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+from sqlalchemy import literal, or_, select, text, union_all
+from config import (
+    BOOKING_ARCHIVE_AFTER_DAYS,
+    BOOKING_ARCHIVE_INTERVAL,
+    BOOKING_ARCHIVE_BATCH,
+    BOOKING_ARCHIVE_MAX_BATCHES,
+)
+from src.models.booking import Booking, archived_booking
+from src.utils.availability import availability_index
+from src.utils.occupancy import occupancy_calendar
+from src.utils.reaper import BOOKING_COLUMNS, BookingJob, move_bookings
+from logs.log_config import logger
+
+
+# ----------------------------------------------------------------------------------------------------
+# Monthly partitions
+# On PostgreSQL booking_archive is partitioned by start_date month. Before a
+# batch is copied, the partitions for the months it touches are created if
+# missing, in the batch's transaction. If two workers race to create the same
+# one, the loser's batch rolls back and is picked up again on its next run.
+# SQLite has no partitioning; there the archive is a single table whose
+# start_date index gives the same month-range reads.
+def partition_name(month: date):
+    return f"booking_archive_{month:%Y_%m}"
+
+
+def ensure_partitions(db, picked_rows):
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for month in sorted({row.start_date.replace(day=1) for row in picked_rows}):
+        name = partition_name(month)
+        if db.execute(text(f"SELECT to_regclass('{name}')")).scalar():
+            continue
+        next_month = (month + timedelta(days=32)).replace(day=1)
+        db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF booking_archive "
+                f"FOR VALUES FROM ('{month}') TO ('{next_month}')"
+            )
+        )
+        logger.info("Created archive partition {}", name)
+
+
+# ----------------------------------------------------------------------------------------------------
+# Archiving: confirmed or cancelled bookings that ended before the cutoff
+def finished_bookings(cutoff: date):
+    return (
+        Booking.in_process == False,
+        or_(Booking.is_booked == True, Booking.is_cancelled == True),
+        Booking.end_date < cutoff,
+    )
+
+
+def archive_finished_bookings(
+    db,
+    after_days: int = BOOKING_ARCHIVE_AFTER_DAYS,
+    batch_size: int = BOOKING_ARCHIVE_BATCH,
+    max_batches: int = BOOKING_ARCHIVE_MAX_BATCHES,
+):
+    cutoff = date.today() - timedelta(days=after_days)
+    archived = 0
+    for _ in range(max_batches):
+        moved = move_bookings(
+            db,
+            archived_booking,
+            "archived_at",
+            finished_bookings(cutoff),
+            Booking.end_date,
+            batch_size,
+            prepare=ensure_partitions,
+        )
+        # Ended bookings no longer block anything; drop them from this
+        # process's indexes too
+        for booking_id in moved:
+            availability_index.remove_booking(booking_id)
+            occupancy_calendar.remove_booking(booking_id)
+        archived += len(moved)
+        if len(moved) < batch_size:
+            break
+    return archived
+
+
+booking_archiver = BookingJob(
+    "booking-archiver", archive_finished_bookings, BOOKING_ARCHIVE_INTERVAL
+)
+booking_archiver.register_gauges("booking_archiver_archived")
+
+
+# ----------------------------------------------------------------------------------------------------
+# Reads over live and archived bookings
+# `where(table)` returns the filters for one table; they are applied inside
+# each branch of the UNION ALL so every branch can use its own indexes (and,
+# for a start_date filter, partition pruning).
+LIVE_AND_ARCHIVED = (Booking.__table__, archived_booking)
+
+
+def history(columns, where=lambda table: (), tables=LIVE_AND_ARCHIVED):
+    return union_all(
+        *(
+            select(*(table.c[name] for name in columns)).where(*where(table))
+            for table in tables
+        )
+    ).subquery("booking_history")
+
+
+# Always scoped to one user's email; booking_id narrows it to one booking
+def booking_history(db, email: str, booking_id: str = None, limit: int = 50):
+    def where(table):
+        clauses = [table.c.email == email]
+        if booking_id:
+            clauses.append(table.c.booking_id == booking_id)
+        return clauses
+
+    bookings = union_all(
+        *(
+            select(
+                *(table.c[name] for name in BOOKING_COLUMNS),
+                literal(table is archived_booking).label("archived"),
+            ).where(*where(table))
+            for table in LIVE_AND_ARCHIVED
+        )
+    ).subquery()
+    rows = db.execute(
+        select(bookings)
+        .order_by(bookings.c.start_date.desc(), bookings.c.booking_id)
+        .limit(limit)
+    ).mappings()
+    return [dict(row) for row in rows]
@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import OrderedDict
+import jwt
+from fastapi import Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.session import make_transient_to_detached
+from config import (
+    SECRET_KEY,
+    ALGORITHM,
+    AUTH_CACHE_SIZE,
+    AUTH_CACHE_TTL,
+    AUTH_USER_TTL,
+)
+from database.database import get_db
+from src.models.user import User
+from logs.log_config import logger
+
+USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+
+# ----------------------------------------------------------------------------------------------------
+# Verified-token cache
+# Maps a token to its decoded claims and a snapshot of the active user row.
+# Entries live until the token's exp (capped at AUTH_CACHE_TTL) and are dropped
+# as soon as the user is deleted or changes password in this process. Other
+# processes can't reach this cache, so the snapshot is only trusted for
+# AUTH_USER_TTL seconds; after that the row is read again while the decoded
+# claims stay cached.
+class TokenCache:
+    def __init__(
+        self,
+        max_size: int = AUTH_CACHE_SIZE,
+        ttl: float = AUTH_CACHE_TTL,
+        user_ttl: float = AUTH_USER_TTL,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.user_ttl = user_ttl
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.time():
+                self._drop(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry
+
+    def put(self, token: str, exp: float, claims: tuple, user: dict = None):
+        now = time.time()
+        expires_at = min(exp, now + self.ttl)
+        with self._lock:
+            if token in self._entries:
+                self._drop(token)
+            self._entries[token] = (expires_at, claims, user, now)
+            self._by_user.setdefault(claims[0], set()).add(token)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str):
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._drop(token)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def user_is_fresh(self, entry):
+        return entry[2] is not None and time.time() - entry[3] < self.user_ttl
+
+    def _drop(self, token: str):
+        expires_at, claims, user, checked_at = self._entries.pop(token)
+        tokens = self._by_user.get(claims[0])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[claims[0]]
+
+
+token_cache = TokenCache()
+
+
+# ----------------------------------------------------------------------------------------------------
+# Token decoding
+def _decode(token: str):
+    logger.info("Decoding token.")
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        logger.error("Token has expired.")
+        raise HTTPException(status_code=401, detail="Token has expired.")
+    except jwt.InvalidTokenError as e:
+        logger.error("Invalid token: {}", e)
+        raise HTTPException(status_code=403, detail="Invalid token.")
+
+    id = payload.get("id")
+    name = payload.get("name")
+    email = payload.get("email")
+    phone_no = payload.get("phone_no")
+    exp = payload.get("exp")
+
+    if not id or not name or not email or not phone_no or not exp:
+        logger.error("Token is invalid: Missing required fields.")
+        raise HTTPException(status_code=403, detail="Invalid token.")
+    logger.info("Token decoded successfully for user ID: {}.", id)
+    return (id, name, email, phone_no), exp
+
+
+def decode_token(token: str):
+    entry = token_cache.get(token)
+    if entry is not None:
+        return entry[1]
+    claims, exp = _decode(token)
+    token_cache.put(token, exp, claims)
+    return claims
+
+
+# ----------------------------------------------------------------------------------------------------
+# Shared auth dependency: decoded claims plus the active user row
+class CurrentUser:
+    __slots__ = ("id", "name", "email", "phone_no", "user")
+
+    def __init__(self, claims: tuple, user: User):
+        self.id, self.name, self.email, self.phone_no = claims
+        self.user = user
+
+
+def get_current_user(token: str, db: Session = Depends(get_db)):
+    entry = token_cache.get(token)
+    if entry is not None and token_cache.user_is_fresh(entry):
+        expires_at, claims, snapshot, checked_at = entry
+        cached = User(**snapshot)
+        make_transient_to_detached(cached)
+        return CurrentUser(claims, db.merge(cached, load=False))
+
+    if entry is not None:
+        expires_at, claims, snapshot, checked_at = entry
+        exp = expires_at
+    else:
+        claims, exp = _decode(token)
+
+    find_user = (
+        db.query(User)
+        .filter(
+            User.email == claims[2],
+            User.is_active == True,
+            User.is_verified == True,
+            User.is_deleted == False,
+        )
+        .first()
+    )
+    if not find_user:
+        logger.error("User not found for token: {}", claims[2])
+        raise HTTPException(status_code=404, detail="User not found")
+
+    snapshot = {key: getattr(find_user, key) for key in USER_COLUMNS}
+    token_cache.put(token, exp, claims, snapshot)
+    return CurrentUser(claims, find_user)
@@ -0,0 +1,289 @@
+from bisect import bisect_right
+from datetime import date
+import threading
+import time
+from sqlalchemy import and_, or_, exists, select
+from config import AVAILABILITY_INDEX_ENABLED, AVAILABILITY_INDEX_TTL
+from src.models.booking import Booking
+from src.models.car_details import Car
+from src.utils.catalog import fleet_catalog
+from logs.log_config import logger
+
+
+# ----------------------------------------------------------------------------------------------------
+# Active (booked, not cancelled) bookings with the car they hold; legacy rows
+# without car_id are matched to their car by RC
+def active_bookings(db):
+    rows = (
+        db.query(
+            Booking.booking_id,
+            Booking.car_id,
+            Car.id,
+            Booking.start_date,
+            Booking.end_date,
+        )
+        .outerjoin(Car, and_(Booking.car_id.is_(None), Car.car_rc == Booking.car_rc))
+        .filter(Booking.is_booked == True, Booking.is_cancelled == False)
+        .yield_per(10000)
+    )
+    for booking_id, car_id, legacy_car_id, start_date, end_date in rows:
+        if car_id or legacy_car_id:
+            yield booking_id, car_id or legacy_car_id, start_date, end_date
+
+
+# ----------------------------------------------------------------------------------------------------
+# Per-car interval list
+# Intervals are kept sorted by start date together with a running maximum of
+# the end dates, so "does anything overlap [start, end]" is one bisect.
+class CarIntervals:
+    __slots__ = ("starts", "spans", "max_end")
+
+    def __init__(self):
+        self.starts = []
+        self.spans = []
+        self.max_end = []
+
+    @classmethod
+    def from_spans(cls, spans):
+        intervals = cls()
+        intervals.spans = sorted(spans)
+        intervals.starts = [span[0] for span in intervals.spans]
+        intervals.max_end = [span[1] for span in intervals.spans]
+        intervals._rebuild_from(0)
+        return intervals
+
+    def add(self, booking_id: str, start_date: date, end_date: date):
+        i = bisect_right(self.starts, start_date)
+        self.starts.insert(i, start_date)
+        self.spans.insert(i, (start_date, end_date, booking_id))
+        self.max_end.insert(i, end_date)
+        self._rebuild_from(i)
+
+    def remove(self, booking_id: str, start_date: date):
+        i = bisect_right(self.starts, start_date) - 1
+        while i >= 0 and self.starts[i] == start_date:
+            if self.spans[i][2] == booking_id:
+                del self.starts[i], self.spans[i], self.max_end[i]
+                self._rebuild_from(i)
+                return True
+            i -= 1
+        return False
+
+    def overlaps(self, start_date: date, end_date: date):
+        i = bisect_right(self.starts, end_date)
+        return i > 0 and self.max_end[i - 1] >= start_date
+
+    def _rebuild_from(self, i: int):
+        running = self.max_end[i - 1] if i > 0 else None
+        for j in range(i, len(self.spans)):
+            end_date = self.spans[j][1]
+            running = end_date if running is None or end_date > running else running
+            self.max_end[j] = running
+
+    def __len__(self):
+        return len(self.spans)
+
+
+# ----------------------------------------------------------------------------------------------------
+# Availability index over all active (booked, not cancelled) bookings
+# Bookings made in this process are applied as they commit; the whole index is
+# rebuilt after AVAILABILITY_INDEX_TTL to pick up other processes' bookings.
+# A stale answer can't double-book: reservations re-check the booking table.
+class AvailabilityIndex:
+    def __init__(self, ttl: float = AVAILABILITY_INDEX_TTL):
+        self.ttl = ttl
+        self._cars = {}
+        self._bookings = {}
+        self._pending = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.loaded = False
+        self.loaded_at = 0.0
+
+    def load(self, db):
+        logger.info("Loading availability index from active bookings.")
+        with self._lock:
+            self._pending = []
+        try:
+            spans = {}
+            bookings = {}
+            for booking_id, car_id, start_date, end_date in active_bookings(db):
+                if booking_id in bookings:
+                    continue
+                spans.setdefault(car_id, []).append((start_date, end_date, booking_id))
+                bookings[booking_id] = (car_id, start_date)
+            cars = {car_id: CarIntervals.from_spans(s) for car_id, s in spans.items()}
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self._cars = cars
+            self._bookings = bookings
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+            pending, self._pending = self._pending, None
+            for op, args in pending:
+                op(*args)
+        logger.info("Availability index loaded with {} active bookings.", len(bookings))
+
+    def _expired(self):
+        return self.ttl > 0 and time.monotonic() - self.loaded_at > self.ttl
+
+    def stale(self):
+        return not self.loaded or self._expired()
+
+    def ensure_loaded(self, db):
+        if not self.loaded:
+            with self._load_lock:
+                if not self.loaded:
+                    self.load(db)
+        elif self._expired() and self._load_lock.acquire(blocking=False):
+            # One request rebuilds; the others keep reading the current index
+            try:
+                if self._expired():
+                    self.load(db)
+            finally:
+                self._load_lock.release()
+
+    # Changes that land while a load is in flight are replayed once it finishes
+    def add_booking(
+        self, booking_id: str, car_id: str, start_date: date, end_date: date
+    ):
+        if not car_id:
+            return
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(
+                    (self._add, (booking_id, car_id, start_date, end_date))
+                )
+            elif self.loaded:
+                self._add(booking_id, car_id, start_date, end_date)
+
+    def remove_booking(self, booking_id: str):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((self._remove, (booking_id,)))
+            elif self.loaded:
+                self._remove(booking_id)
+
+    def _add(self, booking_id, car_id, start_date, end_date):
+        if booking_id in self._bookings:
+            return
+        self._cars.setdefault(car_id, CarIntervals()).add(
+            booking_id, start_date, end_date
+        )
+        self._bookings[booking_id] = (car_id, start_date)
+
+    def _remove(self, booking_id):
+        entry = self._bookings.pop(booking_id, None)
+        if entry is None:
+            return
+        car_id, start_date = entry
+        intervals = self._cars.get(car_id)
+        if intervals is not None:
+            intervals.remove(booking_id, start_date)
+            if not intervals:
+                del self._cars[car_id]
+
+    def is_free(self, car_id: str, start_date: date, end_date: date):
+        intervals = self._cars.get(car_id)
+        return intervals is None or not intervals.overlaps(start_date, end_date)
+
+    def free_car_ids(self, car_ids, start_date: date, end_date: date):
+        with self._lock:
+            return [
+                car_id
+                for car_id in car_ids
+                if self.is_free(car_id, start_date, end_date)
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._cars = {}
+            self._bookings = {}
+            self.loaded = False
+
+
+availability_index = AvailabilityIndex()
+
+
+# ----------------------------------------------------------------------------------------------------
+# SQL fallback, used when the in-process index is disabled or failed to load
+def overlapping_booking_exists(start_date: date, end_date: date):
+    return exists().where(
+        or_(
+            Booking.car_id == Car.id,
+            and_(Booking.car_id.is_(None), Booking.car_rc == Car.car_rc),
+        ),
+        Booking.is_booked == True,
+        Booking.is_cancelled == False,
+        Booking.start_date <= end_date,
+        Booking.end_date >= start_date,
+    )
+
+
+def free_cars(db, cars, start_date: date, end_date: date):
+    if not cars:
+        return []
+
+    if AVAILABILITY_INDEX_ENABLED:
+        try:
+            availability_index.ensure_loaded(db)
+            free_ids = set(
+                availability_index.free_car_ids(
+                    [car.id for car in cars], start_date, end_date
+                )
+            )
+            return [car for car in cars if car.id in free_ids]
+        except Exception as e:
+            logger.error("Availability index unavailable, falling back to SQL: {}", e)
+
+    free_ids = set(
+        db.execute(
+            select(Car.id).filter(
+                Car.id.in_([car.id for car in cars]),
+                ~overlapping_booking_exists(start_date, end_date),
+            )
+        ).scalars()
+    )
+    return [car for car in cars if car.id in free_ids]
+
+
+# Candidate cars come from the fleet catalog; only availability is checked
+def find_available_cars(db, car_capacity, start_date: date, end_date: date):
+    return free_cars(
+        db, fleet_catalog.with_capacity(db, car_capacity), start_date, end_date
+    )
+
+
+async def find_available_cars_async(db, car_capacity, start_date: date, end_date: date):
+    result = await db.execute(
+        select(Car).filter(Car.car_capacity == car_capacity, Car.is_deleted == False)
+    )
+    cars = result.scalars().all()
+    if not cars:
+        return cars
+
+    if AVAILABILITY_INDEX_ENABLED:
+        try:
+            if availability_index.stale():
+                await db.run_sync(availability_index.ensure_loaded)
+            free_ids = set(
+                availability_index.free_car_ids(
+                    [car.id for car in cars], start_date, end_date
+                )
+            )
+            return [car for car in cars if car.id in free_ids]
+        except Exception as e:
+            logger.error("Availability index unavailable, falling back to SQL: {}", e)
+
+    result = await db.execute(
+        select(Car).filter(
+            Car.car_capacity == car_capacity,
+            Car.is_deleted == False,
+            ~overlapping_booking_exists(start_date, end_date),
+        )
+    )
+    return result.scalars().all()
@@ -0,0 +1,196 @@
+import codecs
+import csv
+import json
+import uuid
+from datetime import datetime
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from config import CAR_IMPORT_CHUNK_ROWS, CAR_IMPORT_MAX_ERRORS
+from src.models.car_details import Car
+from src.schemas.car_details import CarListingSchema
+from src.utils.catalog import CarEntry, fleet_catalog
+from logs.log_config import logger
+
+MAX_LINE_CHARS = 1024 * 1024
+CSV_TYPES = ("text/csv", "application/csv")
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/json")
+
+
+# ----------------------------------------------------------------------------------------------------
+# Body -> records
+# Lines are cut from the body as it arrives. A CSV record continues onto the
+# next line while it has an odd number of quotes (a newline inside a quoted
+# field), so only the current record is ever held besides the open chunk.
+async def body_lines(request: Request):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in request.stream():
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        if len(pending) > MAX_LINE_CHARS:
+            raise HTTPException(status_code=413, detail="Import line is too long")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def csv_records(lines):
+    header = None
+    record = ""
+    async for line in lines:
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            if len(record) > MAX_LINE_CHARS:
+                raise HTTPException(status_code=413, detail="Import line is too long")
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield None, f"expected {len(header)} fields, got {len(values)}"
+        else:
+            yield dict(zip(header, values)), None
+    if record:
+        yield None, "unterminated quoted field"
+
+
+async def ndjson_records(lines):
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield None, f"invalid JSON: {e}"
+            continue
+        if isinstance(record, dict):
+            yield record, None
+        else:
+            yield None, "expected a JSON object"
+
+
+def import_records(request: Request):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in CSV_TYPES:
+        return csv_records(body_lines(request))
+    if content_type in NDJSON_TYPES:
+        return ndjson_records(body_lines(request))
+    raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson")
+
+
+# ----------------------------------------------------------------------------------------------------
+# Import report
+# Counts cover every row; the error list is capped so the report stays small.
+class ImportReport:
+    def __init__(self, max_errors: int = CAR_IMPORT_MAX_ERRORS):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, row: int, car_rc, reason):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "car_rc": car_rc, "errors": reason})
+
+    def duplicate(self, row: int, car_rc: str):
+        self.duplicates += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(
+                {"row": row, "car_rc": car_rc, "errors": ["car_rc already exists"]}
+            )
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.failed + self.duplicates > len(self.errors),
+        }
+
+
+def validation_messages(error: ValidationError):
+    return [
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}"
+        for e in error.errors()
+    ]
+
+
+# ----------------------------------------------------------------------------------------------------
+# One chunk = one RC lookup, one executemany insert and one commit
+def insert_chunk(db, chunk, report: ImportReport):
+    rcs = {car.car_rc for _, car in chunk}
+    existing = set(db.execute(select(Car.car_rc).where(Car.car_rc.in_(rcs))).scalars())
+
+    now = datetime.now()
+    rows = []
+    for row, car in chunk:
+        if car.car_rc in existing:
+            report.duplicate(row, car.car_rc)
+            continue
+        # Later rows of the same file with this RC are duplicates too
+        existing.add(car.car_rc)
+        rows.append(
+            dict(
+                id=str(uuid.uuid4()),
+                car_name=car.car_name,
+                car_rc=car.car_rc,
+                car_picture=None,
+                car_capacity=car.car_capacity,
+                date=None,
+                car_detail=car.car_detail,
+                car_rent=car.car_rent,
+                is_booked=False,
+                is_created=now,
+                is_updated=now,
+                is_deleted=False,
+            )
+        )
+
+    if rows:
+        db.execute(insert(Car), rows)
+        db.commit()
+        fleet_catalog.upsert_many(CarEntry(values) for values in rows)
+    report.imported += len(rows)
+
+
+async def import_cars(db, request: Request, chunk_rows: int = CAR_IMPORT_CHUNK_ROWS):
+    report = ImportReport()
+    chunk = []
+    async for record, problem in import_records(request):
+        report.rows += 1
+        if problem:
+            report.error(report.rows, None, [problem])
+            continue
+        try:
+            car = CarListingSchema.model_validate(record)
+        except ValidationError as e:
+            report.error(report.rows, record.get("car_rc"), validation_messages(e))
+            continue
+        chunk.append((report.rows, car))
+        if len(chunk) >= chunk_rows:
+            await run_in_threadpool(insert_chunk, db, chunk, report)
+            chunk = []
+    if chunk:
+        await run_in_threadpool(insert_chunk, db, chunk, report)
+
+    logger.info(
+        "Car import: {} rows, {} imported, {} duplicates, {} failed",
+        report.rows,
+        report.imported,
+        report.duplicates,
+        report.failed,
+    )
+    return report.as_dict()
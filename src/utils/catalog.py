@@ -0,0 +1,276 @@
+from bisect import bisect_left, bisect_right, insort
+import threading
+import time
+from sqlalchemy import select
+from config import CATALOG_TTL
+from src.models.car_details import Car
+from src.utils.pagination import decode_cursor, page_of
+from logs.log_config import logger
+
+CAR_COLUMNS = tuple(column.key for column in Car.__table__.columns)
+# Writes touching more cars than this drop the view instead of patching it
+VIEW_PATCH_LIMIT = 32
+
+
+# ----------------------------------------------------------------------------------------------------
+# Immutable snapshot of one car row. Entries are replaced, never mutated, so
+# readers can hold on to them without a lock.
+class CarEntry:
+    __slots__ = CAR_COLUMNS
+
+    def __init__(self, values: dict):
+        for key in CAR_COLUMNS:
+            object.__setattr__(self, key, values[key])
+
+    @classmethod
+    def from_car(cls, car):
+        return cls({key: getattr(car, key) for key in CAR_COLUMNS})
+
+    def __setattr__(self, key, value):
+        raise AttributeError("CarEntry is read-only")
+
+
+def sort_key(entry: CarEntry):
+    return (entry.is_created, entry.id)
+
+
+# Lookup tables over one set of entries. A view is never changed once built:
+# a patch makes a copy with the one entry moved, keeping every list in
+# (is_created, id) order by bisection instead of sorting the fleet again.
+class CatalogView:
+    def __init__(self, entries):
+        self.by_id = {entry.id: entry for entry in entries}
+        self.by_name = {}
+        self.by_rc = {}
+        self.by_capacity = {}
+        self.listed = []
+        for entry in sorted(entries, key=lambda e: (e.is_created, e.id)):
+            self.by_name.setdefault(entry.car_name, []).append(entry)
+            self.by_rc.setdefault(entry.car_rc, []).append(entry)
+            if not entry.is_deleted:
+                self.by_capacity.setdefault(entry.car_capacity, []).append(entry)
+                self.listed.append(entry)
+        self.listed_keys = [sort_key(entry) for entry in self.listed]
+
+    def replaced(self, old: CarEntry, new: CarEntry):
+        view = object.__new__(CatalogView)
+        view.by_id = {**self.by_id, new.id: new}
+        view.by_name = _moved(self.by_name, "car_name", old, new)
+        view.by_rc = _moved(self.by_rc, "car_rc", old, new)
+        view.by_capacity = _moved(
+            self.by_capacity, "car_capacity", old, new, listed_only=True
+        )
+        view.listed = list(self.listed)
+        view.listed_keys = list(self.listed_keys)
+        if old is not None and not old.is_deleted:
+            i = bisect_left(view.listed_keys, sort_key(old))
+            if i < len(view.listed) and view.listed[i].id == old.id:
+                del view.listed[i]
+                del view.listed_keys[i]
+        if not new.is_deleted:
+            i = bisect_left(view.listed_keys, sort_key(new))
+            view.listed.insert(i, new)
+            view.listed_keys.insert(i, sort_key(new))
+        return view
+
+
+def _moved(index: dict, field: str, old, new, listed_only: bool = False):
+    index = dict(index)
+    if old is not None and not (listed_only and old.is_deleted):
+        key = getattr(old, field)
+        group = [entry for entry in index.get(key, ()) if entry.id != old.id]
+        if group:
+            index[key] = group
+        else:
+            index.pop(key, None)
+    if not (listed_only and new.is_deleted):
+        key = getattr(new, field)
+        group = list(index.get(key, ()))
+        insort(group, new, key=sort_key)
+        index[key] = group
+    return index
+
+
+# ----------------------------------------------------------------------------------------------------
+# Read-through fleet catalog
+# Loaded from the car table on first use (and again after CATALOG_TTL, which
+# bounds staleness from writers in other processes). Write endpoints in this
+# process patch it right after they commit. The row's is_updated is the
+# entry's version: a patch older than the entry it would replace is dropped,
+# and patches landing while a load is in flight are replayed over its result.
+class FleetCatalog:
+    def __init__(self, ttl: float = CATALOG_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._view = None
+        self._pending = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.loaded = False
+        self.loaded_at = 0.0
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.patches = 0
+        self.stale_patches = 0
+
+    def load(self, db):
+        logger.info("Loading fleet catalog.")
+        with self._lock:
+            self._pending = []
+        try:
+            # Plain rows, so nothing is added to the caller's session
+            rows = db.execute(select(Car.__table__)).mappings()
+            entries = {row["id"]: CarEntry(row) for row in rows}
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self._entries = entries
+            self._view = None
+            pending, self._pending = self._pending, None
+            for entry in pending:
+                self._upsert(entry)
+            self.version += 1
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+            self.loads += 1
+        logger.info("Fleet catalog loaded with {} cars.", len(entries))
+
+    def _expired(self):
+        return self.ttl > 0 and time.monotonic() - self.loaded_at > self.ttl
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def view(self, db):
+        if not self.loaded:
+            with self._load_lock:
+                if not self.loaded:
+                    self._count(hit=False)
+                    self.load(db)
+        elif self._expired() and self._load_lock.acquire(blocking=False):
+            # One request reloads; the others keep reading the current view
+            try:
+                if self._expired():
+                    self._count(hit=False)
+                    self.load(db)
+            finally:
+                self._load_lock.release()
+        else:
+            self._count(hit=True)
+
+        view = self._view
+        if view is None:
+            with self._lock:
+                if self._view is None:
+                    self._view = CatalogView(list(self._entries.values()))
+                view = self._view
+        return view
+
+    # Called by write endpoints after commit, with the refreshed ORM row
+    def upsert(self, car):
+        self.upsert_many([CarEntry.from_car(car)])
+
+    def upsert_many(self, entries):
+        with self._lock:
+            # Each patch copies the view; past a few, one rebuild is cheaper
+            if len(entries) > VIEW_PATCH_LIMIT:
+                self._view = None
+            for entry in entries:
+                if self._pending is not None:
+                    self._pending.append(entry)
+                elif self.loaded:
+                    self._upsert(entry)
+
+    def _upsert(self, entry: CarEntry):
+        current = self._entries.get(entry.id)
+        if current is not None and current.is_updated > entry.is_updated:
+            self.stale_patches += 1
+            return
+        self._entries[entry.id] = entry
+        if self._view is not None:
+            self._view = self._view.replaced(current, entry)
+        self.version += 1
+        self.patches += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._view = None
+            self.loaded = False
+            self.version += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "loads": self.loads,
+                "patches": self.patches,
+                "stale_patches": self.stale_patches,
+            }
+
+    # ------------------------------------------------------------------------------------------------
+    # Lookups
+    def get(self, db, car_id: str):
+        return self.view(db).by_id.get(car_id)
+
+    def by_name(self, db, car_name: str):
+        return self.view(db).by_name.get(car_name, [])
+
+    def by_rc(self, db, car_rc: str):
+        return self.view(db).by_rc.get(car_rc, [])
+
+    def with_capacity(self, db, car_capacity):
+        try:
+            car_capacity = int(car_capacity)
+        except (TypeError, ValueError):
+            return []
+        return self.view(db).by_capacity.get(car_capacity, [])
+
+    # Same keyset pages as keyset_page over (is_created, id)
+    def page(
+        self,
+        db,
+        limit: int,
+        cursor: str = None,
+        car_name: str = None,
+        car_capacity: str = None,
+        is_booked: bool = None,
+    ):
+        view = self.view(db)
+        if car_capacity:
+            try:
+                car_capacity = int(car_capacity)
+            except ValueError:
+                return [], None
+        start = bisect_right(view.listed_keys, decode_cursor(cursor)) if cursor else 0
+
+        rows = []
+        for i in range(start, len(view.listed)):
+            entry = view.listed[i]
+            if car_name and entry.car_name != car_name:
+                continue
+            if car_capacity and entry.car_capacity != car_capacity:
+                continue
+            if is_booked is not None and entry.is_booked != is_booked:
+                continue
+            rows.append(entry)
+            if len(rows) > limit:
+                break
+        return page_of(rows, Car.is_created, Car.id, limit)
+
+
+fleet_catalog = FleetCatalog()
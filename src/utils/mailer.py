@@ -0,0 +1,256 @@
+import itertools
+import queue
+import smtplib
+import threading
+import time
+from collections import OrderedDict
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from config import (
+    SENDER_EMAIL,
+    EMAIL_PASSWORD,
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_STARTTLS,
+    SMTP_TIMEOUT,
+    SMTP_IDLE_TIMEOUT,
+    MAIL_TRANSPORT,
+    MAIL_WORKERS,
+    MAIL_BATCH_SIZE,
+    MAIL_MAX_RETRIES,
+    MAIL_RETRY_BACKOFF,
+)
+from logs.log_config import logger
+from src.utils.metrics import gauges, smtp_send
+
+
+# ----------------------------------------------------------------------------------------------------
+# Transports
+# A transport owns one connection and is only ever used by one worker thread.
+class SMTPTransport:
+    def __init__(self, host, port, username=None, password=None, starttls=True):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.server = None
+        self.last_used = 0.0
+
+    def open(self):
+        logger.info("Opening SMTP connection to {}:{}", self.host, self.port)
+        server = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        if self.starttls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        self.server = server
+        self.last_used = time.monotonic()
+
+    def send(self, msg):
+        if self.server is None:
+            self.open()
+        try:
+            self.server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self.server = None
+            self.open()
+            self.server.send_message(msg)
+        self.last_used = time.monotonic()
+
+    def close(self):
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+        self.server = None
+
+    def is_idle(self):
+        return (
+            self.server is not None
+            and time.monotonic() - self.last_used > SMTP_IDLE_TIMEOUT
+        )
+
+
+# Keeps messages in memory instead of sending them; for tests and benchmarks
+class MemoryTransport:
+    sent = []
+    _lock = threading.Lock()
+
+    def send(self, msg):
+        with self._lock:
+            self.sent.append(msg)
+
+    def close(self):
+        pass
+
+    def is_idle(self):
+        return False
+
+
+def default_transport():
+    if MAIL_TRANSPORT == "memory":
+        return MemoryTransport()
+    return SMTPTransport(
+        SMTP_HOST,
+        SMTP_PORT,
+        username=SENDER_EMAIL,
+        password=EMAIL_PASSWORD,
+        starttls=SMTP_STARTTLS,
+    )
+
+
+# ----------------------------------------------------------------------------------------------------
+# Dispatcher
+QUEUED = "queued"
+SENT = "sent"
+RETRYING = "retrying"
+FAILED = "failed"
+
+
+class MailDispatcher:
+    def __init__(
+        self,
+        transport_factory=default_transport,
+        workers: int = MAIL_WORKERS,
+        batch_size: int = MAIL_BATCH_SIZE,
+        max_retries: int = MAIL_MAX_RETRIES,
+        retry_backoff: float = MAIL_RETRY_BACKOFF,
+        max_tracked: int = 10000,
+    ):
+        self.transport_factory = transport_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_tracked = max_tracked
+        self._queue = queue.Queue()
+        self._threads = []
+        self._statuses = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._threads = [
+                threading.Thread(target=self._run, name=f"mailer-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("Mail dispatcher started with {} workers", self.workers)
+
+    def stop(self, timeout: float = 10):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        logger.info("Mail dispatcher stopped")
+
+    def enqueue(self, receiver: str, subject: str, body: str):
+        if not self._running:
+            self.start()
+        message_id = next(self._ids)
+        self._set_status(message_id, QUEUED)
+        self._queue.put((message_id, receiver, subject, body, 0))
+        logger.info(
+            "Queued email {} to: {}, subject: {}", message_id, receiver, subject
+        )
+        return message_id
+
+    def status(self, message_id: int):
+        return self._statuses.get(message_id)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _set_status(self, message_id: int, status: str):
+        with self._lock:
+            self._statuses[message_id] = status
+            self._statuses.move_to_end(message_id)
+            while len(self._statuses) > self.max_tracked:
+                self._statuses.popitem(last=False)
+
+    def _run(self):
+        transport = self.transport_factory()
+        try:
+            while True:
+                try:
+                    job = self._queue.get(timeout=SMTP_IDLE_TIMEOUT)
+                except queue.Empty:
+                    if transport.is_idle():
+                        transport.close()
+                    continue
+                if job is None:
+                    return
+
+                batch = [job]
+                while len(batch) < self.batch_size:
+                    try:
+                        job = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        self._queue.put(None)
+                        break
+                    batch.append(job)
+
+                for job in batch:
+                    self._deliver(transport, job)
+        finally:
+            transport.close()
+
+    def _deliver(self, transport, job):
+        message_id, receiver, subject, body, attempt = job
+        msg = MIMEMultipart()
+        msg["From"] = SENDER_EMAIL
+        msg["To"] = receiver
+        msg["Subject"] = subject
+        msg.attach(MIMEText(body, "plain"))
+
+        try:
+            with smtp_send.time():
+                transport.send(msg)
+        except Exception as e:
+            transport.close()
+            if attempt >= self.max_retries:
+                logger.error(
+                    "Error sending email {} to {}: {}", message_id, receiver, e
+                )
+                self._set_status(message_id, FAILED)
+                return
+            delay = self.retry_backoff * 2**attempt
+            logger.warning(
+                "Retrying email {} to {} in {:.1f}s: {}", message_id, receiver, delay, e
+            )
+            self._set_status(message_id, RETRYING)
+            retry = threading.Timer(
+                delay,
+                self._queue.put,
+                args=((message_id, receiver, subject, body, attempt + 1),),
+            )
+            retry.daemon = True
+            retry.start()
+            return
+
+        self._set_status(message_id, SENT)
+        logger.info("Email {} sent successfully to: {}", message_id, receiver)
+
+
+mailer = MailDispatcher()
+gauges["mail_queue_depth"] = mailer.pending
+
+
+def send_email(receiver, subject, body):
+    return mailer.enqueue(receiver, subject, body)
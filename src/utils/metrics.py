@@ -0,0 +1,241 @@
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+# ----------------------------------------------------------------------------------------------------
+# Histogram with fixed buckets; observe() is one bisect and three increments
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+    def render(self, name: str, labels: str = ""):
+        sep = "," if labels else ""
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}'
+        braces = f"{{{labels}}}" if labels else ""
+        yield f"{name}_sum{braces} {self.sum}"
+        yield f"{name}_count{braces} {self.count}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc):
+        self.histogram.observe(perf_counter() - self.start)
+
+
+# ----------------------------------------------------------------------------------------------------
+# Per-route request metrics
+# Stats live in nested dicts keyed by the route's path template and then the
+# method, both strings that already exist, so recording a request allocates no
+# label tuples. Only the event loop thread records requests.
+class RouteStats:
+    __slots__ = ("latency", "statuses", "queries")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.statuses = {}
+        self.queries = 0
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._routes = {}
+
+    def observe(
+        self, method: str, path: str, status: int, seconds: float, queries: int = 0
+    ):
+        by_method = self._routes.get(path)
+        if by_method is None:
+            by_method = self._routes[path] = {}
+        stats = by_method.get(method)
+        if stats is None:
+            stats = by_method[method] = RouteStats()
+        stats.latency.observe(seconds)
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        stats.queries += queries
+
+    def render(self):
+        yield "# TYPE http_requests_total counter"
+        for path, by_method in list(self._routes.items()):
+            for method, stats in list(by_method.items()):
+                for status, count in list(stats.statuses.items()):
+                    yield (
+                        f'http_requests_total{{method="{method}",route="{path}",'
+                        f'status="{status}"}} {count}'
+                    )
+        yield "# TYPE http_db_queries_total counter"
+        for path, by_method in list(self._routes.items()):
+            for method, stats in list(by_method.items()):
+                yield (
+                    f'http_db_queries_total{{method="{method}",route="{path}"}} '
+                    f"{stats.queries}"
+                )
+        yield "# TYPE http_request_duration_seconds histogram"
+        for path, by_method in list(self._routes.items()):
+            for method, stats in list(by_method.items()):
+                yield from stats.latency.render(
+                    "http_request_duration_seconds",
+                    f'method="{method}",route="{path}"',
+                )
+
+
+request_metrics = RequestMetrics()
+
+# Timings recorded from worker threads elsewhere in the app
+db_pool_checkout = Histogram()
+smtp_send = Histogram()
+password_hash = Histogram((0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0))
+password_verify = Histogram((0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0))
+
+# Gauges read at scrape time: name -> zero-argument callable
+gauges = {}
+# Monotonic totals read at scrape time, exposed as counters
+counters = {}
+
+# Statements executed by the current request; the one-element list is shared
+# with the threadpool thread running a sync endpoint through the copied context.
+request_queries = ContextVar("request_queries", default=None)
+
+
+# ----------------------------------------------------------------------------------------------------
+# Pure ASGI middleware timing each request up to the end of its response
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = perf_counter()
+        status = 500
+        queries = [0]
+        request_queries.set(queries)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            request_metrics.observe(
+                scope["method"],
+                route.path if route is not None else UNMATCHED_ROUTE,
+                status,
+                perf_counter() - start,
+                queries[0],
+            )
+
+
+# ----------------------------------------------------------------------------------------------------
+# Engine instrumentation: statements are counted per request, checkout wait is
+# timed up to the pool's checkout event, and pool usage is read when /metrics
+# is scraped. Everything is registered with event.listen on the engine, which
+# carries the listeners over to the new pool that dispose() (after a fork, at
+# shutdown) puts in place of the old one.
+def count_query(*args):
+    queries = request_queries.get()
+    if queries is not None:
+        queries[0] += 1
+
+
+# Pools have no "before checkout" event, so the wait starts when a session is
+# about to need a connection (a new transaction, an ORM statement or a flush)
+# and ends at the pool's checkout event, which runs on the same thread
+checkout_started = ContextVar("checkout_started", default=None)
+
+
+def start_checkout(*args):
+    checkout_started.set(perf_counter())
+
+
+def end_checkout(dbapi_connection, connection_record, connection_proxy):
+    started = checkout_started.get()
+    if started is not None:
+        checkout_started.set(None)
+        db_pool_checkout.observe(perf_counter() - started)
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", count_query)
+
+    for name in ("after_transaction_create", "do_orm_execute", "before_flush"):
+        if not event.contains(Session, name, start_checkout):
+            event.listen(Session, name, start_checkout)
+    event.listen(engine, "checkout", end_checkout)
+
+    checked_out = [0]
+    lock = threading.Lock()
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        with lock:
+            checked_out[0] += 1
+
+    def on_checkin(dbapi_connection, connection_record):
+        with lock:
+            checked_out[0] -= 1
+
+    event.listen(engine, "checkout", on_checkout)
+    event.listen(engine, "checkin", on_checkin)
+    gauges["db_pool_checked_out"] = lambda: checked_out[0]
+    if hasattr(engine.pool, "size"):
+        gauges["db_pool_checked_in"] = lambda: engine.pool.checkedin()
+        gauges["db_pool_size"] = lambda: engine.pool.size()
+
+
+# ----------------------------------------------------------------------------------------------------
+# Prometheus text exposition format
+def render_metrics():
+    lines = list(request_metrics.render())
+    for name, histogram in (
+        ("db_pool_checkout_seconds", db_pool_checkout),
+        ("smtp_send_seconds", smtp_send),
+        ("password_hash_seconds", password_hash),
+        ("password_verify_seconds", password_verify),
+    ):
+        lines.append(f"# TYPE {name} histogram")
+        lines.extend(histogram.render(name))
+    for name, read in gauges.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {read()}")
+    for name, read in counters.items():
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {read()}")
+    return "\n".join(lines) + "\n"
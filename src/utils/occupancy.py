@@ -0,0 +1,240 @@
+import threading
+import time
+from datetime import date, timedelta
+import numpy as np
+from config import OCCUPANCY_HORIZON_DAYS, OCCUPANCY_TTL
+from src.utils.availability import active_bookings
+from src.utils.catalog import fleet_catalog
+from logs.log_config import logger
+
+
+# ----------------------------------------------------------------------------------------------------
+# Day-level occupancy calendar
+# counts[row, day] is the number of active bookings holding that car on
+# origin + day, for OCCUPANCY_HORIZON_DAYS days from today. A car is free on a
+# day when its count is 0; cars with no active bookings have no row at all.
+# Counts instead of booleans let a cancel undo exactly what its booking set.
+# The calendar is rebuilt once a day so the origin stays today, and after
+# OCCUPANCY_TTL to pick up bookings made or cancelled by other processes.
+class OccupancyCalendar:
+    def __init__(
+        self, horizon: int = OCCUPANCY_HORIZON_DAYS, ttl: float = OCCUPANCY_TTL
+    ):
+        self.horizon = horizon
+        self.ttl = ttl
+        self.origin = None
+        self._counts = np.zeros((0, horizon), dtype=np.int16)
+        self._rows = {}
+        self._bookings = {}
+        self._pending = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.loaded = False
+        self.loaded_at = 0.0
+
+    def load(self, db):
+        logger.info("Building occupancy calendar.")
+        with self._lock:
+            self._pending = []
+        try:
+            origin = date.today()
+            bookings = {}
+            for booking_id, car_id, start_date, end_date in active_bookings(db):
+                bookings.setdefault(booking_id, (car_id, start_date, end_date))
+
+            rows = {}
+            car_rows = np.fromiter(
+                (
+                    rows.setdefault(car_id, len(rows))
+                    for car_id, _, _ in bookings.values()
+                ),
+                dtype=np.int64,
+                count=len(bookings),
+            )
+            starts, ends = self._clip(
+                np.fromiter(
+                    (s.toordinal() for _, s, _ in bookings.values()),
+                    dtype=np.int64,
+                    count=len(bookings),
+                ),
+                np.fromiter(
+                    (e.toordinal() for _, _, e in bookings.values()),
+                    dtype=np.int64,
+                    count=len(bookings),
+                ),
+                origin,
+            )
+            inside = starts <= ends
+            # +1 where a booking starts, -1 the day after it ends, then a
+            # running sum along each car's row
+            diff = np.zeros((max(len(rows), 1), self.horizon + 1), dtype=np.int32)
+            np.add.at(diff, (car_rows[inside], starts[inside]), 1)
+            np.add.at(diff, (car_rows[inside], ends[inside] + 1), -1)
+            counts = np.cumsum(diff[:, : self.horizon], axis=1).astype(np.int16)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self.origin = origin
+            self._counts = counts
+            self._rows = rows
+            self._bookings = bookings
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+            pending, self._pending = self._pending, None
+            for op, args in pending:
+                op(*args)
+        logger.info(
+            "Occupancy calendar built: {} bookings over {} cars.",
+            len(bookings),
+            len(rows),
+        )
+
+    def _expired(self):
+        return self.ttl > 0 and time.monotonic() - self.loaded_at > self.ttl
+
+    def ensure_loaded(self, db):
+        if not self.loaded or self.origin != date.today():
+            with self._load_lock:
+                if not self.loaded or self.origin != date.today():
+                    self.load(db)
+        elif self._expired() and self._load_lock.acquire(blocking=False):
+            # One request rebuilds; the others keep reading the current calendar
+            try:
+                if self._expired():
+                    self.load(db)
+            finally:
+                self._load_lock.release()
+
+    def _clip(self, start_ordinals, end_ordinals, origin: date):
+        offset = origin.toordinal()
+        starts = np.maximum(start_ordinals - offset, 0)
+        ends = np.minimum(end_ordinals - offset, self.horizon - 1)
+        return starts, ends
+
+    def _span(self, start_date: date, end_date: date):
+        start = max((start_date - self.origin).days, 0)
+        end = min((end_date - self.origin).days, self.horizon - 1)
+        return start, end
+
+    # Changes that land while a build is in flight are replayed once it finishes
+    def add_booking(
+        self, booking_id: str, car_id: str, start_date: date, end_date: date
+    ):
+        if not car_id:
+            return
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(
+                    (self._add, (booking_id, car_id, start_date, end_date))
+                )
+            elif self.loaded:
+                self._add(booking_id, car_id, start_date, end_date)
+
+    def remove_booking(self, booking_id: str):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((self._remove, (booking_id,)))
+            elif self.loaded:
+                self._remove(booking_id)
+
+    def _row(self, car_id: str):
+        row = self._rows.get(car_id)
+        if row is None:
+            row = self._rows[car_id] = len(self._rows)
+            if row >= len(self._counts):
+                grown = np.zeros((max(2 * row, 16), self.horizon), dtype=np.int16)
+                grown[: len(self._counts)] = self._counts
+                self._counts = grown
+        return row
+
+    def _add(self, booking_id, car_id, start_date, end_date):
+        if booking_id in self._bookings:
+            return
+        self._bookings[booking_id] = (car_id, start_date, end_date)
+        start, end = self._span(start_date, end_date)
+        if start <= end:
+            row = self._row(car_id)
+            self._counts[row, start : end + 1] += 1
+
+    def _remove(self, booking_id):
+        entry = self._bookings.pop(booking_id, None)
+        if entry is None:
+            return
+        car_id, start_date, end_date = entry
+        start, end = self._span(start_date, end_date)
+        if start <= end:
+            self._counts[self._rows[car_id], start : end + 1] -= 1
+
+    def clear(self):
+        with self._lock:
+            self._counts = np.zeros((0, self.horizon), dtype=np.int16)
+            self._rows = {}
+            self._bookings = {}
+            self.loaded = False
+
+    # ------------------------------------------------------------------------------------------------
+    # Queries, over a cars x days boolean matrix of free days
+    def free_matrix(self, car_ids, start: int = 0, end: int = None):
+        end = self.horizon - 1 if end is None else end
+        free = np.ones((len(car_ids), end - start + 1), dtype=bool)
+        with self._lock:
+            rows = np.array(
+                [self._rows.get(car_id, -1) for car_id in car_ids], dtype=np.int64
+            )
+            known = rows >= 0
+            free[known] = self._counts[rows[known], start : end + 1] == 0
+        return free
+
+    def free_days(self, car_ids, start_date: date, end_date: date):
+        start, end = self._span(start_date, end_date)
+        if start > end or not car_ids:
+            return start, np.zeros((len(car_ids), 0), dtype=bool)
+        return start, self.free_matrix(car_ids, start, end)
+
+    def first_gap(self, car_ids, days: int, from_date: date):
+        start, _ = self._span(from_date, from_date)
+        if not car_ids or days > self.horizon - start:
+            return None, []
+        free = self.free_matrix(car_ids, start)
+        # Free days in every window of `days` consecutive days, per car
+        running = np.zeros((len(car_ids), free.shape[1] + 1), dtype=np.int32)
+        np.cumsum(free, axis=1, out=running[:, 1:])
+        fits = (running[:, days:] - running[:, :-days]) == days
+        any_fits = fits.any(axis=0)
+        if not any_fits.any():
+            return None, []
+        first = int(any_fits.argmax())
+        gap_start = self.origin + timedelta(days=start + first)
+        return gap_start, [car_ids[i] for i in np.flatnonzero(fits[:, first])]
+
+
+occupancy_calendar = OccupancyCalendar()
+
+
+# ----------------------------------------------------------------------------------------------------
+# Calendar lookups for the listed cars of one capacity, or one car
+def calendar_cars(db, car_capacity=None, car_id: str = None):
+    if car_id:
+        car = fleet_catalog.get(db, car_id)
+        return [car.id] if car is not None and not car.is_deleted else []
+    return [car.id for car in fleet_catalog.with_capacity(db, car_capacity)]
+
+
+def month_calendar(db, car_ids, year: int, month: int):
+    occupancy_calendar.ensure_loaded(db)
+    first_day = date(year, month, 1)
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    start, free = occupancy_calendar.free_days(
+        car_ids, first_day, next_month - timedelta(days=1)
+    )
+    free_cars = free.sum(axis=0)
+    return [
+        {
+            "date": occupancy_calendar.origin + timedelta(days=start + i),
+            "free_cars": int(count),
+        }
+        for i, count in enumerate(free_cars)
+    ]
@@ -0,0 +1,148 @@
+import heapq
+import hmac
+import secrets
+import threading
+import time
+from config import OTP_STORE, OTP_REDIS_URL, OTP_TTL, OTP_MAX_ATTEMPTS
+from logs.log_config import logger
+
+# One active OTP per (purpose, email): issuing a new one replaces the old one,
+# a correct verify consumes it, and too many wrong guesses throw it away.
+VERIFY_EMAIL = "verify_email"
+RESET_PASSWORD = "reset_password"
+PAYMENT = "payment"
+
+
+def new_otp():
+    return str(1000 + secrets.randbelow(9000))
+
+
+# ----------------------------------------------------------------------------------------------------
+# In-process store
+# A dict gives constant-time lookup; a heap of expiry times lets every write
+# purge whatever has expired without scanning the dict.
+class MemoryOTPStore:
+    def __init__(self, ttl: int = OTP_TTL, max_attempts: int = OTP_MAX_ATTEMPTS):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self._entries = {}
+        self._expiries = []
+        self._lock = threading.Lock()
+
+    def issue(self, purpose: str, email: str):
+        otp = new_otp()
+        key = (purpose, email)
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            expires_at = now + self.ttl
+            self._entries[key] = [otp, expires_at, 0]
+            heapq.heappush(self._expiries, (expires_at, key))
+        return otp
+
+    def verify(self, purpose: str, email: str, otp: str):
+        key = (purpose, email)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return False
+            if hmac.compare_digest(entry[0], str(otp)):
+                del self._entries[key]
+                return True
+            entry[2] += 1
+            if entry[2] >= self.max_attempts:
+                logger.warning("Too many wrong OTPs for {} ({})", email, purpose)
+                del self._entries[key]
+            return False
+
+    def size(self):
+        with self._lock:
+            self._purge(time.monotonic())
+            return len(self._entries)
+
+    def _purge(self, now: float):
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiries)
+            entry = self._entries.get(key)
+            # Skip heap items left behind by a replaced or consumed OTP
+            if entry is not None and entry[1] == expires_at:
+                del self._entries[key]
+
+
+# ----------------------------------------------------------------------------------------------------
+# Redis store
+# Any client speaking the Redis protocol works (redis-py, fakeredis). Keys
+# expire on their own; the check-and-consume runs as one Lua script so
+# concurrent verifies can't both succeed.
+VERIFY_SCRIPT = """
+local otp = redis.call('HGET', KEYS[1], 'otp')
+if not otp then return 0 end
+if otp == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+if redis.call('HINCRBY', KEYS[1], 'attempts', 1) >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisOTPStore:
+    def __init__(
+        self,
+        client,
+        ttl: int = OTP_TTL,
+        max_attempts: int = OTP_MAX_ATTEMPTS,
+        prefix: str = "otp",
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.prefix = prefix
+        self._verify = client.register_script(VERIFY_SCRIPT)
+
+    def _key(self, purpose: str, email: str):
+        return f"{self.prefix}:{purpose}:{email}"
+
+    def issue(self, purpose: str, email: str):
+        otp = new_otp()
+        key = self._key(purpose, email)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping={"otp": otp, "attempts": 0})
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+        return otp
+
+    def verify(self, purpose: str, email: str, otp: str):
+        return bool(
+            self._verify(
+                keys=[self._key(purpose, email)], args=[str(otp), self.max_attempts]
+            )
+        )
+
+
+def default_otp_store():
+    if OTP_STORE == "redis":
+        import redis
+
+        logger.info("Using Redis OTP store at {}", OTP_REDIS_URL)
+        return RedisOTPStore(redis.Redis.from_url(OTP_REDIS_URL))
+    return MemoryOTPStore()
+
+
+# Called from the app lifespan: with several server workers each one would only
+# see the OTPs it issued itself
+def check_otp_store(workers: int):
+    if isinstance(otp_store, MemoryOTPStore) and workers > 1:
+        raise RuntimeError(
+            f"OTP_STORE=memory keeps OTPs per process and cannot serve {workers}"
+            " workers; set OTP_STORE=redis"
+        )
+
+
+otp_store = default_otp_store()
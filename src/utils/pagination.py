@@ -0,0 +1,80 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from database.database import SessionLocal
+from src.utils.responses import dumps, projection
+from logs.log_config import logger
+
+
+# ----------------------------------------------------------------------------------------------------
+# Opaque cursors over (created timestamp, id)
+def encode_cursor(created: datetime, id: str):
+    raw = json.dumps([created.isoformat(), id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created, id = json.loads(raw)
+        return datetime.fromisoformat(created), id
+    except (ValueError, TypeError):
+        logger.error("Invalid pagination cursor: {}", cursor)
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# ----------------------------------------------------------------------------------------------------
+# Keyset page: rows strictly after the cursor, ordered by (created, id).
+# keyset_query works on both ORM queries and select() statements.
+def keyset_query(query, created_col, id_col, limit: int, cursor: str = None):
+    if cursor:
+        created, id = decode_cursor(cursor)
+        query = query.filter(
+            or_(created_col > created, and_(created_col == created, id_col > id))
+        )
+    return query.order_by(created_col, id_col).limit(limit + 1)
+
+
+def page_of(rows, created_col, id_col, limit: int):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            getattr(last, created_col.key), getattr(last, id_col.key)
+        )
+    return rows, next_cursor
+
+
+def keyset_page(query, created_col, id_col, limit: int, cursor: str = None):
+    rows = keyset_query(query, created_col, id_col, limit, cursor).all()
+    return page_of(rows, created_col, id_col, limit)
+
+
+# ----------------------------------------------------------------------------------------------------
+# NDJSON export, one schema-shaped line per row, flushed every batch_size rows.
+# Only the schema's columns are selected, and rows are projected and dumped
+# with orjson rather than validated into models one by one. The generator owns
+# its session because the request's session is closed before the body is
+# streamed.
+def stream_ndjson(build_query, schema, created_col, id_col, batch_size: int = 1000):
+    rows_to_json = projection(schema)
+    db = SessionLocal()
+    try:
+        query = (
+            build_query(db)
+            .with_entities(*rows_to_json.columns(created_col.class_))
+            .order_by(created_col, id_col)
+        )
+        lines = []
+        for row in query.yield_per(batch_size):
+            lines.append(dumps(rows_to_json.one(row)))
+            if len(lines) == batch_size:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+    finally:
+        db.close()
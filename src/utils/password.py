@@ -0,0 +1,108 @@
+import multiprocessing
+import threading
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from config import PASSWORD_POOL_WORKERS, PASSWORD_QUEUE_DEPTH, PASSWORD_TIMEOUT
+from src.utils.metrics import password_hash, password_verify
+from logs.log_config import logger
+
+# bcrypt work runs in a dedicated process pool so a login storm can't pin the
+# request threadpool. At most PASSWORD_POOL_WORKERS + PASSWORD_QUEUE_DEPTH jobs
+# are admitted at once; anything beyond that is rejected with 429. A job's slot
+# is held until the job itself finishes, even when the request stopped waiting
+# for it after PASSWORD_TIMEOUT (503), so the limit tracks the real pool load.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(
+    max(PASSWORD_POOL_WORKERS, 1) + PASSWORD_QUEUE_DEPTH
+)
+
+
+def _hash(password: str):
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, hashed: str):
+    return pwd_context.verify(password, hashed)
+
+
+# The pool starts on first use, when the log writer, mailer and job threads
+# are already running; a forked worker could inherit one of their locks held
+# and hang on it. Workers come from a forkserver (spawn where there is none)
+# and import this module fresh instead.
+def pool_context():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=PASSWORD_POOL_WORKERS, mp_context=pool_context()
+                )
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+def _release_slot(future):
+    _slots.release()
+
+
+def run_password_job(fn, *args, histogram=None):
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=429,
+            detail="Too many password requests, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    start = perf_counter()
+    if PASSWORD_POOL_WORKERS <= 0:
+        try:
+            return fn(*args)
+        finally:
+            _slots.release()
+            if histogram is not None:
+                histogram.observe(perf_counter() - start)
+
+    try:
+        future = get_executor().submit(fn, *args)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(_release_slot)
+    try:
+        return future.result(timeout=PASSWORD_TIMEOUT)
+    except FutureTimeoutError:
+        logger.error("Password job timed out after {}s", PASSWORD_TIMEOUT)
+        raise HTTPException(
+            status_code=503,
+            detail="Password service is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    finally:
+        if histogram is not None:
+            histogram.observe(perf_counter() - start)
+
+
+def hash_password(password: str):
+    return run_password_job(_hash, password, histogram=password_hash)
+
+
+def verify_password(password: str, hashed: str):
+    return run_password_job(_verify, password, hashed, histogram=password_verify)
@@ -0,0 +1,342 @@
+import hashlib
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import anyio
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from config import (
+    PHOTO_DIR,
+    PHOTO_MAX_BYTES,
+    PHOTO_THUMBNAIL_SIZES,
+    PHOTO_THUMBNAIL_WORKERS,
+)
+from logs.log_config import logger
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:
+    import multipart
+    from multipart.multipart import parse_options_header
+
+# Pillow is a requirement, but an install without it still stores photos, only
+# without thumbnails
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Stored photos are named by the first 128 bits of their SHA-256, so the same
+# image uploaded twice is written once and Car/Booking.car_picture only carry
+# "<32 hex>.<ext>". Files are sharded by the first two hex digits.
+PHOTO_NAME = re.compile(r"^([0-9a-f]{32})\.(jpg|png|webp|gif)$")
+MEDIA_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "gif": "image/gif",
+}
+WRITE_BUFFER_BYTES = 256 * 1024
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+
+# ----------------------------------------------------------------------------------------------------
+# Names and paths
+def sniff_extension(head: bytes):
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def photo_path(name: str, size: int = None):
+    match = PHOTO_NAME.match(name or "")
+    if not match:
+        return None
+    digest, ext = match.groups()
+    filename = f"{digest}_{size}.{ext}" if size else name
+    return os.path.join(PHOTO_DIR, digest[:2], filename)
+
+
+def _tmp_dir():
+    path = os.path.join(PHOTO_DIR, "tmp")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _store(tmp_path: str, name: str):
+    path = photo_path(name)
+    if os.path.exists(path):
+        os.remove(tmp_path)
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
+    return True
+
+
+# ----------------------------------------------------------------------------------------------------
+# Streaming upload
+# The multipart body is parsed as it arrives; the "file" part is hashed and
+# written to a temp file in buffered chunks, and nothing else is kept in memory.
+def _too_large():
+    return HTTPException(
+        status_code=413,
+        detail=f"Photo is larger than {PHOTO_MAX_BYTES} bytes",
+    )
+
+
+def check_content_length(request: Request):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > PHOTO_MAX_BYTES + MULTIPART_OVERHEAD_BYTES:
+            raise _too_large()
+
+
+class _FilePart:
+    def __init__(self, field: str):
+        self.field = field
+        self.events = []
+        self.in_field = False
+        self.header_field = b""
+        self.header_value = b""
+        self.done = False
+
+    def callbacks(self):
+        def on_part_begin():
+            self.in_field = False
+
+        def on_header_field(data, start, end):
+            self.header_field += data[start:end]
+
+        def on_header_value(data, start, end):
+            self.header_value += data[start:end]
+
+        def on_header_end():
+            if self.header_field.lower() == b"content-disposition":
+                _, options = parse_options_header(self.header_value)
+                self.in_field = options.get(b"name") == self.field.encode()
+            self.header_field = b""
+            self.header_value = b""
+
+        def on_part_data(data, start, end):
+            if self.in_field and not self.done:
+                self.events.append(data[start:end])
+
+        def on_part_end():
+            if self.in_field:
+                self.done = True
+                self.in_field = False
+
+        return {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        }
+
+
+async def receive_photo(request: Request, field: str = "file"):
+    content_type, options = parse_options_header(
+        request.headers.get("content-type", "")
+    )
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data")
+
+    part = _FilePart(field)
+    parser = multipart.MultipartParser(boundary, part.callbacks())
+    digest = hashlib.sha256()
+    head = b""
+    size = 0
+    buffer = []
+    buffered = 0
+    tmp_path = os.path.join(_tmp_dir(), uuid.uuid4().hex)
+
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as f:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                for data in part.events:
+                    size += len(data)
+                    if size > PHOTO_MAX_BYTES:
+                        raise _too_large()
+                    if len(head) < 12:
+                        head += data[: 12 - len(head)]
+                    digest.update(data)
+                    buffer.append(data)
+                    buffered += len(data)
+                part.events.clear()
+                if buffered >= WRITE_BUFFER_BYTES:
+                    await f.write(b"".join(buffer))
+                    buffer.clear()
+                    buffered = 0
+            if buffer:
+                await f.write(b"".join(buffer))
+        parser.finalize()
+
+        if not size:
+            raise HTTPException(status_code=400, detail=f"No '{field}' part uploaded")
+        ext = sniff_extension(head)
+        if ext is None:
+            raise HTTPException(
+                status_code=415, detail="Photo must be a JPEG, PNG, WebP or GIF image"
+            )
+        name = f"{digest.hexdigest()[:32]}.{ext}"
+        created = await anyio.to_thread.run_sync(_store, tmp_path, name)
+    except BaseException:
+        await anyio.to_thread.run_sync(_discard, tmp_path)
+        raise
+
+    if created:
+        logger.info("Stored photo {} ({} bytes)", name, size)
+        schedule_thumbnails(name)
+    else:
+        logger.info("Photo {} already stored", name)
+    return name
+
+
+# ----------------------------------------------------------------------------------------------------
+# Thumbnails
+# Resized variants "<hash>_<size>.<ext>" are made off the request path in a
+# small thread pool. Pillow releases the GIL while decoding and resampling.
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=PHOTO_THUMBNAIL_WORKERS,
+                    thread_name_prefix="thumbnail",
+                )
+    return _executor
+
+
+def shutdown_thumbnails():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+def make_thumbnails(name: str):
+    source = photo_path(name)
+    for size in PHOTO_THUMBNAIL_SIZES:
+        target = photo_path(name, size)
+        if os.path.exists(target):
+            continue
+        tmp_path = os.path.join(_tmp_dir(), uuid.uuid4().hex)
+        try:
+            with Image.open(source) as image:
+                image_format = image.format
+                # JPEG can decode straight at a reduced scale
+                image.draft("RGB", (size, size))
+                image.thumbnail((size, size))
+                image.save(tmp_path, format=image_format)
+            os.replace(tmp_path, target)
+        except Exception as e:
+            _discard(tmp_path)
+            logger.error("Thumbnail {} of {} failed: {}", size, name, e)
+            return
+    logger.info("Thumbnails ready for {}", name)
+
+
+def schedule_thumbnails(name: str):
+    if Image is None:
+        logger.warning("Pillow is not installed; skipping thumbnails for {}", name)
+        return
+    if PHOTO_THUMBNAIL_SIZES and PHOTO_THUMBNAIL_WORKERS > 0:
+        get_executor().submit(make_thumbnails, name)
+
+
+# ----------------------------------------------------------------------------------------------------
+# Serving
+# A stored file never changes under its name, so the name is a strong ETag and
+# responses can be cached forever. Starlette's FileResponse handles Range and
+# If-Range (against Last-Modified); this only reads in larger chunks.
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def photo_etag(name: str, size: int = None):
+    digest = name.split(".", 1)[0]
+    return f'"{digest}_{size}"' if size else f'"{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str):
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class PhotoResponse(FileResponse):
+    chunk_size = 256 * 1024
+
+
+def _stat(path: str):
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+async def photo_response(request: Request, name: str, size: int = None):
+    original = photo_path(name)
+    if original is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    if size and size not in PHOTO_THUMBNAIL_SIZES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"size must be one of {', '.join(map(str, PHOTO_THUMBNAIL_SIZES))}",
+        )
+
+    etag = photo_etag(name, size)
+    cache_control = IMMUTABLE
+    path = photo_path(name, size) if size else original
+    stat_result = await anyio.to_thread.run_sync(_stat, path)
+    if stat_result is None and size:
+        # Thumbnail not made (yet): serve the original, but don't let it be
+        # cached under the thumbnail's URL
+        path, etag, cache_control = original, photo_etag(name), "no-cache"
+        stat_result = await anyio.to_thread.run_sync(_stat, path)
+    if stat_result is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(
+            status_code=304, headers={"etag": etag, "cache-control": cache_control}
+        )
+    return PhotoResponse(
+        path,
+        stat_result=stat_result,
+        media_type=MEDIA_TYPES[name.rsplit(".", 1)[1]],
+        headers={"etag": etag, "cache-control": cache_control},
+    )
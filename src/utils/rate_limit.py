@@ -0,0 +1,219 @@
+import math
+import threading
+import time
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from config import (
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_STORE,
+    RATE_LIMIT_REDIS_URL,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_OTP_BURST,
+    RATE_LIMIT_OTP_INTERVAL,
+    RATE_LIMIT_OTP_IP_BURST,
+    RATE_LIMIT_OTP_IP_INTERVAL,
+    RATE_LIMIT_LOGIN_BURST,
+    RATE_LIMIT_LOGIN_INTERVAL,
+    RATE_LIMIT_LOGIN_IP_BURST,
+    RATE_LIMIT_LOGIN_IP_INTERVAL,
+)
+from src.utils.metrics import counters, gauges
+from logs.log_config import logger
+
+# Policy -> ((interval, burst) per client IP, (interval, burst) per subject)
+OTP = "otp"
+LOGIN = "login"
+POLICIES = {
+    OTP: (
+        (RATE_LIMIT_OTP_IP_INTERVAL, RATE_LIMIT_OTP_IP_BURST),
+        (RATE_LIMIT_OTP_INTERVAL, RATE_LIMIT_OTP_BURST),
+    ),
+    LOGIN: (
+        (RATE_LIMIT_LOGIN_IP_INTERVAL, RATE_LIMIT_LOGIN_IP_BURST),
+        (RATE_LIMIT_LOGIN_INTERVAL, RATE_LIMIT_LOGIN_BURST),
+    ),
+}
+
+
+# ----------------------------------------------------------------------------------------------------
+# In-process buckets
+# Each bucket is stored as one float: the time at which it will be full again
+# (GCRA, the token bucket expressed as a "theoretical arrival time"). Taking a
+# token pushes that time one interval further; a request is refused when it
+# would push it more than burst intervals past now. A bucket whose time has
+# passed is full and equivalent to no entry at all, so sweeps just drop those.
+# Sweeps run once the dict has doubled since the last one (amortized O(1)); if
+# more than max_keys / 2 live buckets remain, the oldest are dropped and start
+# full again.
+class MemoryRateLimiter:
+    blocking = False
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._full_at = {}
+        self._next_sweep = 1024
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    # buckets: [(key, interval, burst), ...]; every bucket must have a token
+    # for the request to pass, and tokens are only taken when it does.
+    # Returns 0 when allowed, else the seconds until it would be.
+    def hit(self, buckets):
+        now = time.monotonic()
+        with self._lock:
+            full_at = self._full_at
+            wait = 0.0
+            updates = []
+            for key, interval, burst in buckets:
+                tat = full_at.get(key, now)
+                if tat < now:
+                    tat = now
+                tat += interval
+                over = tat - now - burst * interval
+                if over > wait:
+                    wait = over
+                updates.append((key, tat))
+            if wait > 0:
+                self.rejected += 1
+                return wait
+            for key, tat in updates:
+                full_at[key] = tat
+            self.allowed += 1
+            if len(full_at) >= self._next_sweep:
+                self._sweep(now)
+            return 0.0
+
+    def _sweep(self, now: float):
+        full_at = self._full_at
+        for key in [key for key, tat in full_at.items() if tat <= now]:
+            del full_at[key]
+        # Still crowded with live buckets: drop the oldest half
+        keep = self.max_keys // 2
+        if len(full_at) > keep:
+            for key in list(full_at)[: len(full_at) - keep]:
+                del full_at[key]
+        self._next_sweep = max(min(2 * len(full_at), self.max_keys), 1024)
+
+    def size(self):
+        with self._lock:
+            return len(self._full_at)
+
+    def clear(self):
+        with self._lock:
+            self._full_at.clear()
+
+
+# ----------------------------------------------------------------------------------------------------
+# Redis buckets
+# Same algorithm as one Lua script over all of a request's keys, with the
+# Redis server's clock, so every worker shares the buckets. Times are in ms
+# and keys expire when their bucket is full again.
+HIT_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local wait = 0
+local tats = {}
+for i, key in ipairs(KEYS) do
+  local interval = tonumber(ARGV[2 * i - 1])
+  local burst = tonumber(ARGV[2 * i])
+  local tat = tonumber(redis.call('GET', key) or now)
+  if tat < now then tat = now end
+  tat = tat + interval
+  local over = tat - now - burst * interval
+  if over > wait then wait = over end
+  tats[i] = tat
+end
+if wait > 0 then return wait end
+for i, key in ipairs(KEYS) do
+  redis.call('SET', key, tats[i], 'PX', tats[i] - now)
+end
+return 0
+"""
+
+
+class RedisRateLimiter:
+    # Network round trip: called from the threadpool, not the event loop
+    blocking = True
+
+    def __init__(self, client, prefix: str = "ratelimit"):
+        self.client = client
+        self.prefix = prefix
+        self._hit = client.register_script(HIT_SCRIPT)
+        self.allowed = 0
+        self.rejected = 0
+
+    def hit(self, buckets):
+        keys = []
+        args = []
+        for key, interval, burst in buckets:
+            keys.append(f"{self.prefix}:{key}")
+            args.extend((math.ceil(interval * 1000), burst))
+        try:
+            wait = int(self._hit(keys=keys, args=args))
+        except Exception as e:
+            # Fail open: an unreachable Redis must not lock users out
+            logger.error("Rate limiter unavailable: {}", e)
+            return 0.0
+        if wait > 0:
+            self.rejected += 1
+            return wait / 1000
+        self.allowed += 1
+        return 0.0
+
+
+def default_rate_limiter():
+    if RATE_LIMIT_STORE == "redis":
+        import redis
+
+        logger.info("Using Redis rate limiter at {}", RATE_LIMIT_REDIS_URL)
+        return RedisRateLimiter(redis.Redis.from_url(RATE_LIMIT_REDIS_URL))
+    return MemoryRateLimiter()
+
+
+rate_limiter = default_rate_limiter()
+counters["rate_limit_allowed_total"] = lambda: rate_limiter.allowed
+counters["rate_limit_rejected_total"] = lambda: rate_limiter.rejected
+# Only the in-process store knows its bucket count
+if hasattr(rate_limiter, "size"):
+    gauges["rate_limit_buckets"] = rate_limiter.size
+
+
+# ----------------------------------------------------------------------------------------------------
+# Route dependency
+# Used as `dependencies=[Depends(rate_limit(OTP))]` on the route, so it is
+# resolved before the endpoint's own parameters and before any DB, SMTP or
+# bcrypt work. It is async, so the in-process check runs on the event loop
+# without a threadpool hop. The subject is read from the query string.
+def rate_limit(policy: str, subject: str = "email"):
+    (ip_interval, ip_burst), (interval, burst) = POLICIES[policy]
+
+    async def check(request: Request):
+        if not RATE_LIMIT_ENABLED:
+            return
+        host = request.client.host if request.client else "unknown"
+        buckets = [(f"{policy}:ip:{host}", ip_interval, ip_burst)]
+        value = request.query_params.get(subject)
+        if value:
+            buckets.append(
+                (f"{policy}:{subject}:{value.strip().lower()}", interval, burst)
+            )
+        if rate_limiter.blocking:
+            wait = await run_in_threadpool(rate_limiter.hit, buckets)
+        else:
+            wait = rate_limiter.hit(buckets)
+        if wait:
+            logger.info(
+                "Rate limited {} from {} ({}={})",
+                request.url.path,
+                host,
+                subject,
+                value,
+            )
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+    return check
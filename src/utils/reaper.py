@@ -0,0 +1,173 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert, literal, select, update
+from config import (
+    BOOKING_HOLD_TTL,
+    BOOKING_REAPER_INTERVAL,
+    BOOKING_REAPER_BATCH,
+    BOOKING_REAPER_MAX_BATCHES,
+)
+from database.database import SessionLocal
+from src.models.booking import Booking, expired_booking
+from src.utils.metrics import counters, gauges
+from logs.log_config import logger
+
+BOOKING_COLUMNS = [column.name for column in Booking.__table__.columns]
+
+
+# ----------------------------------------------------------------------------------------------------
+# Moving bookings out of the hot table
+# One batch picks up to batch_size rows matching `where`, copies them to
+# `target` stamped with the current time, and deletes them, in one transaction.
+# On PostgreSQL the picked rows are locked with SKIP LOCKED, so jobs in several
+# workers take disjoint batches and never wait on a row a request is updating.
+# SQLite has a single writer and ignores the lock clause. The copy and delete
+# repeat `where`, so a row whose state changed since it was picked stays put.
+# `prepare` sees the picked (booking_id, start_date) rows before the copy.
+def move_bookings(
+    db, target, stamp: str, where, order_by, batch_size: int, prepare=None
+):
+    picked_rows = db.execute(
+        select(Booking.booking_id, Booking.start_date)
+        .where(*where)
+        .order_by(order_by)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not picked_rows:
+        db.rollback()
+        return []
+    if prepare is not None:
+        prepare(db, picked_rows)
+
+    picked = (Booking.booking_id.in_([row[0] for row in picked_rows]), *where)
+    db.execute(
+        insert(target).from_select(
+            BOOKING_COLUMNS + [stamp],
+            select(
+                *(Booking.__table__.c[name] for name in BOOKING_COLUMNS),
+                literal(datetime.now()),
+            ).where(*picked),
+        )
+    )
+    moved = (
+        db.execute(delete(Booking).where(*picked).returning(Booking.booking_id))
+        .scalars()
+        .all()
+    )
+    db.commit()
+    return moved
+
+
+# ----------------------------------------------------------------------------------------------------
+# Expired holds go to booking_expired
+def expired_holds(cutoff: datetime):
+    return (
+        Booking.in_process == True,
+        Booking.is_booked == False,
+        Booking.created_at < cutoff,
+    )
+
+
+# Holds started before created_at existed (or by an older deploy) have none;
+# they are stamped when first seen and expire one TTL later
+def stamp_untimed_holds(db):
+    stamped = db.execute(
+        update(Booking)
+        .where(
+            Booking.in_process == True,
+            Booking.is_booked == False,
+            Booking.created_at.is_(None),
+        )
+        .values(created_at=datetime.now())
+    ).rowcount
+    db.commit()
+    return stamped
+
+
+def reap_expired_holds(
+    db,
+    ttl: int = BOOKING_HOLD_TTL,
+    batch_size: int = BOOKING_REAPER_BATCH,
+    max_batches: int = BOOKING_REAPER_MAX_BATCHES,
+):
+    stamp_untimed_holds(db)
+    cutoff = datetime.now() - timedelta(seconds=ttl)
+    reaped = 0
+    for _ in range(max_batches):
+        moved = move_bookings(
+            db,
+            expired_booking,
+            "expired_at",
+            expired_holds(cutoff),
+            Booking.created_at,
+            batch_size,
+        )
+        reaped += len(moved)
+        if len(moved) < batch_size:
+            break
+    return reaped
+
+
+# ----------------------------------------------------------------------------------------------------
+# Background worker started from the app lifespan; `job(db)` returns how many
+# bookings it moved
+class BookingJob:
+    def __init__(self, name: str, job, interval: float):
+        self.name = name
+        self.job = job
+        self.interval = interval
+        self.runs = 0
+        self.moved = 0
+        self.last_moved = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info("{} started, every {}s", self.name, self.interval)
+
+    def stop(self, timeout: float = 10):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info("{} stopped", self.name)
+
+    def run_once(self):
+        started = time.perf_counter()
+        with SessionLocal() as db:
+            moved = self.job(db)
+        self.runs += 1
+        self.moved += moved
+        self.last_moved = moved
+        logger.info(
+            "{} moved {} bookings in {:.3f}s",
+            self.name,
+            moved,
+            time.perf_counter() - started,
+        )
+        return moved
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error("{} run failed: {}", self.name, e)
+
+    def register_gauges(self, prefix: str):
+        gauges[f"{prefix}_last_run"] = lambda: self.last_moved
+        counters[f"{prefix}_total"] = lambda: self.moved
+
+
+booking_reaper = BookingJob(
+    "booking-reaper", reap_expired_holds, BOOKING_REAPER_INTERVAL
+)
+booking_reaper.register_gauges("booking_reaper_reclaimed")
@@ -0,0 +1,136 @@
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import date, datetime
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from src.models.booking import Booking
+from src.models.car_details import Car
+from logs.log_config import logger
+
+# ----------------------------------------------------------------------------------------------------
+# Car locks
+# PostgreSQL (and anything else with row locks) takes SELECT ... FOR UPDATE on
+# the car row, held until the caller commits. SQLite has no row locks, so the
+# fallback is a striped in-process lock; the overlap trigger on the booking
+# table still guards writers in other processes.
+_SQLITE_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def _sqlite_lock(car_id: str):
+    return _SQLITE_LOCKS[zlib.crc32(car_id.encode()) % len(_SQLITE_LOCKS)]
+
+
+@contextmanager
+def locked_car(db, car_id: str):
+    if db.get_bind().dialect.name == "sqlite":
+        with _sqlite_lock(car_id):
+            yield
+    else:
+        db.execute(select(Car.id).where(Car.id == car_id).with_for_update())
+        yield
+
+
+# ----------------------------------------------------------------------------------------------------
+# Overlap check against confirmed bookings of the same car, other than this one
+def conflicting_booking_query(
+    car_id: str, car_rc: str, booking_id: str, start_date: date, end_date: date
+):
+    return (
+        select(Booking.booking_id)
+        .where(
+            or_(
+                Booking.car_id == car_id,
+                and_(Booking.car_id.is_(None), Booking.car_rc == car_rc),
+            ),
+            Booking.booking_id != booking_id,
+            Booking.is_booked == True,
+            Booking.is_cancelled == False,
+            Booking.start_date <= end_date,
+            Booking.end_date >= start_date,
+        )
+        .limit(1)
+    )
+
+
+def check_no_conflict(db, car: Car, booking: Booking):
+    conflict = db.execute(
+        conflicting_booking_query(
+            car.id, car.car_rc, booking.booking_id, booking.start_date, booking.end_date
+        )
+    ).scalar()
+    if conflict:
+        logger.warning(
+            "Car {} is already booked over {} - {} by booking {}",
+            car.id,
+            booking.start_date,
+            booking.end_date,
+            conflict,
+        )
+        raise HTTPException(
+            status_code=409, detail="Car is already booked for the selected dates."
+        )
+
+
+def commit_reservation(db):
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        logger.error("Reservation rejected by overlap constraint: {}", e.orig)
+        raise HTTPException(
+            status_code=409, detail="Car is already booked for the selected dates."
+        )
+    except StaleDataError:
+        # The booking row was moved out (expired hold) after it was checked
+        db.rollback()
+        logger.error("Booking was removed before it could be reserved")
+        raise HTTPException(status_code=404, detail="No booking in process.")
+
+
+# ----------------------------------------------------------------------------------------------------
+# Reservation steps
+def reserve_car(db, booking: Booking, car: Car):
+    with locked_car(db, car.id):
+        check_no_conflict(db, car, booking)
+        booking.car_id = car.id
+        booking.car_name = car.car_name
+        booking.car_rc = car.car_rc
+        booking.car_picture = car.car_picture
+        commit_reservation(db)
+
+
+def confirm_reservation(db, booking: Booking):
+    car = None
+    if booking.car_id:
+        car = db.get(Car, booking.car_id)
+    elif booking.car_rc:
+        car = db.query(Car).filter(Car.car_rc == booking.car_rc).first()
+    if not car:
+        logger.error("No car selected for booking ID: {}", booking.booking_id)
+        raise HTTPException(status_code=400, detail="No car selected for this booking.")
+
+    with locked_car(db, car.id):
+        # The reaper may have expired the hold since the caller read it; the row
+        # lock keeps it from doing so until this transaction ends
+        held = db.execute(
+            select(Booking.booking_id)
+            .where(
+                Booking.booking_id == booking.booking_id,
+                Booking.in_process == True,
+                Booking.is_booked == False,
+            )
+            .with_for_update()
+        ).scalar()
+        if not held:
+            logger.error("Booking {} is no longer in process", booking.booking_id)
+            db.rollback()
+            raise HTTPException(status_code=404, detail="No booking in process.")
+        check_no_conflict(db, car, booking)
+        booking.car_id = car.id
+        booking.is_booked = True
+        booking.in_process = False
+        booking.booked_at = datetime.now()
+        commit_reservation(db)
@@ -0,0 +1,93 @@
+from decimal import Decimal
+from functools import lru_cache
+from operator import attrgetter
+from typing import get_args
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BeforeValidator
+
+
+# ----------------------------------------------------------------------------------------------------
+# Default response class
+# orjson, plus Decimal the way jsonable_encoder converts it, so projected rows
+# holding Numeric columns can be rendered without a jsonable_encoder pass.
+def _default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content):
+    return orjson.dumps(
+        content,
+        default=_default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
+class JSONResponse(ORJSONResponse):
+    def render(self, content):
+        return dumps(content)
+
+
+# ----------------------------------------------------------------------------------------------------
+# Row -> schema projection
+# Builds the schema's output dict straight from an ORM object, catalog entry or
+# Row, applying the field's BeforeValidator (e.g. NumericStr) and nothing else.
+# Routes return the result in a JSONResponse, so FastAPI skips re-validating it
+# against response_model (which still documents the shape) and skips
+# jsonable_encoder. `columns(model)` selects only the fields the schema needs.
+def _before_validator(info):
+    # Annotated[..., BeforeValidator] directly or inside Optional[...]
+    metadata = list(info.metadata)
+    for arg in get_args(info.annotation):
+        metadata.extend(getattr(arg, "__metadata__", ()))
+    for meta in metadata:
+        if isinstance(meta, BeforeValidator):
+            return meta.func
+    return None
+
+
+class Projection:
+    def __init__(self, schema):
+        self.schema = schema
+        self.names = tuple(schema.model_fields)
+        self.converters = []
+        for name, info in schema.model_fields.items():
+            convert = _before_validator(info)
+            if convert is not None:
+                self.converters.append((name, convert))
+        getter = attrgetter(*self.names)
+        self._values = getter if len(self.names) > 1 else lambda row: (getter(row),)
+
+    def columns(self, model):
+        return [getattr(model, name) for name in self.names]
+
+    def one(self, row):
+        item = dict(zip(self.names, self._values(row)))
+        for name, convert in self.converters:
+            item[name] = convert(item[name])
+        return item
+
+    def many(self, rows):
+        one = self.one
+        return [one(row) for row in rows]
+
+
+@lru_cache(maxsize=None)
+def projection(schema):
+    return Projection(schema)
+
+
+def project(schema, row):
+    return projection(schema).one(row)
+
+
+def list_response(schema, rows):
+    return JSONResponse(projection(schema).many(rows))
+
+
+def page_response(schema, rows, next_cursor):
+    return JSONResponse(
+        {"items": projection(schema).many(rows), "next_cursor": next_cursor}
+    )
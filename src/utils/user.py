@@ -1,27 +1,19 @@
-import logging
-from passlib.context import CryptContext
-from database.database import SessionLocal
-from src.models.user import User, OTP
+from src.models.user import User
 from fastapi import HTTPException
-import random, uuid
-
-# Configure logger
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-db = SessionLocal()
+from logs.log_config import logger  # Assuming logger is configured
+from src.utils.otp_store import otp_store
 
 
 # ----------------------------------------------------------------------------------------------------
 # check for same email
-def find_same_email(email: str):
-    logger.info(f"Checking if email {email} exists")
+def find_same_email(db, email: str):
+    logger.info("Checking if email {} exists", email)
     find_same_email = (
         db.query(User).filter(User.email == email and User.is_active == True).first()
     )
 
     if find_same_email:
-        logger.warning(f"Email {email} already exists")
+        logger.warning("Email {} already exists", email)
         if find_same_email.is_active == True:
             raise HTTPException(status_code=400, detail="Email already exists")
         if find_same_email.is_active == False:
@@ -33,8 +25,8 @@ def find_same_email(email: str):
 
 # ----------------------------------------------------------------------------------------------------
 # OTP generation
-def gen_otp(email):
-    logger.info(f"Generating OTP for email {email}")
+def gen_otp(db, email, purpose):
+    logger.info("Generating OTP for email {}", email)
     find_user = (
         db.query(User)
         .filter(User.email == email, User.is_active == True, User.is_deleted == False)
@@ -42,71 +34,31 @@ def gen_otp(email):
     )
 
     if not find_user:
-        logger.error(f"User with email {email} not found")
+        logger.error("User with email {} not found", email)
         raise HTTPException(status_code=400, detail="User not found")
 
-    random_otp = random.randint(1000, 9999)
-
-    # store OTP in the database
-    new_otp = OTP(
-        id=str(uuid.uuid4()),
-        email=find_user.email,
-        user_id=find_user.id,
-        otp=random_otp,
-    )
+    # store OTP in the expiring OTP store, replacing any earlier one
+    random_otp = otp_store.issue(purpose, find_user.email)
 
     send_email(find_user.email, "Login Email", f"OTP is {random_otp}")
 
-    db.add(new_otp)
-    db.commit()
-    db.refresh(new_otp)
-    logger.info(f"OTP {random_otp} generated and sent to email {email}")
+    logger.info("OTP generated and sent to email {}", email)
     return "OTP generated successfully"
 
 
 # ----------------------------------------------------------------------------------------------------
-# Email sender
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from config import SENDER_EMAIL, EMAIL_PASSWORD
-
-
-def send_email(receiver, subject, body):
-    logger.info(f"Sending email to {receiver} with subject {subject}")
-    # SMTP Configuration (for Gmail)
-    smtp_server = "smtp.gmail.com"
-    smtp_port = 587
-    smtp_user = SENDER_EMAIL
-    smtp_pass = EMAIL_PASSWORD
-
-    # Build the mail system to send someone
-    msg = MIMEMultipart()
-    msg["From"] = SENDER_EMAIL
-    msg["To"] = receiver
-    msg["Subject"] = subject
-    msg.attach(MIMEText(body, "plain"))
-
-    # Try to send the mail to receiver
-    try:
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_pass)
-            server.sendmail(SENDER_EMAIL, receiver, msg.as_string())
-        logger.info(f"Email sent successfully to {receiver}")
-    except Exception as e:
-        logger.error(f"Error sending email to {receiver}: {e}")
-        raise HTTPException(status_code=500, detail="Email sending failed")
-
+# Email sender (queued, delivered by the background mail dispatcher)
+from src.utils.mailer import send_email
 
 # ----------------------------------------------------------------------------------------------------
 # Password checker
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt runs in the bounded password worker pool (src/utils/password.py)
+from src.utils.password import hash_password, verify_password
 
 
 def pass_checker(user_pass, hash_pass):
-    logger.info(f"Checking password for user")
-    if pwd_context.verify(user_pass, hash_pass):
+    logger.info("Checking password for user")
+    if verify_password(user_pass, hash_pass):
         logger.info("Password is correct")
         return True
     else:
@@ -123,7 +75,7 @@ from fastapi import HTTPException, status
 
 
 def get_token(id: str, name: str, email: str, phone_no: str):
-    logger.info(f"Generating token for user {email}")
+    logger.info("Generating token for user {}", email)
     try:
         payload = {
             "id": id,
@@ -133,31 +85,8 @@ def get_token(id: str, name: str, email: str, phone_no: str):
             "exp": datetime.now(timezone.utc) + timedelta(days=7),
         }
         access_token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
-        logger.info(f"Token generated for user {email}")
+        logger.info("Token generated for user {}", email)
         return {"access_token": access_token}
     except Exception as e:
-        logger.error(f"Error generating token: {e}")
+        logger.error("Error generating token: {}", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
-
-
-def decode_token(token: str):
-    logger.info(f"Decoding token")
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=ALGORITHM)
-        id = payload.get("id")
-        name = payload.get("name")
-        email = payload.get("email")
-        phone_no = payload.get("phone_no")
-
-        if not id or not name or not email or not phone_no:
-            logger.warning("Invalid token, missing required fields")
-            raise HTTPException(status_code=403, detail="Invalid token")
-        logger.info(f"Token decoded successfully for user {email}")
-        return id, name, email, phone_no
-
-    except jwt.ExpiredSignatureError:
-        logger.error("Token has expired")
-        raise HTTPException(status_code=403, detail="Token has expired")
-    except jwt.InvalidTokenError as e:
-        logger.error(f"Invalid token: {e}")
-        raise HTTPException(status_code=403, detail="Invalid token")
@@ -0,0 +1,51 @@
+import os
+import tempfile
+
+# config reads the environment once, at import: point the app at a scratch
+# database, log file and photo directory before any of it is imported
+TMP_DIR = tempfile.mkdtemp(prefix="car-rental-tests-")
+os.environ["DB_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'test.db')}"
+os.environ["ASYNC_DB_URL"] = f"sqlite+aiosqlite:///{os.path.join(TMP_DIR, 'test.db')}"
+os.environ["LOG_FILE"] = os.path.join(TMP_DIR, "logs", "app.log")
+os.environ["PHOTO_DIR"] = os.path.join(TMP_DIR, "photos")
+os.environ["MAIL_TRANSPORT"] = "memory"
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-the-test-suite")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import uuid
+import pytest
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from database.database import Base, get_engine
+    import src.models.booking
+    import src.models.car_details
+    import src.models.user
+
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture(scope="session")
+def token(engine):
+    from database.database import SessionLocal
+    from src.models.user import User
+    from src.utils.user import get_token
+
+    user_id = str(uuid.uuid4())
+    email = f"{user_id}@example.com"
+    with SessionLocal() as db:
+        db.add(
+            User(
+                id=user_id,
+                name="tester",
+                email=email,
+                phone_no="0000000000",
+                password="x",
+                is_verified=True,
+            )
+        )
+        db.commit()
+    return get_token(user_id, "tester", email, "0000000000")["access_token"]
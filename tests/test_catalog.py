@@ -0,0 +1,88 @@
+import random
+import threading
+import uuid
+from datetime import datetime, timedelta
+from src.utils.catalog import CAR_COLUMNS, CarEntry, CatalogView, FleetCatalog
+
+
+def car(**values):
+    created = datetime(2024, 1, 1) + timedelta(minutes=random.randrange(10000))
+    row = {key: None for key in CAR_COLUMNS}
+    row.update(
+        id=str(uuid.uuid4()),
+        car_name=random.choice(["a", "b", "c"]),
+        car_rc=str(uuid.uuid4()),
+        car_capacity=random.choice([2, 4, 7]),
+        is_created=created,
+        is_updated=created,
+        is_deleted=False,
+        is_booked=False,
+    )
+    row.update(values)
+    return CarEntry(row)
+
+
+def edited(entry, **values):
+    row = {key: getattr(entry, key) for key in CAR_COLUMNS}
+    row.update(values, is_updated=entry.is_updated + timedelta(seconds=1))
+    return CarEntry(row)
+
+
+def loaded_catalog(entries):
+    catalog = FleetCatalog(ttl=0)
+    catalog._entries = {entry.id: entry for entry in entries}
+    catalog.loaded = True
+    return catalog
+
+
+def assert_same_view(view, expected):
+    assert view.by_id == expected.by_id
+    assert view.by_name == expected.by_name
+    assert view.by_rc == expected.by_rc
+    assert view.by_capacity == expected.by_capacity
+    assert view.listed == expected.listed
+    assert view.listed_keys == expected.listed_keys
+
+
+def test_patched_view_matches_a_rebuilt_one():
+    random.seed(7)
+    catalog = loaded_catalog([car() for _ in range(200)])
+    catalog.view(None)
+    for _ in range(300):
+        current = random.choice(list(catalog._entries.values()))
+        change = random.choice(
+            [
+                car(),
+                edited(current, car_name=random.choice(["a", "b", "d"])),
+                edited(current, car_capacity=random.choice([2, 4, 5])),
+                edited(current, is_deleted=not current.is_deleted),
+            ]
+        )
+        catalog.upsert_many([change])
+        view = catalog.view(None)
+        assert_same_view(view, CatalogView(list(catalog._entries.values())))
+
+
+def test_old_views_are_left_untouched():
+    catalog = loaded_catalog([car(car_name="a") for _ in range(5)])
+    before = catalog.view(None)
+    listed = list(before.listed)
+    catalog.upsert_many([car(car_name="a")])
+    assert before.listed == listed
+    assert len(before.by_name["a"]) == 5
+    assert len(catalog.view(None).by_name["a"]) == 6
+
+
+def test_concurrent_lookups_are_all_counted():
+    catalog = loaded_catalog([car() for _ in range(10)])
+
+    def read():
+        for _ in range(2000):
+            catalog.view(None)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert catalog.stats()["hits"] == 8 * 2000
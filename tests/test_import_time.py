@@ -0,0 +1,26 @@
+import os
+from benchmarks.import_time import import_once, slowest_modules
+
+# Same default as `python -m benchmarks.import_time`
+BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", 1500))
+
+
+def test_import_main_is_fast_and_side_effect_free(tmp_path):
+    env = dict(
+        os.environ,
+        DB_URL=f"sqlite:///{tmp_path / 'untouched.db'}",
+        LOG_FILE=str(tmp_path / "logs" / "app.log"),
+        PHOTO_DIR=str(tmp_path / "photos"),
+    )
+    result, stderr = import_once(env, importtime=True)
+
+    assert not result["engine"]
+    assert not result["async_engine"]
+    assert result["threads"] == []
+    assert not result["logging"]
+    assert sorted(os.listdir(tmp_path)) == []
+    slowest = "\n".join(
+        f"{cumulative_us / 1000:8.1f}ms  {name.strip()}"
+        for cumulative_us, _, name in slowest_modules(stderr, 10)
+    )
+    assert result["seconds"] * 1000 <= BUDGET_MS, slowest
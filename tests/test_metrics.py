@@ -0,0 +1,37 @@
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from src.models.user import User
+from src.utils.metrics import db_pool_checkout, gauges, instrument_engine
+
+
+def test_pool_metrics_survive_pool_recreation(tmp_path, engine):
+    test_engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}")
+    User.__table__.create(test_engine)
+    instrument_engine(test_engine)
+
+    for _ in range(2):
+        before = db_pool_checkout.count
+        with Session(test_engine) as db:
+            db.execute(text("select 1"))
+            assert gauges["db_pool_checked_out"]() == 1
+        assert gauges["db_pool_checked_out"]() == 0
+        assert gauges["db_pool_checked_in"]() == 1
+        assert db_pool_checkout.count == before + 1
+        # What the fork handler and close_engines do
+        test_engine.dispose(close=False)
+
+
+def test_checkout_wait_excludes_time_before_the_session_needs_a_connection(
+    tmp_path, engine
+):
+    test_engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}")
+    User.__table__.create(test_engine)
+    instrument_engine(test_engine)
+
+    before = db_pool_checkout.sum
+    with Session(test_engine) as db:
+        db.add(User(id="u", name="n", email="e", phone_no="p", password="x"))
+        time.sleep(0.2)
+        db.commit()
+    assert db_pool_checkout.sum - before < 0.1
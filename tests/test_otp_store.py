@@ -0,0 +1,73 @@
+import fakeredis
+import pytest
+from main import server_workers
+from src.utils.otp_store import (
+    MemoryOTPStore,
+    PAYMENT,
+    RedisOTPStore,
+    VERIFY_EMAIL,
+    check_otp_store,
+)
+
+
+@pytest.fixture
+def store():
+    return RedisOTPStore(fakeredis.FakeRedis(), ttl=60, max_attempts=3)
+
+
+def test_correct_otp_is_consumed(store):
+    otp = store.issue(VERIFY_EMAIL, "a@example.com")
+    assert store.verify(VERIFY_EMAIL, "a@example.com", otp)
+    assert not store.verify(VERIFY_EMAIL, "a@example.com", otp)
+
+
+def test_otp_is_scoped_to_purpose_and_subject(store):
+    otp = store.issue(PAYMENT, "booking-1")
+    assert not store.verify(PAYMENT, "booking-2", otp)
+    assert not store.verify(VERIFY_EMAIL, "booking-1", otp)
+    assert store.verify(PAYMENT, "booking-1", otp)
+
+
+def test_new_otp_replaces_the_old_one(store):
+    first = store.issue(VERIFY_EMAIL, "a@example.com")
+    second = store.issue(VERIFY_EMAIL, "a@example.com")
+    if first != second:
+        assert not store.verify(VERIFY_EMAIL, "a@example.com", first)
+    assert store.verify(VERIFY_EMAIL, "a@example.com", second)
+
+
+def test_too_many_wrong_guesses_discard_the_otp(store):
+    otp = store.issue(VERIFY_EMAIL, "a@example.com")
+    wrong = "0000" if otp != "0000" else "0001"
+    for _ in range(3):
+        assert not store.verify(VERIFY_EMAIL, "a@example.com", wrong)
+    assert not store.verify(VERIFY_EMAIL, "a@example.com", otp)
+
+
+def test_otp_expires_with_its_key(store):
+    store.issue(VERIFY_EMAIL, "a@example.com")
+    assert 0 < store.client.ttl("otp:verify_email:a@example.com") <= 60
+
+
+@pytest.mark.parametrize(
+    "argv, workers",
+    [
+        (["uvicorn", "main:app"], 1),
+        (["uvicorn", "main:app", "--workers", "4"], 4),
+        (["uvicorn", "main:app", "--workers=3"], 3),
+        (["gunicorn", "-w", "2", "main:app"], 2),
+    ],
+)
+def test_server_workers_reads_the_command_line(argv, workers):
+    assert server_workers(argv) == workers
+
+
+def test_memory_store_refuses_several_workers(monkeypatch):
+    monkeypatch.setattr("src.utils.otp_store.otp_store", MemoryOTPStore())
+    check_otp_store(1)
+    with pytest.raises(RuntimeError, match="OTP_STORE=redis"):
+        check_otp_store(2)
+    monkeypatch.setattr(
+        "src.utils.otp_store.otp_store", RedisOTPStore(fakeredis.FakeRedis())
+    )
+    check_otp_store(2)
@@ -0,0 +1,17 @@
+from src.utils.password import (
+    _hash,
+    _verify,
+    get_executor,
+    run_password_job,
+    shutdown_executor,
+)
+
+
+def test_pool_workers_are_not_forked_from_the_app():
+    try:
+        hashed = run_password_job(_hash, "secret")
+        assert run_password_job(_verify, "secret", hashed)
+        assert not run_password_job(_verify, "wrong", hashed)
+        assert get_executor()._mp_context.get_start_method() != "fork"
+    finally:
+        shutdown_executor()
@@ -0,0 +1,52 @@
+import os
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from src.utils.photos import photo_etag, photo_path
+
+NAME = "0123456789abcdef0123456789abcdef.png"
+BODY = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def photo():
+    path = photo_path(NAME)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(BODY)
+    yield path
+    if os.path.exists(path):
+        os.remove(path)
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def test_serves_the_photo_with_its_etag(client, photo):
+    response = client.get(f"/photos/{NAME}")
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["etag"] == photo_etag(NAME)
+
+
+def test_range_request(client, photo):
+    response = client.get(f"/photos/{NAME}", headers={"range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == BODY[10:20]
+
+
+def test_matching_etag_is_not_modified(client, photo):
+    response = client.get(
+        f"/photos/{NAME}", headers={"if-none-match": photo_etag(NAME)}
+    )
+    assert response.status_code == 304
+
+
+def test_matching_etag_for_a_missing_photo_is_not_found(client, photo):
+    os.remove(photo)
+    response = client.get(
+        f"/photos/{NAME}", headers={"if-none-match": photo_etag(NAME)}
+    )
+    assert response.status_code == 404
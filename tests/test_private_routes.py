@@ -0,0 +1,28 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+
+PRIVATE = [
+    "/analytics/revenue",
+    "/analytics/cancellations",
+    "/analytics/funnel",
+    "/analytics/utilization",
+    "/catalog_stats",
+    "/auth_cache_stats",
+]
+
+
+@pytest.fixture(scope="module")
+def client(engine):
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", PRIVATE)
+def test_refused_without_a_valid_token(client, path):
+    assert client.get(path).status_code == 422
+    assert client.get(path, params={"token": "not-a-jwt"}).status_code == 403
+
+
+@pytest.mark.parametrize("path", PRIVATE)
+def test_served_to_a_signed_in_user(client, token, path):
+    assert client.get(path, params={"token": token}).status_code == 200
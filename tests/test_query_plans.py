@@ -0,0 +1,16 @@
+from benchmarks.explain_check import hot_queries, seed, sequential_scans
+from database.database import SessionLocal
+
+
+def test_router_queries_use_indexes(engine):
+    db = SessionLocal()
+    try:
+        seed(db, 2000)
+        scans = {
+            name: found
+            for name, query in hot_queries(db).items()
+            if (found := sequential_scans(db, query))
+        }
+    finally:
+        db.close()
+    assert scans == {}
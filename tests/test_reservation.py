@@ -0,0 +1,39 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete
+from benchmarks.reservation_race import confirm, overlaps, seed
+from database.database import SessionLocal
+from src.models.booking import Booking
+from src.utils.reservation import confirm_reservation
+
+
+def test_parallel_reservations_never_overlap(engine):
+    car_id, booking_ids = seed(attempts=300, horizon=30)
+
+    with ThreadPoolExecutor(32) as pool:
+        outcomes = Counter(
+            pool.map(lambda booking_id: confirm(booking_id, True), booking_ids)
+        )
+
+    assert outcomes["confirmed"] > 0
+    assert outcomes["confirmed"] + outcomes["rejected 409"] == len(booking_ids)
+    assert overlaps(car_id) == 0
+
+
+def test_expired_hold_is_not_confirmed(engine):
+    _, (booking_id,) = seed(attempts=1, horizon=1)
+    db = SessionLocal()
+    booking = db.get(Booking, booking_id)
+
+    # The reaper moves the hold out after the route has read it
+    reaper = SessionLocal()
+    reaper.execute(delete(Booking).where(Booking.booking_id == booking_id))
+    reaper.commit()
+    reaper.close()
+
+    with pytest.raises(HTTPException) as raised:
+        confirm_reservation(db, booking)
+    assert raised.value.status_code == 404
+    db.close()
@@ -0,0 +1,68 @@
+import uuid
+from datetime import date, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from database.database import SessionLocal
+from main import app
+from src.models.car_details import Car
+
+ROUTES = ["/select_date_capacity", "/async/select_date_capacity"]
+
+
+@pytest.fixture(scope="module")
+def client(engine):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def deleted_capacity(engine):
+    car_id = str(uuid.uuid4())
+    with SessionLocal() as db:
+        db.execute(
+            insert(Car),
+            [
+                dict(
+                    id=car_id,
+                    car_name="retired",
+                    car_rc=f"RC-{car_id}",
+                    car_rent=100,
+                    car_capacity=97,
+                    car_detail="deleted",
+                    is_deleted=True,
+                )
+            ],
+        )
+        db.commit()
+    return 97
+
+
+def request(client, path, token, start, end, capacity):
+    return client.post(
+        path,
+        params={"token": token},
+        json=dict(
+            start_date=start.isoformat(),
+            end_date=end.isoformat(),
+            car_capacity=capacity,
+        ),
+    )
+
+
+@pytest.mark.parametrize("path", ROUTES)
+def test_deleted_cars_do_not_count(client, token, deleted_capacity, path):
+    start = date.today() + timedelta(days=1)
+    response = request(
+        client, path, token, start, start + timedelta(days=2), deleted_capacity
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("path", ROUTES)
+def test_end_before_start_is_refused(client, token, deleted_capacity, path):
+    start = date.today() + timedelta(days=5)
+    response = request(
+        client, path, token, start, start - timedelta(days=2), deleted_capacity
+    )
+    assert response.status_code == 400